@@ -0,0 +1,231 @@
+"""
+Benchmarks of the hot paths of the package: 'Game.play' against 'n_rounds',
+'Tournament.play' against the number of players and 'repetitions',
+'Evolution.play' against 'initial_population' and 'generations', and the
+throughput of the torch-based players (only if torch is installed).
+
+Every workload runs with fixed seeds ('random.seed' also seeds the
+vectorized games). The result is a JSON file with the best
+wall time of several runs and the peak of memory allocated by Python
+(tracemalloc) of each workload, which can be compared against a stored
+baseline to detect regressions. Workloads that are missing from the
+baseline, or skipped because an optional dependency is missing, are
+reported, and a missing one fails the comparison: record the baseline
+again after adding workloads.
+
+Examples (from the 'DPI' directory):
+    python benchmarks/run.py --output results.json
+    python benchmarks/run.py --compare benchmarks/baseline.json
+    python benchmarks/run.py --only game --save-baseline benchmarks/baseline.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import time
+import tracemalloc
+import numpy as np
+from typing import Callable
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dpi import (Dilemma, Cooperator, Defector, Tft, Grudger, Detective4MovsTft,
+                 Destructomatic, Periodic_CD, Periodic_DC, Periodic_CCD,
+                 Periodic_CDD, Sema4All_Killer, Game, Tournament, Evolution)
+
+SEED = 2024
+DILEMMA = Dilemma(2, -1, 3, 0)
+STRATEGIES = (Tft, Grudger, Detective4MovsTft, Destructomatic, Sema4All_Killer,
+              Periodic_CD, Periodic_DC, Periodic_CCD, Periodic_CDD, Cooperator,
+              Defector)
+
+def make_players(n_players: int) -> tuple:
+    """'n_players' players, going through the built-in strategies in order"""
+    return tuple(STRATEGIES[i % len(STRATEGIES)](DILEMMA, f"player_{i}")
+                 for i in range(n_players))
+
+def game_workload(n_rounds: int) -> Callable[[], None]:
+    # Sema4All_Killer is random, so the game never reaches a cycle
+    def run():
+        Game(Tft(DILEMMA, "tft"), Sema4All_Killer(DILEMMA, "sema4all"),
+             n_rounds, error=0.01).play()
+    return run
+
+def tournament_workload(n_players: int, repetitions: int) -> Callable[[], None]:
+    def run():
+        Tournament(make_players(n_players), n_rounds=100, error=0.01,
+                   repetitions=repetitions).play()
+    return run
+
+def evolution_workload(population: int, generations: int,
+                       exact_games: bool = False) -> Callable[[], None]:
+    def run():
+        Evolution(make_players(len(STRATEGIES)), n_rounds=100, error=0.01,
+                  repetitions=2, generations=generations, reproductivity=0.05,
+                  initial_population=population, samples=20,
+                  exact_games=exact_games, seed=SEED).play(plot=False)
+    return run
+
+def nn_workload(n_moves: int) -> Callable[[], None] | None:
+    """Decisions of 'AdaptiveNNStrategy' (None if torch is not installed)"""
+    try:
+        import torch
+        from dpi import AdaptiveNNStrategy
+    except ImportError:
+        return None
+
+    def run():
+        torch.manual_seed(SEED)
+        strategy = AdaptiveNNStrategy()
+        strategy.history = [[0, 0], [0, 1], [1, 0], [1, 1]]
+        for _ in range(n_moves):
+            strategy.play(1)
+    return run
+
+def nn_tournament_workload(n_players: int, player: str) -> Callable[[], None] | None:
+    """Tournament of two torch players of class 'player' against the built-in
+    strategies (batched)"""
+    try:
+        import torch
+        import dpi
+        player_class = getattr(dpi, player)
+    except ImportError:
+        return None
+
+    def run():
+        torch.manual_seed(SEED)
+        players = make_players(n_players) + tuple(player_class(DILEMMA, f"nn_{i}")
+                                                  for i in range(2))
+        Tournament(players, n_rounds=100, error=0.01, repetitions=2).play()
+    return run
+
+def workloads() -> dict[str, dict[str, Callable[[], None] | None]]:
+    """Reference workloads, grouped by the part of the package they measure"""
+    return {
+        "game": {f"game/rounds={n}": game_workload(n)
+                 for n in (100, 1_000, 10_000, 100_000)},
+        "tournament": {f"tournament/players={n}/repetitions={r}":
+                       tournament_workload(n, r)
+                       for n in (5, 10, 20) for r in (1, 5)},
+        "evolution": {
+            **{f"evolution/population={p}/generations={g}": evolution_workload(p, g)
+               for p in (100, 10_000, 1_000_000) for g in (10, 1_000)},
+            **{f"evolution/exact/population={p}/generations=5":
+               evolution_workload(p, 5, exact_games=True) for p in (50, 200)},
+        },
+        "nn": {**{f"nn/moves={n}": nn_workload(n) for n in (1_000,)},
+               **{f"nn/tournament/{player}/players={n}":
+                  nn_tournament_workload(n, player)
+                  for player in ("NNPlayer", "LSTMPlayer", "StatefulLSTMPlayer")
+                  for n in (10,)}},
+    }
+
+def measure(run: Callable[[], None], repeats: int) -> dict[str, float]:
+    """
+    Best wall time of 'repeats' runs and memory peak of one more run (traced
+    apart, because tracemalloc slows the code down)
+
+    Parameters:
+        - run (Callable[[], None]): workload
+        - repeats (int): number of timed runs
+
+    Results:
+        - A dict with the time (in seconds) and the peak (in bytes)
+    """
+    times = []
+    for _ in range(repeats):
+        random.seed(SEED)
+        np.random.seed(SEED)
+        start = time.perf_counter()
+        run()
+        times.append(time.perf_counter() - start)
+
+    random.seed(SEED)
+    np.random.seed(SEED)
+    tracemalloc.start()
+    run()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"seconds": min(times), "peak_bytes": peak}
+
+def compare(results: dict, baseline: dict, tolerance: float) -> tuple[list[str], list[str]]:
+    """
+    Workloads slower (or using more memory) than the baseline by more than
+    'tolerance' (in base 1), and workloads that could not be compared
+
+    Results:
+        - A list with a description of each regression, and a list with the
+     workloads measured but missing from the baseline
+    """
+    regressions = []
+    missing = []
+    for name, current in results["benchmarks"].items():
+        reference = baseline["benchmarks"].get(name)
+        if reference is None:
+            missing.append(name)
+            continue
+        for key in ("seconds", "peak_bytes"):
+            if current[key] > reference[key] * (1 + tolerance):
+                regressions.append(f"{name}: {key} {reference[key]:.4g} -> "
+                                   f"{current[key]:.4g} "
+                                   f"({current[key] / reference[key]:.2f}x)")
+    return regressions, missing
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmarks of the dpi package")
+    parser.add_argument("--only", nargs="+", choices=sorted(workloads()),
+                        default=None, help="groups of workloads to run")
+    parser.add_argument("--repeats", type=int, default=3,
+                        help="timed runs of each workload (the best is kept)")
+    parser.add_argument("--output", default=None, help="JSON file for the results")
+    parser.add_argument("--compare", default=None, help="baseline JSON file")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="allowed slowdown over the baseline (base 1)")
+    parser.add_argument("--save-baseline", default=None,
+                        help="JSON file where the results are stored as baseline")
+    return parser.parse_args(argv)
+
+def main(argv: list[str] | None = None) -> int:
+    args = parse_args(argv)
+
+    results = {"python": platform.python_version(),
+               "numpy": np.__version__,
+               "machine": platform.machine(),
+               "benchmarks": {}}
+    skipped = []
+    for group, group_workloads in workloads().items():
+        if args.only is not None and group not in args.only:
+            continue
+        for name, run in group_workloads.items():
+            if run is None:
+                print(f"{name}: skipped")
+                skipped.append(name)
+                continue
+            results["benchmarks"][name] = measure(run, args.repeats)
+            print(f"{name}: {results['benchmarks'][name]['seconds']:.4f} s, "
+                  f"{results['benchmarks'][name]['peak_bytes'] / 2**20:.2f} MiB")
+
+    for path in (args.output, args.save_baseline):
+        if path is not None:
+            with open(path, "w") as file:
+                json.dump(results, file, indent=2)
+
+    if args.compare is not None:
+        with open(args.compare) as file:
+            regressions, missing = compare(results, json.load(file), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        for name in missing:
+            print(f"NOT IN BASELINE {name} (not compared)")
+        for name in skipped:
+            print(f"SKIPPED {name} (not compared)")
+        return 1 if regressions or missing else 0
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
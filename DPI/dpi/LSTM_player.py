@@ -1,6 +1,10 @@
 import torch
 import torch.nn as nn
 import torch.optim as optim
+import numpy as np
+from .dilemma import Dilemma, C
+from .player import MatchState
+from .torch_player import TorchPlayer
 
 # Definimos la LSTM que predice la próxima jugada del oponente
 class PrisonerDilemmaLSTM(nn.Module):
@@ -18,6 +22,18 @@ class PrisonerDilemmaLSTM(nn.Module):
         out = self.fc(out[:, -1, :])
         return self.sigmoid(out)
 
+    def sequence(self, x, hidden=None):
+        """
+        Runs the LSTM from a given state (zeros if None), without restarting
+        it for every prediction
+
+        Results:
+            - Probability of a defection after every timestep (batch, seq, 1)
+            - Final (h, c) state
+        """
+        out, hidden = self.lstm(x, hidden)
+        return self.sigmoid(self.fc(out)), hidden
+
 # Clase de la estrategia que utiliza la LSTM para adaptarse
 class AdaptiveLSTMStrategy:
     def __init__(self):
@@ -58,3 +74,122 @@ class AdaptiveLSTMStrategy:
         
         # Decisión: deserta (1) si predice que el oponente desertará, coopera (0) si no
         return 1 if prediction.item() > 0.5 else 0
+
+# Jugador del torneo con la misma LSTM, que decide todas sus partidas a la vez
+class LSTMPlayer(TorchPlayer):
+
+    window = 5
+
+    def __init__(self, dilemma: Dilemma, name: str = "",
+                       batch_size: int = 32, lr: float = 0.01):
+        """
+        'Player' version of 'AdaptiveLSTMStrategy' (see 'TorchPlayer')
+
+        Parameters:
+            - dilemma (Dilemma): the dilemma that this player will play
+            - name (str): the name of the strategy
+            - batch_size (int = 32): training samples per optimizer step
+            - lr (float = 0.01): learning rate of the Adam optimizer
+        """
+        self.lr = lr
+        super().__init__(dilemma, name, batch_size)
+
+    def build_model(self):
+        return PrisonerDilemmaLSTM()
+
+    def build_optimizer(self):
+        return optim.Adam(self.model.parameters(), lr=self.lr)
+
+    def model_inputs(self, windows):
+        # One feature per timestep
+        return windows.unsqueeze(-1)
+
+class StatefulLSTMState(MatchState):
+
+    __slots__ = ("stream",)
+
+    def __init__(self):
+        super().__init__()
+        self.stream = StatefulLSTMPlayer.new_stream()
+
+# Versión incremental: guarda el estado de la LSTM entre jugadas
+class StatefulLSTMPlayer(LSTMPlayer):
+
+    State = StatefulLSTMState
+
+    def __init__(self, dilemma: Dilemma, name: str = "",
+                       bptt: int = 16, lr: float = 0.01):
+        """
+        LSTM player that carries the hidden state of each game between moves:
+        every round feeds a single timestep (the last move of the opponent),
+        instead of rerunning the LSTM over a window from a zero state. It
+        learns with truncated backpropagation through time: every 'bptt'
+        rounds, the last segment is rerun with gradients from its (detached)
+        initial state and each output is trained to predict the following
+        move. Its memory is therefore not limited to a window.
+
+        Parameters:
+            - dilemma (Dilemma): the dilemma that this player will play
+            - name (str): the name of the strategy
+            - bptt (int = 16): length of the training segments
+            - lr (float = 0.01): learning rate of the Adam optimizer
+        """
+        self.bptt = bptt
+        super().__init__(dilemma, name, lr=lr)
+
+    @staticmethod
+    def new_stream() -> dict:
+        """State of a group of games: current and segment (h, c), and the
+        moves of the current segment"""
+        return {"hidden": None, "start": None, "inputs": []}
+
+    def advance(self, stream: dict, moves: np.ndarray) -> np.ndarray:
+        """
+        Feeds the last move of the opponent in each game of the stream
+
+        Parameters:
+            - stream (dict): built by 'new_stream' (updated in place)
+            - moves (np.ndarray): last move of the opponent in each game
+
+        Results:
+            - An int8 array with the action (C=0 or D=1) of each game
+        """
+        x = torch.from_numpy(moves.astype(np.float32)).reshape(-1, 1, 1)
+        with torch.no_grad():
+            probabilities, stream["hidden"] = self.model.sequence(x, stream["hidden"])
+
+        stream["inputs"].append(x)
+        if len(stream["inputs"]) > self.bptt:
+            self.train_segment(stream)
+        return (probabilities.reshape(-1) > 0.5).numpy().astype(np.int8)
+
+    def train_segment(self, stream: dict) -> None:
+        """One optimizer step on the last 'bptt' transitions of every game"""
+        sequence = torch.cat(stream["inputs"], dim=1)   # (games, bptt + 1, 1)
+        probabilities, hidden = self.model.sequence(sequence[:, :-1], stream["start"])
+        loss = self.criterion(probabilities, sequence[:, 1:])
+
+        self.optimizer.zero_grad()
+        loss.backward()
+        self.optimizer.step()
+
+        # The next segment starts where this one ended, without gradients
+        stream["start"] = tuple(h.detach() for h in hidden)
+        stream["inputs"] = [sequence[:, -1:]]
+
+    def strategy(self, opponent):
+        """Defects if the model predicts a defection of the opponent"""
+        if len(opponent.state.history) == 0:
+            # New game
+            self.state.stream = self.new_stream()
+            return C
+        return int(self.advance(self.state.stream,
+                                np.array([opponent.state.history[-1]]))[0])
+
+    def batch_init(self, players):
+        return self.new_stream()
+
+    def batch_strategy(self, state, t, my_last, opp_last, rng):
+        if t == 0:
+            return np.full(len(opp_last), C, dtype=np.int8)
+        return self.advance(state, opp_last)
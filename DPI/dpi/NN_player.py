@@ -1,12 +1,11 @@
-
 import torch
 import torch.nn as nn
 import torch.optim as optim
-
-from player import Player
+from .dilemma import Dilemma
+from .torch_player import TorchPlayer
 
 # Definimos la red neuronal que predice la próxima jugada del oponente
-class PrisonerDilemmaNN(nn.Module, Player):
+class PrisonerDilemmaNN(nn.Module):
     def __init__(self, input_size=4, hidden_size=16, output_size=1):
         super(PrisonerDilemmaNN, self).__init__()
         self.fc1 = nn.Linear(input_size, hidden_size)
@@ -29,11 +28,11 @@ class AdaptiveNNStrategy:
     def update(self, my_move, opponent_move):
         # Agrega la última jugada al historial
         self.history.append([my_move, opponent_move])
-        if len(self.history) > 4:
+        if len(self.history) > 5:
             self.history.pop(0)
 
-        # Entrena la red si hay suficientes datos
-        if len(self.history) == 4:
+        # Entrena la red si hay suficientes datos (4 jugadas y la siguiente)
+        if len(self.history) == 5:
             # Prepara el conjunto de datos de entrenamiento
             input_data = torch.tensor([x[1] for x in self.history[:-1]], dtype=torch.float32).unsqueeze(0)
             target = torch.tensor([self.history[-1][1]], dtype=torch.float32).unsqueeze(0)
@@ -53,8 +52,33 @@ class AdaptiveNNStrategy:
             return 0  # Cooperar al inicio
 
         # Prepara los datos de entrada basados en las últimas jugadas
-        input_data = torch.tensor([x[1] for x in self.history], dtype=torch.float32).unsqueeze(0)
+        input_data = torch.tensor([x[1] for x in self.history[-4:]], dtype=torch.float32).unsqueeze(0)
         prediction = self.model(input_data)
         
         # Decisión: deserta (1) si predice que el oponente desertará, coopera (0) si no
         return 1 if prediction.item() > 0.5 else 0
+
+# Jugador del torneo con la misma red, que decide todas sus partidas a la vez
+class NNPlayer(TorchPlayer):
+
+    window = 4
+
+    def __init__(self, dilemma: Dilemma, name: str = "",
+                       batch_size: int = 32, lr: float = 0.01):
+        """
+        'Player' version of 'AdaptiveNNStrategy' (see 'TorchPlayer')
+
+        Parameters:
+            - dilemma (Dilemma): the dilemma that this player will play
+            - name (str): the name of the strategy
+            - batch_size (int = 32): training samples per optimizer step
+            - lr (float = 0.01): learning rate of the SGD optimizer
+        """
+        self.lr = lr
+        super().__init__(dilemma, name, batch_size)
+
+    def build_model(self):
+        return PrisonerDilemmaNN(input_size=self.window)
+
+    def build_optimizer(self):
+        return optim.SGD(self.model.parameters(), lr=self.lr)
@@ -0,0 +1,48 @@
+"""
+Iterated Prisoner's Dilemma (DPI): players, games, tournaments and evolutionary
+tournaments.
+
+Importing the package has no side effects: matplotlib is only imported when a
+plot is requested, and the torch-based players are only imported when they
+are accessed.
+"""
+
+from .dilemma import Dilemma, C, D
+from .history import History
+from .player import (Player, Cooperator, Defector, Tft, Grudger,
+                     Detective4MovsTft, Destructomatic, Periodic_CD, Periodic_DC,
+                     Periodic_CCD, Periodic_CDD)
+from .sema4all_killer import Sema4All_Killer
+from .lookup_player import LookupPlayer
+from .game import Game
+from .batch_game import BatchGame
+from .markov import Automaton, MarkovGame
+from .payoff_matrix import PayoffMatrix
+from .tournament import Tournament, rescore_outcomes
+from .evolution import Evolution
+from .lattice import Lattice
+from .genetic import GeneticSearch
+from .results import ResultsWriter, iter_results, load_results, load_metadata
+from .profiling import Profiler
+from .cache import MatchCache
+from .scheduler import Scheduler
+from .sweep import Sweep
+
+# Players that need torch (loaded on first access)
+_TORCH_ATTRIBUTES = {
+    "PrisonerDilemmaNN": "NN_player",
+    "AdaptiveNNStrategy": "NN_player",
+    "PrisonerDilemmaLSTM": "LSTM_player",
+    "AdaptiveLSTMStrategy": "LSTM_player",
+    "NNPlayer": "NN_player",
+    "LSTMPlayer": "LSTM_player",
+    "StatefulLSTMPlayer": "LSTM_player",
+    "TorchPlayer": "torch_player",
+}
+
+def __getattr__(name: str):
+    if name in _TORCH_ATTRIBUTES:
+        import importlib
+        module = importlib.import_module(f".{_TORCH_ATTRIBUTES[name]}", __name__)
+        return getattr(module, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,234 @@
+"""
+Command line interface of the package
+
+Examples:
+    python -m dpi tournament --rounds 150 --repetitions 1
+    python -m dpi tournament --repetitions 100 --seed 1 --output results/
+    python -m dpi tournament --error 0.01 --cache matches.db
+    DPI_AUTHKEY=secret python -m dpi tournament --jobs 8 --listen 0.0.0.0:6000 \\
+        --remote-workers 16
+    DPI_AUTHKEY=secret python -m dpi worker --connect host:6000
+    python -m dpi evolution --players tft destructor sema4all periodic_cd \\
+        --population 50 --generations 10 --reproductivity 0.2 --rounds 50
+    python -m dpi sweep --errors 0 0.01 0.05 --rounds 50 100 200 \\
+        --repetitions 1 10 --jobs 4 --output sweep.csv
+    python -m dpi lattice --players tft defector cooperator --size 500 500 \\
+        --generations 50 --snapshots grids.npy
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+from . import profiling
+from . import cache as match_cache
+from .cache import MatchCache
+from .scheduler import run_worker
+from .dilemma import Dilemma
+from .player import (Player, Cooperator, Defector, Tft, Grudger,
+                     Detective4MovsTft, Destructomatic, Periodic_CD, Periodic_DC,
+                     Periodic_CCD, Periodic_CDD)
+from .sema4all_killer import Sema4All_Killer
+from .tournament import Tournament
+from .evolution import Evolution, DYNAMICS
+from .lattice import Lattice, NEIGHBOURHOODS, UPDATE_RULES
+from .sweep import Sweep, write_csv
+from .results import ResultsWriter
+
+STRATEGIES = {
+    "cooperator": Cooperator,
+    "defector": Defector,
+    "tft": Tft,
+    "grudger": Grudger,
+    "detective": Detective4MovsTft,
+    "destructor": Destructomatic,
+    "sema4all": Sema4All_Killer,
+    "periodic_cd": Periodic_CD,
+    "periodic_dc": Periodic_DC,
+    "periodic_ccd": Periodic_CCD,
+    "periodic_cdd": Periodic_CDD,
+}
+
+DEFAULT_PLAYERS = ["tft", "grudger", "detective", "destructor", "sema4all",
+                   "periodic_cd", "periodic_dc", "periodic_ccd", "periodic_cdd"]
+
+def build_players(names: list[str], dilemma: Dilemma) -> tuple[Player, ...]:
+    """Creates one player per strategy name (the name is also the player's)"""
+    return tuple(STRATEGIES[name](dilemma, name) for name in names)
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="python -m dpi",
+                                     description="Iterated Prisoner's Dilemma")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    shared = argparse.ArgumentParser(add_help=False)
+    shared.add_argument("--players", nargs="+", choices=sorted(STRATEGIES),
+                        default=DEFAULT_PLAYERS, help="strategies taking part")
+    shared.add_argument("--payoffs", nargs=4, type=float, default=[2, -1, 3, 0],
+                        metavar=("CC", "CD", "DC", "DD"), help="payoffs of the dilemma")
+    shared.add_argument("--profile", nargs="?", const="", default=None, metavar="FILE",
+                        help="print where the time goes (and dump it to FILE as JSON)")
+
+    common = argparse.ArgumentParser(add_help=False, parents=[shared])
+    common.add_argument("--rounds", type=int, default=100, help="rounds of each game")
+    common.add_argument("--error", type=float, default=0.0, help="error probability")
+    common.add_argument("--repetitions", type=int, default=2,
+                        help="games of each pairing")
+    common.add_argument("--no-plot", action="store_true", help="do not show the plot")
+    common.add_argument("--cache", default=None, metavar="FILE",
+                        help="SQLite file where the matches are stored and reused")
+
+    tournament = commands.add_parser("tournament", parents=[common],
+                                     help="all-against-all tournament")
+    tournament.add_argument("--jobs", type=int, default=1, help="worker processes")
+    tournament.add_argument("--seed", type=int, default=None, help="master seed")
+    tournament.add_argument("--output", default=None,
+                            help="directory where the record of every match is stored")
+    tournament.add_argument("--listen", default=None, metavar="HOST:PORT",
+                            help="address where remote workers connect "
+                                 "(the shared secret is read from DPI_AUTHKEY)")
+    tournament.add_argument("--remote-workers", type=int, default=0,
+                            help="workers expected from other machines")
+
+    worker = commands.add_parser("worker", help="worker of a remote tournament")
+    worker.add_argument("--connect", required=True, metavar="HOST:PORT",
+                        help="address of the tournament ('--listen')")
+
+    evolution = commands.add_parser("evolution", parents=[common],
+                                    help="evolutionary tournament")
+    evolution.add_argument("--generations", type=int, default=None,
+                           help="total number of generations (default: 100, or "
+                                "the target of the checkpoint when resuming)")
+    evolution.add_argument("--reproductivity", type=float, default=0.05)
+    evolution.add_argument("--population", type=int, default=100,
+                           help="total initial population")
+    evolution.add_argument("--dynamics", choices=DYNAMICS, default="selection",
+                           help="population dynamics between generations")
+    evolution.add_argument("--selection", type=float, default=1.0,
+                           help="intensity of selection of the replicator, "
+                                "moran and wright_fisher dynamics")
+    evolution.add_argument("--checkpoint", default=None,
+                           help="file where the state is saved; if it already "
+                                "exists, the run continues from it")
+    evolution.add_argument("--checkpoint-every", type=int, default=100,
+                           help="generations between checkpoints")
+
+    lattice = commands.add_parser("lattice", parents=[common],
+                                  help="spatial evolutionary tournament on a grid")
+    lattice.add_argument("--size", type=int, nargs=2, default=[100, 100],
+                         metavar=("ROWS", "COLUMNS"))
+    lattice.add_argument("--generations", type=int, default=100)
+    lattice.add_argument("--neighbourhood", choices=sorted(NEIGHBOURHOODS),
+                         default="moore")
+    lattice.add_argument("--update", choices=UPDATE_RULES, default="imitate_best")
+    lattice.add_argument("--seed", type=int, default=None)
+    lattice.add_argument("--snapshots", default=None,
+                         help=".npy file where the grid of every generation is stored")
+
+    sweep = commands.add_parser("sweep", parents=[shared],
+                                help="tournaments over a grid of settings")
+    sweep.add_argument("--errors", nargs="+", type=float, default=[0.0],
+                       help="error probabilities")
+    sweep.add_argument("--rounds", nargs="+", type=int, default=[100],
+                       help="rounds of each game")
+    sweep.add_argument("--repetitions", nargs="+", type=int, default=[2],
+                       help="games of each pairing")
+    sweep.add_argument("--roster", nargs="+", action="append", default=None,
+                       choices=sorted(STRATEGIES), metavar="STRATEGY",
+                       help="subset of the players that play a tournament "
+                            "(can be repeated; all the players if not given)")
+    sweep.add_argument("--evolve", type=int, default=None, metavar="GENERATIONS",
+                       help="run evolutions instead of tournaments")
+    sweep.add_argument("--jobs", type=int, default=1, help="worker processes")
+    sweep.add_argument("--seed", type=int, default=None, help="master seed")
+    sweep.add_argument("--output", default=None,
+                       help="CSV file where the table is stored (printed if not given)")
+
+    return parser.parse_args(argv)
+
+def parse_address(address: str) -> tuple[str, int]:
+    host, port = address.rsplit(":", 1)
+    return host, int(port)
+
+def main(argv: list[str] | None = None) -> None:
+    args = parse_args(argv)
+    if args.command == "worker":
+        run_worker(parse_address(args.connect), os.environ["DPI_AUTHKEY"].encode())
+        return
+
+    dilemma = Dilemma(*args.payoffs)
+    players = build_players(args.players, dilemma)
+    profiler = profiling.enable() if args.profile is not None else None
+    cache = (match_cache.enable(MatchCache(args.cache))
+             if getattr(args, "cache", None) else None)
+
+    if args.command == "tournament":
+        tournament = Tournament(players, n_rounds=args.rounds, error=args.error,
+                                repetitions=args.repetitions, n_jobs=args.jobs,
+                                seed=args.seed)
+        if args.listen is not None or args.remote_workers:
+            address = parse_address(args.listen or "0.0.0.0:0")
+            tournament.play_sharded(args.remote_workers, address,
+                                    os.environ["DPI_AUTHKEY"].encode())
+        elif args.output is None:
+            tournament.play()
+        else:
+            metadata = {"players": args.players, "payoffs": args.payoffs,
+                        "rounds": args.rounds, "error": args.error,
+                        "repetitions": args.repetitions}
+            with ResultsWriter(args.output, metadata=metadata) as sink:
+                tournament.play(sink=sink)
+        for player, points in tournament.ranking.items():
+            print(f"{player.name}: {points}")
+        if not args.no_plot:
+            tournament.plot_results()
+
+    elif args.command == "evolution" and args.checkpoint is not None \
+            and os.path.exists(args.checkpoint):
+        Evolution.resume(args.checkpoint, do_print=True, plot=not args.no_plot,
+                         checkpoint_every=args.checkpoint_every,
+                         generations=args.generations)
+
+    elif args.command == "evolution":
+        evolution = Evolution(players, n_rounds=args.rounds, error=args.error,
+                              repetitions=args.repetitions,
+                              generations=100 if args.generations is None
+                                          else args.generations,
+                              reproductivity=args.reproductivity,
+                              initial_population=args.population,
+                              dynamics=args.dynamics,
+                              selection=args.selection)
+        evolution.play(do_print=True, plot=not args.no_plot,
+                       checkpoint=args.checkpoint,
+                       checkpoint_every=args.checkpoint_every)
+
+    elif args.command == "lattice":
+        lattice = Lattice(players, shape=tuple(args.size), n_rounds=args.rounds,
+                          error=args.error, generations=args.generations,
+                          neighbourhood=args.neighbourhood, update=args.update,
+                          seed=args.seed)
+        lattice.play(do_print=True, plot=not args.no_plot, snapshots=args.snapshots)
+
+    elif args.command == "sweep":
+        sweep = Sweep(players, errors=args.errors, rounds=args.rounds,
+                      repetitions=args.repetitions, rosters=args.roster,
+                      seed=args.seed, n_jobs=args.jobs)
+        table = sweep.play() if args.evolve is None else sweep.evolve(args.evolve)
+        if args.output is None:
+            print(",".join(table.dtype.names))
+            for row in table:
+                print(",".join(str(value) for value in row.tolist()))
+        else:
+            write_csv(table, args.output)
+
+    if cache is not None:
+        match_cache.disable()
+        cache.close()
+    if profiler is not None:
+        profiling.disable()
+        print(profiler.summary())
+        if args.profile:
+            profiler.dump(args.profile)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,304 @@
+from __future__ import annotations
+
+import itertools
+import time
+import numpy as np
+from typing import Sequence
+from . import profiling
+from .dilemma import Dilemma, C, D
+from .player import Player
+from .game import Game
+from .parallel import seeded_rng
+
+# Maximum number of games of a single 'BatchGame' in 'round_robin_scores' and
+# 'play_records' (more games are played in several batches, so the memory
+# does not grow with the size of the tournament)
+BATCH_SIZE = 10_000
+
+class BatchGame:
+
+    def __init__(self, players_1: list[Player],
+                       players_2: list[Player],
+                       n_rounds: int = 100,
+                       error: float = 0.0,
+                       dilemma: Dilemma | None = None,
+                       rng: np.random.Generator | None = None,
+                       record_history: bool = False,
+                       checkpoints: Sequence[int] | None = None):
+        """
+        Plays many games at once, round by round in lockstep. Strategy states,
+        last moves and noise live in NumPy arrays (one value per game), and
+        the moves of every group of equivalent players are computed with a
+        single call to their 'batch_strategy'. Scores and outcome counts are
+        accumulated every round, so the memory does not depend on 'n_rounds'
+        (unless the histories are recorded).
+
+        Parameters:
+            - players_1 (list[Player]): first player of each game
+            - players_2 (list[Player]): second player of each game
+            - n_rounds (int = 100): number of rounds in each game
+            - error (float = 0.0): error probability (in base 1)
+            - dilemma (Dilemma | None = None): dilemma used to score the games.
+         By default, the one of the first player of the first game
+            - rng (np.random.Generator | None = None): random generator for the
+         noise and the random strategies
+            - record_history (bool = False): if True, the actions of every
+         round are kept in 'self.history_1' and 'self.history_2' (arrays
+         (n_games, n_rounds))
+            - checkpoints (Sequence[int] | None = None): increasing numbers of
+         rounds at which the outcome counts are also kept (in
+         'self.checkpoint_outcomes'), e.g. to get the results of shorter games
+         from the same play
+
+        As in 'Game', dilemmas with more than 2 actions raise a ValueError.
+        """
+
+        assert n_rounds > 0, "'n_rounds' should be greater than 0"
+        assert len(players_1) == len(players_2), \
+            "'players_1' and 'players_2' should have the same length"
+        assert BatchGame.supports(list(players_1) + list(players_2)), \
+            "every player should have a 'batch_strategy'"
+        checkpoints = np.array([] if checkpoints is None else checkpoints, dtype=np.int64)
+        assert np.all(np.diff(checkpoints) > 0) and np.all((checkpoints > 0)
+                                                           & (checkpoints <= n_rounds)), \
+            "'checkpoints' should be increasing numbers of rounds up to 'n_rounds'"
+
+        self.players_1 = players_1
+        self.players_2 = players_2
+        self.n_rounds = n_rounds
+        self.error = error
+        self.dilemma = dilemma if dilemma is not None else players_1[0].dilemma
+        if self.dilemma.n_actions != 2:
+            raise ValueError("'BatchGame' only plays games of 2 actions (C and D), "
+                             f"not {self.dilemma.n_actions}")
+        self.rng = rng if rng is not None else seeded_rng()
+
+        n_games = len(players_1)
+        self.checkpoints = checkpoints
+
+        # Actions of every round (only if 'record_history')
+        self.history_1 = np.zeros((n_games, n_rounds), dtype=np.int8) if record_history else None
+        self.history_2 = np.zeros((n_games, n_rounds), dtype=np.int8) if record_history else None
+
+        # Final result of each game, once 'play()' has been called. Column 0
+        # holds the points of the first player and column 1 the ones of the
+        # second player.
+        self.scores = np.zeros((n_games, 2))
+
+        # Number of rounds of each joint action in each game:
+        # outcomes[k, a_1, a_2] (filled by 'play()')
+        self.outcomes = np.zeros((n_games, 2, 2), dtype=np.int64)
+
+        # Outcome counts of each game after the first 'checkpoints[c]' rounds:
+        # checkpoint_outcomes[k, c, a_1, a_2] (filled by 'play()')
+        self.checkpoint_outcomes = np.zeros((n_games, len(checkpoints), 2, 2), dtype=np.int64)
+
+    @staticmethod
+    def supports(players: list[Player]) -> bool:
+        """True if all the players have a vectorized strategy"""
+        return all(player.has_batch_strategy() for player in players)
+
+    @staticmethod
+    def _groups(players: list[Player]) -> list[tuple[Player, np.ndarray, dict]]:
+        """Splits the games by 'batch_group' of the given side"""
+        indices = {}
+        for i, player in enumerate(players):
+            indices.setdefault(player.batch_group(), []).append(i)
+
+        groups = []
+        for idx in indices.values():
+            idx = np.array(idx)
+            representative = players[idx[0]]
+            state = representative.batch_init([players[i] for i in idx])
+            groups.append((representative, idx, state))
+        return groups
+
+    def play(self) -> None:
+        """
+        Main call of the class. Plays all the games and stores their final
+        results in 'self.scores'.
+        """
+        n_games = len(self.players_1)
+        groups_1 = self._groups(self.players_1)
+        groups_2 = self._groups(self.players_2)
+
+        last_1 = np.zeros(n_games, dtype=np.int8)
+        last_2 = np.zeros(n_games, dtype=np.int8)
+        actions_1 = np.empty(n_games, dtype=np.int8)
+        actions_2 = np.empty(n_games, dtype=np.int8)
+        score_1 = np.zeros(n_games, dtype=self.dilemma.payoffs.dtype)
+        score_2 = np.zeros(n_games, dtype=self.dilemma.payoffs.dtype)
+        # Rounds in which the first, the second and both players defected:
+        # they give the four outcome counts
+        defections_1 = np.zeros(n_games, dtype=np.int64)
+        defections_2 = np.zeros(n_games, dtype=np.int64)
+        defections_both = np.zeros(n_games, dtype=np.int64)
+        next_checkpoint = 0
+
+        profiler = profiling.active()
+
+        for t in range(self.n_rounds):
+            if profiler is None:
+                for player, idx, state in groups_1:
+                    actions_1[idx] = player.batch_strategy(state, t, last_1[idx], last_2[idx], self.rng)
+                for player, idx, state in groups_2:
+                    actions_2[idx] = player.batch_strategy(state, t, last_2[idx], last_1[idx], self.rng)
+            else:
+                self._profiled_strategies(profiler, groups_1, t, actions_1, last_1, last_2)
+                self._profiled_strategies(profiler, groups_2, t, actions_2, last_2, last_1)
+                t_noise = time.perf_counter()
+
+            # Same noise as 'Game.change_action'
+            if self.error > 0:
+                actions_1 ^= (self.rng.random(n_games) < self.error).astype(np.int8)
+                actions_2 ^= (self.rng.random(n_games) < self.error).astype(np.int8)
+
+            if profiler is not None:
+                t_scoring = time.perf_counter()
+                profiler.add_phase("noise", t_scoring - t_noise, 2 * n_games)
+
+            if self.history_1 is not None:
+                self.history_1[:, t] = actions_1
+                self.history_2[:, t] = actions_2
+            payoff_1, payoff_2 = self.dilemma.evaluate_result(actions_1, actions_2)
+            score_1 += payoff_1
+            score_2 += payoff_2
+            defections_1 += actions_1
+            defections_2 += actions_2
+            defections_both += actions_1 & actions_2
+            if next_checkpoint < len(self.checkpoints) and t + 1 == self.checkpoints[next_checkpoint]:
+                self.checkpoint_outcomes[:, next_checkpoint] = self._outcome_counts(
+                    t + 1, defections_1, defections_2, defections_both)
+                next_checkpoint += 1
+            last_1, actions_1 = actions_1, last_1
+            last_2, actions_2 = actions_2, last_2
+
+            if profiler is not None:
+                profiler.add_phase("scoring", time.perf_counter() - t_scoring, n_games)
+
+        self.scores = np.stack([score_1, score_2], axis=1)
+        self.outcomes = self._outcome_counts(self.n_rounds, defections_1, defections_2,
+                                             defections_both)
+
+    @staticmethod
+    def _outcome_counts(n_rounds: int, defections_1: np.ndarray,
+                        defections_2: np.ndarray, defections_both: np.ndarray) -> np.ndarray:
+        """Outcome counts (n_games, 2, 2) of games of 'n_rounds' rounds, from
+        the rounds in which each player and both of them defected"""
+        outcomes = np.empty((len(defections_1), 2, 2), dtype=np.int64)
+        outcomes[:, D, D] = defections_both
+        outcomes[:, D, C] = defections_1 - defections_both
+        outcomes[:, C, D] = defections_2 - defections_both
+        outcomes[:, C, C] = n_rounds - defections_1 - defections_2 + defections_both
+        return outcomes
+
+    def _profiled_strategies(self, profiler: profiling.Profiler, groups: list,
+                             t: int, actions: np.ndarray, mine: np.ndarray,
+                             theirs: np.ndarray) -> None:
+        """Decisions of one side in round 't', timing each group"""
+        for player, idx, state in groups:
+            start = time.perf_counter()
+            actions[idx] = player.batch_strategy(state, t, mine[idx], theirs[idx], self.rng)
+            seconds = time.perf_counter() - start
+            profiler.add_strategy(type(player).__name__, seconds, len(idx))
+            profiler.add_phase("strategy", seconds, len(idx))
+
+
+def round_robin_scores(players: list[Player],
+                       n_rounds: int = 100,
+                       error: float = 0.0,
+                       repetitions: int = 1,
+                       rng: np.random.Generator | None = None,
+                       outcomes: np.ndarray | None = None) -> np.ndarray:
+    """
+    Plays every pair of 'players' against each other 'repetitions' times with
+    'BatchGame's of up to 'BATCH_SIZE' games.
+
+    Parameters:
+        - players (list[Player]): players of the round robin
+        - n_rounds (int = 100): number of rounds in each game
+        - error (float = 0.0): error probability (in base 1)
+        - repetitions (int = 1): number of games of each pair
+        - rng (np.random.Generator | None = None): random generator
+        - outcomes (np.ndarray | None = None): if given, (n, n, 2, 2) array
+     where the rounds of each joint action of every pair are added
+     (outcomes[i, j, a_i, a_j], in both orders)
+
+    Results:
+        - Array with the total points of each player (same order as 'players')
+    """
+    totals = np.zeros(len(players))
+    pairs = np.array(list(itertools.combinations(range(len(players)), 2)), dtype=np.int64)
+    if len(pairs) == 0:
+        return totals
+
+    rng = rng if rng is not None else seeded_rng()
+    n_games = len(pairs) * repetitions
+    for start in range(0, n_games, BATCH_SIZE):
+        games = np.arange(start, min(start + BATCH_SIZE, n_games)) % len(pairs)
+        idx_1, idx_2 = pairs[games, 0], pairs[games, 1]
+        game = BatchGame([players[i] for i in idx_1], [players[i] for i in idx_2],
+                         n_rounds, error, rng=rng)
+        game.play()
+
+        np.add.at(totals, idx_1, game.scores[:, 0])
+        np.add.at(totals, idx_2, game.scores[:, 1])
+        if outcomes is not None:
+            np.add.at(outcomes, (idx_1, idx_2), game.outcomes)
+            np.add.at(outcomes, (idx_2, idx_1), game.outcomes.transpose(0, 2, 1))
+    return totals
+
+
+def play_records(players_1: list[Player],
+                 players_2: list[Player],
+                 n_rounds: int = 100,
+                 error: float = 0.0,
+                 rng: np.random.Generator | None = None) -> np.ndarray:
+    """
+    Plays one game for each pair (players_1[k], players_2[k]), starting from a
+    fresh state. Uses 'BatchGame's of up to 'BATCH_SIZE' games if every
+    player supports it, and scalar 'Game's on copies of the players otherwise.
+
+    Parameters:
+        - players_1 (list[Player]): first player of each game
+        - players_2 (list[Player]): second player of each game
+        - n_rounds (int = 100): number of rounds in each game
+        - error (float = 0.0): error probability (in base 1)
+        - rng (np.random.Generator | None = None): random generator of the
+     'BatchGame'
+
+    Results:
+        - Array with one row per game: the scores of both players followed by
+        the number of CC, CD, DC and DD rounds
+    """
+    records = np.zeros((len(players_1), 6))
+    if len(players_1) == 0:
+        return records
+
+    if BatchGame.supports(list(players_1) + list(players_2)):
+        rng = rng if rng is not None else seeded_rng()
+        for start in range(0, len(players_1), BATCH_SIZE):
+            batch = slice(start, start + BATCH_SIZE)
+            game = BatchGame(players_1[batch], players_2[batch], n_rounds, error, rng=rng)
+            game.play()
+            records[batch, :2] = game.scores
+            records[batch, 2:] = game.outcomes.reshape(-1, 4)
+        return records
+
+    for k, (player_1, player_2) in enumerate(zip(players_1, players_2)):
+        game = Game(player_1.fork(), player_2.fork(), n_rounds, error)
+        game.play()
+        records[k, :2] = game.score
+        records[k, 2:] = game.outcomes.ravel()
+    return records
+
+def play_games(players_1: list[Player],
+               players_2: list[Player],
+               n_rounds: int = 100,
+               error: float = 0.0,
+               rng: np.random.Generator | None = None) -> np.ndarray:
+    """
+    Same as 'play_records', but only returns the scores of both players in
+    each game
+    """
+    return play_records(players_1, players_2, n_rounds, error, rng)[:, :2]
@@ -0,0 +1,242 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import pickle
+import sqlite3
+import time
+import numpy as np
+from .player import Player
+
+# Cache receiving the matches (None when caching is disabled)
+_active: MatchCache | None = None
+
+# Attributes of 'Player' that are not parameters of the strategy: its name,
+# the dilemma (part of the key of the match) and the match state
+MATCH_ATTRIBUTES = {"name", "dilemma", "state"}
+
+# Columns of a stored match, from the point of view of the first player
+COLUMNS = ("score_1", "score_2", "cc", "cd", "dc", "dd")
+
+def strategy_key(player: Player) -> str:
+    """
+    Identity of a strategy: its class and the rest of its attributes (its
+    parameters). The match state is left out, so the key is the same before,
+    during and after a match.
+    """
+    parameters = sorted((name, value) for name, value in vars(player).items()
+                        if name not in MATCH_ATTRIBUTES)
+    digest = hashlib.sha256(pickle.dumps(parameters, protocol=4)).hexdigest()
+    return f"{type(player).__module__}.{type(player).__qualname__}:{digest}"
+
+def pairing_seed(seed: int, key_1: str, key_2: str, repetition: int) -> int:
+    """
+    Seed of a match identified by its strategies ('strategy_key', in the
+    order in which they play) instead of by their indices in a roster, so
+    the stored matches of a pairing are the same in any tournament
+
+    Parameters:
+        - seed (int): master seed
+        - key_1 (str): key of the first player
+        - key_2 (str): key of the second player
+        - repetition (int): repetition of the pairing
+
+    Results:
+        - An integer seed for the 'random' module
+    """
+    digest = hashlib.sha256(f"{key_1}|{key_2}".encode()).digest()
+    entropy = [seed, int.from_bytes(digest[:16], "little"), repetition]
+    return int(np.random.SeedSequence(entropy).generate_state(1)[0])
+
+class MatchCache:
+
+    def __init__(self, path: str, max_entries: int = 1_000_000):
+        """
+        Persistent cache of match results in a SQLite file. While it is
+        active ('with MatchCache(path):' or 'enable'), 'Tournament' and
+        'PayoffMatrix' (hence 'Evolution') look up their matches before
+        playing them:
+            - noise-free games between deterministic strategies are played
+         once ever
+            - random games are stored by repetition, and later runs reuse the
+         stored repetitions and only play the missing ones. With a master
+         seed, the stored repetitions are the ones of the first run with that
+         seed.
+        A match is identified by both strategies (class and parameters, see
+        'strategy_key'), the payoffs of the dilemma, 'n_rounds', 'error' and
+        the seed. Players with 'cacheable = False' (e.g. players that learn)
+        are never cached. The cache belongs to the process that opened it:
+        SQLite connections must not cross a fork, so worker processes see no
+        active cache (the matches are looked up and stored by the parent).
+
+        Parameters:
+            - path (str): SQLite file (created if needed)
+            - max_entries (int = 1_000_000): maximum number of stored matches.
+         The least recently used ones are evicted.
+        """
+        self.path = path
+        self.max_entries = max_entries
+        self.pid = os.getpid()
+        self.connection = sqlite3.connect(path)
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS matches ("
+            " key TEXT NOT NULL, repetition INTEGER NOT NULL,"
+            " score_1 REAL, score_2 REAL, cc INTEGER, cd INTEGER, dc INTEGER,"
+            " dd INTEGER, last_used INTEGER NOT NULL,"
+            " PRIMARY KEY (key, repetition))")
+        self.connection.execute(
+            "CREATE INDEX IF NOT EXISTS matches_last_used ON matches (last_used)")
+        self.connection.commit()
+
+    @staticmethod
+    def is_deterministic(player_1: Player, player_2: Player, error: float) -> bool:
+        """True if every game between both players has the same result"""
+        return error == 0 and player_1.deterministic and player_2.deterministic
+
+    def _key(self, player_1: Player,
+                   player_2: Player,
+                   n_rounds: int,
+                   error: float,
+                   seed: int | None) -> tuple[str, bool] | None:
+        """
+        Key of a pairing, and whether the players are swapped in it. In a
+        symmetric dilemma each pairing is stored once, whatever the order of
+        the players. Otherwise the payoffs depend on the seat, so the key
+        keeps the order of the players. None if it cannot be cached.
+        """
+        if not (player_1.cacheable and player_2.cacheable):
+            return None
+        if self.is_deterministic(player_1, player_2, error):
+            seed = None
+        key_1, key_2 = strategy_key(player_1), strategy_key(player_2)
+        swapped = player_1.dilemma.symmetric and key_1 > key_2
+        if swapped:
+            key_1, key_2 = key_2, key_1
+
+        payoffs = player_1.dilemma.payoffs
+        settings = (key_1, key_2, payoffs.shape, payoffs.tobytes(),
+                    str(payoffs.dtype), int(n_rounds),
+                    float(error), seed)
+        return hashlib.sha256(repr(settings).encode()).hexdigest(), swapped
+
+    @staticmethod
+    def _swap(rows: np.ndarray) -> np.ndarray:
+        """Same matches from the point of view of the other player"""
+        return rows[:, [1, 0, 2, 4, 3, 5]]
+
+    def fetch(self, player_1: Player,
+                    player_2: Player,
+                    n_rounds: int,
+                    error: float,
+                    seed: int | None = None) -> np.ndarray | None:
+        """
+        Stored matches of a pairing
+
+        Parameters:
+            - player_1 (Player): first player
+            - player_2 (Player): second player
+            - n_rounds (int): number of rounds of each game
+            - error (float): error probability (in base 1)
+            - seed (int | None = None): master seed of the matches
+
+        Results:
+            - Array with one row per stored repetition (0, 1, ... without
+         gaps): scores of both players and number of CC, CD, DC and DD
+         rounds. None if the pairing cannot be cached.
+        """
+        key = self._key(player_1, player_2, n_rounds, error, seed)
+        if key is None:
+            return None
+        key, swapped = key
+
+        rows = self.connection.execute(
+            f"SELECT repetition, {', '.join(COLUMNS)} FROM matches WHERE key = ?"
+            " ORDER BY repetition", (key,)).fetchall()
+        # Only the repetitions before the first gap (some may be evicted)
+        n_rows = 0
+        while n_rows < len(rows) and rows[n_rows][0] == n_rows:
+            n_rows += 1
+        result = np.array([row[1:] for row in rows[:n_rows]], dtype=float).reshape(-1, 6)
+
+        if n_rows:
+            self.connection.execute("UPDATE matches SET last_used = ? WHERE key = ?",
+                                    (time.time_ns(), key))
+            self.connection.commit()
+        return self._swap(result) if swapped else result
+
+    def store(self, player_1: Player,
+                    player_2: Player,
+                    n_rounds: int,
+                    error: float,
+                    rows: np.ndarray,
+                    first_repetition: int = 0,
+                    seed: int | None = None) -> None:
+        """
+        Stores matches of a pairing (does nothing if it cannot be cached)
+
+        Parameters:
+            - rows (np.ndarray): one row per match, as returned by 'fetch'
+            - first_repetition (int = 0): repetition of the first row
+            - the rest, as in 'fetch'
+        """
+        key = self._key(player_1, player_2, n_rounds, error, seed)
+        if key is None or len(rows) == 0:
+            return
+        key, swapped = key
+        rows = np.asarray(rows, dtype=float).reshape(-1, 6)
+        if swapped:
+            rows = self._swap(rows)
+
+        now = time.time_ns()
+        self.connection.executemany(
+            f"INSERT OR REPLACE INTO matches (key, repetition, {', '.join(COLUMNS)},"
+            " last_used) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            [(key, first_repetition + k, float(row[0]), float(row[1]), int(row[2]),
+              int(row[3]), int(row[4]), int(row[5]), now)
+             for k, row in enumerate(rows)])
+        self.evict()
+        self.connection.commit()
+
+    def evict(self) -> None:
+        """Removes the least recently used matches above 'max_entries'"""
+        excess = len(self) - self.max_entries
+        if excess > 0:
+            self.connection.execute(
+                "DELETE FROM matches WHERE rowid IN (SELECT rowid FROM matches"
+                " ORDER BY last_used LIMIT ?)", (excess,))
+
+    def clear(self) -> None:
+        self.connection.execute("DELETE FROM matches")
+        self.connection.commit()
+
+    def close(self) -> None:
+        self.connection.close()
+
+    def __len__(self) -> int:
+        return self.connection.execute("SELECT COUNT(*) FROM matches").fetchone()[0]
+
+    def __enter__(self) -> MatchCache:
+        enable(self)
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        disable()
+        self.close()
+
+
+def active() -> MatchCache | None:
+    """The cache used by the engines, if any (never in a forked process)"""
+    if _active is None or _active.pid != os.getpid():
+        return None
+    return _active
+
+def enable(cache: MatchCache) -> MatchCache:
+    """Makes the engines use 'cache'"""
+    global _active
+    _active = cache
+    return cache
+
+def disable() -> None:
+    """Stops using the cache"""
+    global _active
+    _active = None
@@ -2,13 +2,13 @@ from __future__ import annotations
 
 from abc import abstractmethod
 import numpy as np
-import itertools
 
 class Dilemma:
 
     def __init__(self, cc: float, cd: float, dc: float, dd: float):
         """
-        Represents a 2x2 symmetric dilemma.
+        Represents a 2x2 symmetric dilemma. Other games (more actions, or
+        different payoffs for each player) are built with 'from_matrices'.
 
         Parameters:
             - cc (float): payoff for mutual cooperation
@@ -21,7 +21,49 @@ class Dilemma:
         self.dc=dc
         self.dd=dd
         self.matrix=np.array([[self.cc,self.cd],[self.dc,self.dd]])
+        self._set_payoffs(self.matrix, self.matrix.T)
 
+    @classmethod
+    def from_matrices(cls, matrix_1: np.ndarray,
+                           matrix_2: np.ndarray | None = None) -> Dilemma:
+        """
+        General two-player game with N actions. Only 'evaluate_result' and
+        'table' score games of more than 2 actions: the engines ('Game',
+        'BatchGame', 'MarkovGame') and the strategies only play C and D.
+
+        Parameters:
+            - matrix_1 (np.ndarray): N x N payoffs of the first player, where
+         matrix_1[a_1, a_2] is its payoff when it plays a_1 and the second
+         player plays a_2
+            - matrix_2 (np.ndarray | None = None): payoffs of the second
+         player, indexed the same way. If not given, the game is symmetric
+         (matrix_2 = matrix_1.T)
+
+        Returns:
+            - The dilemma
+        """
+        matrix_1 = np.asarray(matrix_1)
+        matrix_2 = matrix_1.T if matrix_2 is None else np.asarray(matrix_2)
+        assert matrix_1.ndim == 2 and matrix_1.shape[0] == matrix_1.shape[1], \
+            "the payoff matrices should be square"
+        assert matrix_1.shape == matrix_2.shape, "both matrices should have the same shape"
+
+        dilemma = cls.__new__(cls)
+        if matrix_1.shape == (2, 2):
+            dilemma.cc, dilemma.cd, dilemma.dc, dilemma.dd = matrix_1.ravel().tolist()
+        dilemma.matrix = matrix_1
+        dilemma._set_payoffs(matrix_1, matrix_2)
+        return dilemma
+
+    def _set_payoffs(self, matrix_1: np.ndarray, matrix_2: np.ndarray) -> None:
+        # payoffs[k, a_1, a_2]: payoff of the player k+1 for the joint action
+        self.payoffs = np.stack([matrix_1, matrix_2])
+        self.n_actions = len(matrix_1)
+        self.symmetric = bool(np.array_equal(matrix_2, matrix_1.T))
+        # Same payoffs as Python numbers, table[a_1][a_2] = (payoff_1,
+        # payoff_2), for the round by round scoring
+        self.table = tuple(tuple(zip(row_1, row_2)) for row_1, row_2
+                           in zip(self.payoffs[0].tolist(), self.payoffs[1].tolist()))
 
     @property
     @abstractmethod
@@ -34,25 +76,27 @@ class Dilemma:
 
 
     @abstractmethod
-    def evaluate_result(self, a_1: int, a_2: int) -> tuple[float, float]:
+    def evaluate_result(self, a_1: int | np.ndarray,
+                              a_2: int | np.ndarray) -> tuple[float, float] | tuple[np.ndarray, np.ndarray]:
         """
         Given two actions, returns the payoffs of the two players.
 
         Parameters:
-            - a_1 (int): action of player 1 ('C' or 'D', i.e. '1' or '0')
-            - a_2 (int): action of player 2 ('C' or 'D', i.e. '1' or '0')
+            - a_1 (int | np.ndarray): action of player 1 ('C' or 'D', i.e.
+         '0' or '1'), or an array of actions
+            - a_2 (int | np.ndarray): action of player 2, or an array of
+         actions with the same shape as 'a_1'
 
         Returns:
             - tuple of two floats, being the first and second values the payoff
-            for the first and second player, respectively.
+            for the first and second player, respectively. With arrays of
+            actions, two arrays with the payoffs of every joint action.
         """
-        return int(self.matrix[a_1,a_2]),int(self.matrix[a_2,a_1])
+        try:
+            return self.table[a_1][a_2]
+        except TypeError:
+            payoffs = self.payoffs[:, a_1, a_2]
+            return payoffs[0], payoffs[1]
 # ---------------------------------------------------------- 
 C = 0
 D = 1
-
-# All possible outcomes of the PD
-pd = Dilemma(2, -1, 3, 0)
-posible_actions = (C, D)
-for a1, a2 in itertools.product(posible_actions, repeat=2):
-    print(f"{(a1, a2)} -> {pd.evaluate_result(a1, a2)}")
\ No newline at end of file
@@ -0,0 +1,173 @@
+from __future__ import annotations
+
+import numpy as np
+
+# Population dynamics on a matrix of expected scores between strategies
+# ('PayoffMatrix.matrix()'), where payoffs[i, j] is the score of strategy 'i'
+# against 'j'. They never play a game: a generation only costs a few matrix
+# products, whatever the population size. The stochastic ones accept
+# populations of shape (n_strategies,) or (runs, n_strategies), and evolve
+# all the runs at once.
+
+def replicator_derivative(payoffs: np.ndarray, x: np.ndarray) -> np.ndarray:
+    """
+    Replicator equation: dx_i/dt = x_i ((A x)_i - x . A x)
+
+    Parameters:
+        - payoffs (np.ndarray): matrix of expected scores
+        - x (np.ndarray): frequency of each strategy (sums 1)
+
+    Results:
+        - Array with dx/dt
+    """
+    fitness = x @ payoffs.T
+    return x * (fitness - (x * fitness).sum(axis=-1, keepdims=True))
+
+def replicator(payoffs: np.ndarray,
+               x: np.ndarray,
+               time: float = 1.0,
+               steps: int = 10) -> np.ndarray:
+    """
+    Integrates the replicator equation with the classic Runge-Kutta method
+
+    Parameters:
+        - payoffs (np.ndarray): matrix of expected scores
+        - x (np.ndarray): initial frequency of each strategy
+        - time (float = 1.0): time to integrate
+        - steps (int = 10): Runge-Kutta steps
+
+    Results:
+        - Array with the frequencies at 'time'
+    """
+    x = np.asarray(x, dtype=float)
+    dt = time / steps
+    for _ in range(steps):
+        k_1 = replicator_derivative(payoffs, x)
+        k_2 = replicator_derivative(payoffs, x + dt / 2 * k_1)
+        k_3 = replicator_derivative(payoffs, x + dt / 2 * k_2)
+        k_4 = replicator_derivative(payoffs, x + dt * k_3)
+        x = x + dt / 6 * (k_1 + 2 * k_2 + 2 * k_3 + k_4)
+        # Keep the frequencies valid despite the rounding errors
+        x = np.clip(x, 0, None)
+        x = x / x.sum(axis=-1, keepdims=True)
+    return x
+
+def population_fitness(payoffs: np.ndarray,
+                       counts: np.ndarray,
+                       selection: float = 1.0) -> np.ndarray:
+    """
+    Fitness of an individual of each strategy in a finite, well-mixed
+    population: exp(selection * mean score against the other individuals).
+    The exponential keeps it positive with negative payoffs.
+
+    Parameters:
+        - payoffs (np.ndarray): matrix of expected scores
+        - counts (np.ndarray): number of individuals of each strategy
+        - selection (float = 1.0): intensity of selection (0 is neutral drift)
+
+    Results:
+        - Array with the fitness of each strategy (same shape as 'counts')
+    """
+    total = counts.sum(axis=-1, keepdims=True)
+    scores = (counts @ payoffs.T - np.diag(payoffs)) / np.maximum(total - 1, 1)
+    scores = scores - scores.max(axis=-1, keepdims=True)   # avoid overflows
+    return np.exp(selection * scores)
+
+def _choose(weights: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+    """Index chosen with probability proportional to 'weights', per row"""
+    cumulative = np.cumsum(weights, axis=-1)
+    draws = rng.random(weights.shape[:-1] + (1,)) * cumulative[..., -1:]
+    return np.minimum((cumulative <= draws).sum(axis=-1), weights.shape[-1] - 1)
+
+def moran_step(payoffs: np.ndarray,
+               counts: np.ndarray,
+               rng: np.random.Generator,
+               selection: float = 1.0) -> np.ndarray:
+    """
+    One birth-death event of the Moran process: an individual chosen with
+    probability proportional to its fitness reproduces, and its offspring
+    replaces an individual chosen uniformly at random
+
+    Parameters:
+        - payoffs (np.ndarray): matrix of expected scores
+        - counts (np.ndarray): integer counts, (n_strategies,) or
+     (runs, n_strategies)
+        - rng (np.random.Generator): random generator
+        - selection (float = 1.0): intensity of selection
+
+    Results:
+        - The new counts (same shape as 'counts')
+    """
+    counts = np.array(counts, dtype=np.int64)
+    fitness = population_fitness(payoffs, counts, selection)
+    born = _choose(counts * fitness, rng)
+    dead = _choose(counts.astype(float), rng)
+
+    rows = np.indices(born.shape)
+    np.add.at(counts, (*rows, born), 1)
+    np.add.at(counts, (*rows, dead), -1)
+    return counts
+
+def moran(payoffs: np.ndarray,
+          counts: np.ndarray,
+          rng: np.random.Generator,
+          selection: float = 1.0,
+          events: int | None = None) -> np.ndarray:
+    """
+    Moran process during a generation ('events' birth-death events on
+    average, one per individual by default), sampled with a few draws on the
+    counts instead of event by event. In continuous time, every individual
+    dies at rate 1 and is replaced by the offspring of an individual chosen
+    with probability proportional to its fitness ('moran_step'). The fitness
+    is frozen during the generation (as in 'wright_fisher'), so each
+    individual survives it with probability exp(-events / population),
+    independently of the others, and the places of the dead are filled by a
+    multinomial draw. A generation costs the same whatever the population
+    size.
+
+    Parameters:
+        - payoffs (np.ndarray): matrix of expected scores
+        - counts (np.ndarray): integer counts, (n_strategies,) or
+     (runs, n_strategies)
+        - rng (np.random.Generator): random generator
+        - selection (float = 1.0): intensity of selection
+        - events (int | None = None): mean number of birth-death events. By
+     default, the population size
+
+    Results:
+        - The counts at the end of the generation
+    """
+    counts = np.asarray(counts, dtype=np.int64)
+    total = counts.sum(axis=-1, keepdims=True)
+    if events is None:
+        events = total
+    weights = counts * population_fitness(payoffs, counts, selection)
+    probabilities = weights / weights.sum(axis=-1, keepdims=True)
+
+    survivors = rng.binomial(counts, np.exp(-events / np.maximum(total, 1)))
+    return survivors + rng.multinomial((total - survivors.sum(axis=-1, keepdims=True))[..., 0],
+                                       probabilities)
+
+def wright_fisher(payoffs: np.ndarray,
+                  counts: np.ndarray,
+                  rng: np.random.Generator,
+                  selection: float = 1.0) -> np.ndarray:
+    """
+    One generation of the Wright-Fisher process: the whole population is
+    replaced by a multinomial sample, where each strategy is chosen with
+    probability proportional to its total fitness
+
+    Parameters:
+        - payoffs (np.ndarray): matrix of expected scores
+        - counts (np.ndarray): integer counts, (n_strategies,) or
+     (runs, n_strategies)
+        - rng (np.random.Generator): random generator
+        - selection (float = 1.0): intensity of selection
+
+    Results:
+        - The new counts (same shape as 'counts')
+    """
+    counts = np.asarray(counts, dtype=np.int64)
+    weights = counts * population_fitness(payoffs, counts, selection)
+    probabilities = weights / weights.sum(axis=-1, keepdims=True)
+    return rng.multinomial(counts.sum(axis=-1), probabilities)
@@ -4,13 +4,30 @@ import numpy as np
 import itertools
 import copy
 import math
+import os
+import pickle
 import random
-import matplotlib.pyplot as plt
-from player import Player, Cooperator, Defector, Tft, Grudger, Detective4MovsTft, Destructomatic
-from player import Periodic_CD, Periodic_DC, Periodic_CCD, Periodic_CDD
-from sema4all_killer import Sema4All_Killer
-from dilemma import Dilemma
-from game import Game
+from . import profiling
+from .player import Player
+from .game import Game
+from .batch_game import BatchGame, round_robin_scores
+from .parallel import seeded_rng
+from .payoff_matrix import PayoffMatrix
+from .dynamics import replicator, moran, wright_fisher
+
+DYNAMICS = ("selection", "replicator", "moran", "wright_fisher")
+
+def _lowest(values: np.ndarray, k: int, last: bool = True) -> np.ndarray:
+    """
+    Indices of the 'k' lowest values in O(n). Among equal values at the
+    boundary, the last ones are taken (or the first ones if 'last' is
+    False).
+    """
+    threshold = np.partition(values, k - 1)[k - 1]
+    below = np.flatnonzero(values < threshold)
+    ties = np.flatnonzero(values == threshold)
+    n_ties = k - len(below)
+    return np.concatenate([below, ties[len(ties) - n_ties:] if last else ties[:n_ties]])
 
 class Evolution:
 
@@ -21,7 +38,14 @@ class Evolution:
                        repetitions: int = 2,
                        generations: int = 100,
                        reproductivity: float = 0.05,
-                       initial_population: tuple[int, ...] | int = 100):
+                       initial_population: tuple[int, ...] | int = 100,
+                       samples: int = 100,
+                       precision: float | None = None,
+                       confidence: float = 0.95,
+                       exact_games: bool = False,
+                       seed: int | None = None,
+                       dynamics: str = "selection",
+                       selection: float = 1.0):
         """
         Evolutionary tournament
 
@@ -39,6 +63,30 @@ class Evolution:
             - initial_population (tuple[int, ...] | int = 100): list of
          individuals representing each players (same index as 'players' tuple)
          OR total population size (int).
+            - samples (int = 100): number of games sampled to estimate the
+         expected score of a pair of strategies whose games are random
+            - precision (float | None = None): if given, the sampling of a
+         pair of strategies stops once the confidence interval of its expected
+         scores is narrower than +/- 'precision' (at most 'samples' games)
+            - confidence (float = 0.95): confidence level of those intervals
+            - exact_games (bool = False): if True, every individual plays a
+         game against every other individual in each generation. If False, the
+         fitness of each individual is obtained from the population counts and
+         the expected scores between strategies ('PayoffMatrix'), which are
+         computed once and reused in all the generations.
+            - seed (int | None = None): seed of the random generator used to
+         sample the games (the scalar games use the 'random' module). If not
+         given, it is drawn from the 'random' module.
+            - dynamics (str = "selection"): how the population changes from
+         one generation to the next. "selection" replaces the worst
+         'reproductivity' individuals by copies of the best ones. The others
+         only use the expected scores per round between strategies (see
+         'dynamics.py'): "replicator" integrates the replicator equation for
+         one unit of time (the counts are then population * frequency, not
+         rounded), "moran" runs one birth-death event per individual (on average) and
+         "wright_fisher" samples the whole next generation at once.
+            - selection (float = 1.0): intensity of selection of the
+         "replicator", "moran" and "wright_fisher" dynamics
         """
 
         self.players = players
@@ -47,6 +95,13 @@ class Evolution:
         self.repetitions = repetitions
         self.generations = generations
         self.reproductivity = reproductivity
+        self.exact_games = exact_games
+        self.dynamics = dynamics
+        self.selection = selection
+
+        assert dynamics in DYNAMICS, f"'dynamics' should be one of {DYNAMICS}"
+        assert dynamics == "selection" or not exact_games, \
+            "'exact_games' only supports the \"selection\" dynamics"
 
         if isinstance(initial_population, int):
             self.initial_population = [math.floor(initial_population
@@ -58,43 +113,143 @@ class Evolution:
         self.total_population = sum(self.initial_population)
         self.repr_int = int(self.total_population * self.reproductivity)
 
-        self.ranking = {copy.deepcopy(player): 0.0 for i, player in
-                        enumerate(self.players)
-                       for _ in range(self.initial_population[i])}
+        self.rng = seeded_rng(seed)
+
+        # Expected scores between strategies, shared by all the generations
+        self.payoffs = PayoffMatrix(self.players, n_rounds, error, samples,
+                                    precision, confidence, self.rng)
+
+        # Points of each strategy in the last generation (in exact mode, mean
+        # points of its individuals)
+        self.ranking = {player: 0.0 for player in self.players}
 
-    def natural_selection(self, result_tournament: dict[Player, float]) \
-                          -> tuple[list,list]:
+    def natural_selection(self, types: np.ndarray, scores: np.ndarray) -> np.ndarray:
         """
-        Kill the worst guys, reproduce the top ones. Takes the ranking once a
-        face-to-face tournament has been played and returns another ranking,
-        with the evolutionary changes applied
+        Kill the worst guys, reproduce the top ones: the 'reproductivity'
+        share of the population with the lowest points is replaced by copies
+        of the same number of individuals with the highest points. They are
+        found by partial selection instead of sorting the whole population.
+        Among individuals with equal points, the earlier ones in 'types' are
+        the best (as in a stable sort of the ranking).
 
         Parameters:
-            - result_tournament: the 'tournament.ranking' kind of dict.
+            - types (np.ndarray): index in 'players' of each individual
+            - scores (np.ndarray): points of each individual
 
         Results:
-            - Same kind of dict ranking as the input, but with the evolutionary
-         dynamics applied
+            - Array with the new number of individuals of each strategy
         """
-        
-        n = int(len(result_tournament) * self.reproductivity)    # n is the number of individuals that will be reaplaced
+        n = int(len(types) * self.reproductivity)
+        counts = np.bincount(types, minlength=len(self.players))
+        if n == 0:
+            return counts
+        worst = _lowest(scores, n)
+        best = _lowest(-scores, n, last=False)
+        return (counts - np.bincount(types[worst], minlength=len(self.players))
+                + np.bincount(types[best], minlength=len(self.players)))
+
+    def play_individuals(self, types: np.ndarray) -> np.ndarray:
+        """
+        Every individual plays 'self.repetitions' games against every other
+        one. The population is only the strategy of each individual: the
+        players of a game are created for that game ('Player.fork') and
+        dropped after it, or the whole generation is played with 'BatchGame'
+        directly from the strategies. Players that learn from game to game
+        ('cacheable = False') get one copy per individual, kept during the
+        generation.
 
-        # El ranking ya esá ordenado
-        population_without_n_worst_individuals = list(result_tournament.keys())[0:-n]
-        n_best_individuals = list(result_tournament.keys())[0:n]
+        Parameters:
+            - types (np.ndarray): index in 'players' of each individual
 
-        new_generation_population = {player.name: [0] for player in self.players}
+        Results:
+            - Array with the points of each individual
+        """
+        learners = {k: [copy.deepcopy(player) for _ in range(np.count_nonzero(types == k))]
+                    for k, player in enumerate(self.players) if not player.cacheable}
+        individuals = [learners[k].pop() if k in learners else self.players[k]
+                       for k in types.tolist()]
+
+        if BatchGame.supports(individuals):
+            # Todos los enfrentamientos de la generación a la vez
+            return round_robin_scores(individuals, self.n_rounds, self.error,
+                                      self.repetitions, self.rng)
+
+        scores = np.zeros(len(individuals))
+        pairs = list(itertools.combinations(range(len(individuals)), 2))
+        for repetetion in range(self.repetitions):
+            for i, j in pairs:
+                game = Game(individuals[i].fork(), individuals[j].fork(),
+                            self.n_rounds, self.error)
+                game.play(False)
+                score_0, score_1 = game.score
+                scores[i] += score_0
+                scores[j] += score_1
+        return scores
+
+    def fitness(self, counts: np.ndarray) -> np.ndarray:
+        """
+        Points obtained in a generation by one individual of each strategy,
+        computed from the expected scores between strategies instead of
+        playing every pair of individuals.
 
-        # Añadimos todos los individuos menos los n peores
-        for individual in population_without_n_worst_individuals:
-            new_generation_population[individual.name][0] = new_generation_population[individual.name][0] + 1
-        
-        # En vez de añadir los n peores, volvemos a añadir los 5 mejores
-        for individual in n_best_individuals:
-            new_generation_population[individual.name][0] = new_generation_population[individual.name][0] + 1
+        Parameters:
+            - counts (np.ndarray): number of individuals of each strategy
+
+        Results:
+            - Array with the points of an individual of each strategy
+        """
+        payoffs = self.payoffs.matrix()
+        # Every individual plays against all the others, but not itself
+        return self.repetitions * (payoffs @ counts - np.diag(payoffs))
+
+    def natural_selection_counts(self, counts: np.ndarray,
+                                 fitness: np.ndarray) -> dict[str, list]:
+        """
+        Same selection as 'natural_selection', but working with the number
+        of individuals of each strategy and their fitness, so its cost does
+        not depend on the population size.
+
+        Parameters:
+            - counts (np.ndarray): number of individuals of each strategy
+            - fitness (np.ndarray): points of an individual of each strategy
+
+        Results:
+            - Dict with the new number of individuals of each strategy (a
+         list with a single value for each name)
+        """
+        n = int(counts.sum() * self.reproductivity)
+
+        # Strategies from best to worst (ties keep the order of 'players')
+        order = np.argsort(-fitness, kind="stable")
+        sorted_counts = counts[order]
+        before = np.cumsum(sorted_counts) - sorted_counts  # individuals ahead
 
-        return new_generation_population
+        survivors = np.clip(counts.sum() - n - before, 0, sorted_counts)
+        offspring = np.clip(n - before, 0, sorted_counts)
 
+        new_counts = np.zeros_like(counts)
+        new_counts[order] = survivors + offspring
+        return {player.name: [new_counts[i].item()]
+                for i, player in enumerate(self.players)}
+
+    def population_dynamics(self, counts: np.ndarray) -> np.ndarray:
+        """
+        Next generation with the "replicator", "moran" or "wright_fisher"
+        dynamics (see 'dynamics' in '__init__')
+
+        Parameters:
+            - counts (np.ndarray): number of individuals of each strategy
+
+        Results:
+            - Array with the new number of individuals of each strategy
+        """
+        payoffs = self.payoffs.matrix() / self.n_rounds
+        if self.dynamics == "replicator":
+            total = counts.sum()
+            return total * replicator(self.selection * payoffs, counts / total)
+        if self.dynamics == "moran":
+            return moran(payoffs, counts, self.rng, self.selection)
+        return wright_fisher(payoffs, counts, self.rng, self.selection)
 
     def count_strategies(self) -> dict[str, int]:
         """
@@ -109,7 +264,10 @@ class Evolution:
         """
         raise NotImplementedError
 
-    def play(self, do_print: bool = False):
+    def play(self, do_print: bool = False,
+                   plot: bool = True,
+                   checkpoint: str | None = None,
+                   checkpoint_every: int = 100):
         """
         Main call of the class. Performs the computations to simulate the
         evolutionary tournament.
@@ -118,53 +276,139 @@ class Evolution:
             - do_print (bool = False): if True, should print the ongoing
          results at the end of each generation (i.e. print generation number,
          and number of individuals playing each strategy).
+            - plot (bool = True): if True, shows the 'stackplot' at the end.
+         The counts are also stored in 'self.count_evolution'.
+            - checkpoint (str | None = None): if given, file where the state of
+         the simulation is saved every 'checkpoint_every' generations (and at
+         the end), so it can be continued with 'Evolution.resume'
+            - checkpoint_every (int = 100): generations between checkpoints
         """
 
-        # HINT: Initialise the following variable
-        #  > count_evolution = {player.name: [val] for player, val in
-        #                       zip(self.players, self.initial_population)}
-        # and use it to store the number of individuals each player retains at
-        # the end of each generation, appending to its corresponding list value
-        # the number of individuals each player has (obtained by calling
-        # 'self.count_strategies()'). For example, at some point, it could have
-        # the following value:
-        # {'cooperator': [15, 10, 5, 0, 0, 0, 0, 0, 0, 0, 0],
-        #  'defector': [5, 10, 15, 19, 14, 9, 4, 0, 0, 0, 0],
-        #  'tft': [5, 5, 5, 6, 11, 16, 21, 25, 25, 25, 25]}
-
         count_evolution = {player.name: [val] for player, val in zip(self.players, self.initial_population)}
         
-        for gen in range(self.generations):
-
-            # Ejectuamos el DP no iterativo
-            self.ranking = {copy.deepcopy(player): 0.0 for i, player in
-                enumerate(self.players)
-                for _ in range(count_evolution[player.name][gen])}
-
-            combinations = list(itertools.combinations(list(self.ranking.keys()), 2))
-            for repetetion in range(self.repetitions):
-                for combination in combinations:
-                    game=Game(combination[0],combination[1],self.n_rounds,self.error)
-                    game.play(False)
-                    combination[0].clean_history()
-                    combination[1].clean_history()
-                    score_0,score_1=game.score
-
-                    self.ranking[combination[0]] = self.ranking[combination[0]] + score_0
-                    self.ranking[combination[1]] = self.ranking[combination[1]] + score_1
-            
-            self.sort_ranking()
-            
-            # Se realiza la selección
-            next_generation = self.natural_selection(self.ranking)
+        self.evolve(count_evolution, 0, do_print, plot, checkpoint, checkpoint_every)
+
+    @classmethod
+    def resume(cls, checkpoint: str,
+                    do_print: bool = False,
+                    plot: bool = True,
+                    checkpoint_every: int = 100,
+                    generations: int | None = None) -> Evolution:
+        """
+        Continues a simulation from a file written by 'play'. The random
+        states are restored, so the result is the same as if the simulation
+        had never been interrupted. New checkpoints overwrite the same file.
+
+        Parameters:
+            - checkpoint (str): file written by 'play' or 'resume'
+            - do_print (bool = False): same as in 'play'
+            - plot (bool = True): same as in 'play'
+            - checkpoint_every (int = 100): generations between checkpoints
+            - generations (int | None = None): if given, replaces the total
+         number of generations to simulate (e.g. to extend a finished run).
+         It cannot be smaller than the generations already simulated. If not
+         given, the run continues up to its saved target.
+
+        Results:
+            - The 'Evolution' object, with 'count_evolution' complete
+        """
+        with open(checkpoint, "rb") as file:
+            state = pickle.load(file)
+
+        evolution = state["evolution"]
+        if generations is not None:
+            if generations < state["generation"]:
+                raise ValueError(f"the checkpoint already has {state['generation']} "
+                                 f"generations, more than 'generations' ({generations})")
+            evolution.generations = generations
+        random.setstate(state["random_state"])
+        evolution.evolve(state["count_evolution"], state["generation"], do_print,
+                         plot, checkpoint, checkpoint_every)
+        return evolution
+
+    def save_checkpoint(self, path: str,
+                              count_evolution: dict[str, list],
+                              generation: int) -> None:
+        """
+        Saves the state of the simulation after 'generation' generations: the
+        counts so far, the random states and the object itself (settings,
+        random generator and cached expected scores). The file is replaced
+        atomically, so a crash while saving keeps the previous checkpoint.
+        """
+        state = {"generation": generation,
+                 "count_evolution": count_evolution,
+                 "random_state": random.getstate(),
+                 "evolution": self}
+        temporary = f"{path}.tmp"
+        with open(temporary, "wb") as file:
+            pickle.dump(state, file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temporary, path)
+
+    def evolve(self, count_evolution: dict[str, list],
+                     start: int,
+                     do_print: bool = False,
+                     plot: bool = True,
+                     checkpoint: str | None = None,
+                     checkpoint_every: int = 100) -> None:
+        """
+        Simulates the generations from 'start' to 'self.generations',
+        appending the counts to 'count_evolution' (see 'play')
+        """
+        for gen in range(start, self.generations):
+
+            if not self.exact_games:
+                counts = np.array([count_evolution[player.name][gen]
+                                   for player in self.players])
+                with profiling.phase("fitness"):
+                    fitness = self.fitness(counts)
+                with profiling.phase("selection"):
+                    self.ranking = {player: fitness[i].item()
+                                    for i, player in enumerate(self.players)}
+                    self.sort_ranking()
+                    if self.dynamics == "selection":
+                        next_generation = self.natural_selection_counts(counts, fitness)
+                    else:
+                        new_counts = self.population_dynamics(counts)
+                        next_generation = {player.name: [new_counts[i].item()]
+                                           for i, player in enumerate(self.players)}
+            else:
+                # Ejectuamos el DP no iterativo
+                with profiling.phase("games"):
+                    counts = [count_evolution[player.name][gen] for player in self.players]
+                    types = np.repeat(np.arange(len(self.players)), counts)
+                    scores = self.play_individuals(types)
+
+                # Se realiza la selección
+                with profiling.phase("selection"):
+                    mean_scores = (np.bincount(types, scores, len(self.players))
+                                   / np.maximum(counts, 1))
+                    self.ranking = {player: mean_scores[i].item()
+                                    for i, player in enumerate(self.players)}
+                    self.sort_ranking()
+                    new_counts = self.natural_selection(types, scores)
+                    next_generation = {player.name: [new_counts[i].item()]
+                                       for i, player in enumerate(self.players)}
 
             for player in self.players:
                 if(player.name in next_generation):
                     count_evolution[player.name].extend(next_generation[player.name])
                 else:
                     count_evolution[player.name].extend([0])
-                    
-        self.stackplot(count_evolution)
+
+            if do_print:
+                print(f"Generation {gen + 1}: "
+                      + ", ".join(f"{name}={values[-1]}"
+                                  for name, values in count_evolution.items()))
+
+            if checkpoint is not None and (gen + 1) % checkpoint_every == 0:
+                self.save_checkpoint(checkpoint, count_evolution, gen + 1)
+
+        if checkpoint is not None:
+            self.save_checkpoint(checkpoint, count_evolution, self.generations)
+
+        self.count_evolution = count_evolution
+        if plot:
+            self.stackplot(count_evolution)
     
     def sort_ranking(self) -> None:
         self.ranking = dict(sorted(self.ranking.items(), key=lambda item: item[1],reverse=True))
@@ -184,6 +428,7 @@ class Evolution:
          list indicates the number of individuals that player has at the end of
          the 'i'-th generation
          """
+        import matplotlib.pyplot as plt
 
         COLORS = ['blue', 'green', 'red', 'cyan', 'magenta', 'yellow', 'black']
 
@@ -195,31 +440,3 @@ class Evolution:
 
         plt.legend()
         plt.show()
-# ------------------------------------------------------
-dilemma = Dilemma(2, -1, 3, 0)
-
-cooperator_player = Cooperator(dilemma, "cooperator")
-defector_player = Defector(dilemma, "defector")
-tft_player = Tft(dilemma, "tft")
-grudger_player = Grudger(dilemma, "grudger")
-detective_player = Detective4MovsTft(dilemma, "detective")
-periodic_cd  = Periodic_CD(dilemma, "periodic_cd")
-periodic_dc  = Periodic_DC(dilemma, "periodic_dc")
-periodic_ccd = Periodic_CCD(dilemma, "periodic_ccd")
-periodic_cdd = Periodic_CDD(dilemma, "periodic_cdd")
-
-destructor_player = Destructomatic(dilemma, "destructor")
-sema4all_player = Sema4All_Killer(dilemma, "sema4all")
-
-all_players = (tft_player, destructor_player, sema4all_player,
-               periodic_cd, periodic_dc, periodic_ccd, periodic_cdd)
-
-all_players = list(all_players)
-random.shuffle(all_players)
-all_players = tuple(all_players)
-
-evolution = Evolution(all_players, n_rounds=50, error=0.00, repetitions=1,
-                      generations=10, reproductivity=0.2,
-                      initial_population=50)
-
-evolution.play(True)
\ No newline at end of file
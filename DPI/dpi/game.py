@@ -1,9 +1,19 @@
 from __future__ import annotations
 
 import random
-from dilemma import Dilemma, C, D
-from player import Player, Cooperator, Defector, Tft, Grudger, Detective4MovsTft
-from sema4all_killer import Sema4All_Killer
+import time
+import numpy as np
+from . import profiling
+from .dilemma import Dilemma, C, D
+from .player import Player
+
+# Maximum number of joint states remembered while looking for a cycle. Games
+# that do not cycle within these rounds are simulated until the end.
+CYCLE_SEARCH_LIMIT = 10_000
+
+# Maximum number of rounds reserved in advance in the histories of the players
+# (longer games grow them as needed)
+RESERVE_LIMIT = 1 << 20
 
 class Game:
 
@@ -19,9 +29,15 @@ class Game:
             - player_2 (Player): second player of the game
             - n_rounds (int = 100): number of rounds in the game
             - error (float = 0.0): error probability (in base 1)
+
+        The players only choose between C and D, so dilemmas with more
+        actions ('Dilemma.from_matrices') raise a ValueError.
         """
 
         assert n_rounds > 0, "'n_rounds' should be greater than 0"
+        if player_1.dilemma.n_actions != 2:
+            raise ValueError("'Game' only plays games of 2 actions (C and D), "
+                             f"not {player_1.dilemma.n_actions}")
 
         self.player_1 = player_1
         self.player_2 = player_2
@@ -34,6 +50,17 @@ class Game:
                                  # correspond to the points scored by the first
                                  # and second player, respectively.
 
+        self.simulated_rounds = 0  # rounds actually simulated by 'play()'.
+                                   # It is smaller than 'n_rounds' when the
+                                   # rest of the score was extrapolated from
+                                   # a cycle (the histories of the players
+                                   # then repeat the cycle up to 'n_rounds',
+                                   # see 'History.repeat').
+
+        self.outcomes = np.zeros((2, 2), dtype=np.int64)  # number of rounds
+                                   # of each joint action: outcomes[a_1, a_2]
+                                   # counts the rounds in which the first
+                                   # player played a_1 and the second a_2.
 
     def play(self, do_print: bool = False) -> None:
         """
@@ -45,13 +72,65 @@ class Game:
             results at the end of each round (i.e. print round number, last
             actions of both players and ongoing score).
         """
+        profiler = profiling.active()
+        start = time.perf_counter()
+
+        # Running score: each round only adds its own payoff, read from the
+        # precomputed table of the dilemma
+        payoffs = self.player_1.dilemma.table
+        score_1, score_2 = 0, 0
+        outcomes = [0, 0, 0, 0]  # CC, CD, DC, DD
+
+        # The histories stay the same objects during the game
+        history_1, history_2 = self.player_1.history, self.player_2.history
+        for history in (history_1, history_2):
+            if hasattr(history, "reserve"):
+                history.reserve(len(history) + min(self.n_rounds, RESERVE_LIMIT))
+
+        # Without noise, two players that expose their state ('state_key')
+        # fall into a cycle of joint states. Once a state repeats, the rest of
+        # the game is that cycle, so its score is computed in closed form.
+        detect_cycles = self.error == 0 and not do_print
+        first_rounds = (len(history_1), len(history_2))
+        seen_states = {}   # joint state -> round in which it was first seen
+        cumulative = []    # running score and outcomes at the beginning of
+                           # each round
+
         for iteration in range(self.n_rounds):
-            action_1=self.player_1.strategy(self.player_2)
-            action_2=self.player_2.strategy(self.player_1)
-            action_1,bool_1 = self.change_action(action_1)
-            action_2,bool_2= self.change_action(action_2)
-            self.player_1.history.append(action_1)
-            self.player_2.history.append(action_2)
+            if detect_cycles:
+                state = self._joint_state()
+                if state is None or len(seen_states) >= CYCLE_SEARCH_LIMIT:
+                    detect_cycles = False
+                    seen_states, cumulative = {}, []
+                elif state in seen_states:
+                    totals = self._extrapolate(seen_states[state], iteration, cumulative,
+                                               (score_1, score_2, *outcomes))
+                    self.score = totals[:2]
+                    self.outcomes = np.array(totals[2:], dtype=np.int64).reshape(2, 2)
+                    self.simulated_rounds = iteration
+                    self._repeat_histories(first_rounds, seen_states[state])
+                    if profiler is not None:
+                        self._record_match(profiler, start)
+                    return
+                else:
+                    seen_states[state] = iteration
+                    cumulative.append((score_1, score_2, *outcomes))
+
+            if profiler is None:
+                action_1=self.player_1.strategy(self.player_2)
+                action_2=self.player_2.strategy(self.player_1)
+                action_1,bool_1 = self.change_action(action_1)
+                action_2,bool_2= self.change_action(action_2)
+                history_1.append(action_1)
+                history_2.append(action_2)
+
+                payoff_1, payoff_2 = payoffs[action_1][action_2]
+            else:
+                action_1, action_2, bool_1, bool_2, payoff_1, payoff_2 = \
+                    self._profiled_round(profiler)
+            score_1 += payoff_1
+            score_2 += payoff_2
+            outcomes[2 * action_1 + action_2] += 1
 
             if do_print:
                 print('-'*50)
@@ -64,9 +143,111 @@ class Game:
                     print(f'{self.player_2.name} played:{action_2}. Action was changed due to error probability.')
                 else:
                     print(f'{self.player_2.name} played:{action_2}. Action was not changed.')
-                print(self.player_1.compute_scores(self.player_2))
-            
-            self.score = (self.player_1.compute_scores(self.player_2))
+                print((score_1, score_2))
+
+        self.score = (score_1, score_2)
+        self.outcomes = np.array(outcomes, dtype=np.int64).reshape(2, 2)
+        self.simulated_rounds = self.n_rounds
+        if profiler is not None:
+            self._record_match(profiler, start)
+
+    def _profiled_round(self, profiler: profiling.Profiler) -> tuple:
+        """Same round as in 'play', timing each phase and each strategy"""
+        t_0 = time.perf_counter()
+        action_1 = self.player_1.strategy(self.player_2)
+        t_1 = time.perf_counter()
+        action_2 = self.player_2.strategy(self.player_1)
+        t_2 = time.perf_counter()
+        action_1, bool_1 = self.change_action(action_1)
+        action_2, bool_2 = self.change_action(action_2)
+        t_3 = time.perf_counter()
+        self.player_1.history.append(action_1)
+        self.player_2.history.append(action_2)
+        payoff_1, payoff_2 = self.player_1.dilemma.table[action_1][action_2]
+        t_4 = time.perf_counter()
+
+        profiler.add_strategy(type(self.player_1).__name__, t_1 - t_0)
+        profiler.add_strategy(type(self.player_2).__name__, t_2 - t_1)
+        profiler.add_phase("strategy", t_2 - t_0, 2)
+        profiler.add_phase("noise", t_3 - t_2, 2)
+        profiler.add_phase("scoring", t_4 - t_3)
+        return action_1, action_2, bool_1, bool_2, payoff_1, payoff_2
+
+    def _record_match(self, profiler: profiling.Profiler, start: float) -> None:
+        profiler.add_match({"player_1": self.player_1.name,
+                            "player_2": self.player_2.name,
+                            "strategy_1": type(self.player_1).__name__,
+                            "strategy_2": type(self.player_2).__name__,
+                            "n_rounds": self.n_rounds,
+                            "simulated_rounds": self.simulated_rounds,
+                            "seconds": time.perf_counter() - start})
+
+    def _joint_state(self) -> tuple | None:
+        """State of both players, or None if one of them does not expose it"""
+        state_1 = self.player_1.state_key(self.player_2)
+        if state_1 is None:
+            return None
+        state_2 = self.player_2.state_key(self.player_1)
+        if state_2 is None:
+            return None
+        return state_1, state_2
+
+    def _extrapolate(self, start: int, iteration: int, cumulative: list,
+                     totals: tuple) -> tuple:
+        """
+        Final running totals (score and outcome counts) of a game whose joint
+        state at round 'iteration' was already seen at round 'start'.
+
+        Parameters:
+            - start (int): first round of the cycle
+            - iteration (int): current round (start + cycle length)
+            - cumulative (list): running totals at the beginning of each round
+            - totals (tuple): running totals at 'iteration'
+
+        Results:
+            - The totals the game would have after 'n_rounds' rounds
+        """
+        period = iteration - start
+        n_cycles, remainder = divmod(self.n_rounds - iteration, period)
+        return tuple(totals[k]
+                     + n_cycles * (totals[k] - cumulative[start][k])
+                     + cumulative[start + remainder][k] - cumulative[start][k]
+                     for k in range(len(totals)))
+
+    def _repeat_histories(self, first_rounds: tuple[int, int], start: int) -> None:
+        """
+        Completes the histories of both players with the repetitions of the
+        cycle that begins at round 'start' (they only hold the simulated
+        rounds), so that they describe the whole game
+
+        Parameters:
+            - first_rounds (tuple[int, int]): length of the histories before
+         the game
+            - start (int): first round of the cycle
+        """
+        for player, first in zip((self.player_1, self.player_2), first_rounds):
+            history = player.history
+            if hasattr(history, "repeat"):
+                history.repeat(first + start, first + self.n_rounds)
+            else:
+                cycle = history[first + start:]
+                history.extend(cycle[k % len(cycle)]
+                               for k in range(self.n_rounds - self.simulated_rounds))
+
+    def rescore(self, dilemma: Dilemma) -> tuple[float, float]:
+        """
+        Score the game would have had under another dilemma. The moves of the
+        strategies do not depend on the payoffs, so it is computed from
+        'self.outcomes' without replaying the game.
+
+        Parameters:
+            - dilemma (Dilemma): the payoffs to use
+
+        Results:
+            - A tuple with the score of both players
+        """
+        score_1, score_2 = (self.outcomes * dilemma.payoffs).sum(axis=(1, 2))
+        return score_1.item(), score_2.item()
 
     def plot_results(self, do_print: bool = False) -> None:
         if do_print:            
@@ -83,17 +264,3 @@ class Game:
                 return C, True
         else:
             return action, False
-# -----------------------------------------------------------------
-dilemma = Dilemma(2, -1, 3, 0)
-
-cooperator_player = Cooperator(dilemma, "cooperator")
-defector_player = Defector(dilemma, "defector")
-tft_player = Tft(dilemma, "tft")
-grudger_player = Grudger(dilemma, "grudger")
-detective_player = Detective4MovsTft(dilemma, "detective")
-sema4all_player = Sema4All_Killer(dilemma, "sema4all")
-
-# Modifica las siguientes líneas a conveniencia para llevar a cabo distintos tests
-# game = Game(sema4all_player, tft_player, n_rounds=50, error=0)
-# game.play(do_print=False)
-# game.plot_results(do_print=True)
\ No newline at end of file
@@ -0,0 +1,149 @@
+from __future__ import annotations
+
+import numpy as np
+from . import profiling
+from .player import Player
+from .batch_game import BatchGame
+from .parallel import seeded_rng
+from .lookup_player import LookupPlayer
+
+class GeneticSearch:
+
+    def __init__(self, opponents: tuple[Player, ...],
+                       memory: int = 1,
+                       population: int = 1000,
+                       generations: int = 50,
+                       n_rounds: int = 100,
+                       error: float = 0.0,
+                       repetitions: int = 1,
+                       mutation: float = 0.01,
+                       crossover: float = 0.9,
+                       elite: int = 10,
+                       tournament_size: int = 3,
+                       seed: int | None = None):
+        """
+        Genetic algorithm over memory-n lookup-table strategies
+        ('LookupPlayer'). Each genome is a table of 4**n actions followed by
+        the n opening moves. The fitness of a genome is its mean score per
+        game against 'opponents'. All the games of a generation (every genome
+        against every opponent) are played at once with a 'BatchGame'.
+
+        Parameters:
+            - opponents (tuple[Player, ...]): pool of strategies the genomes
+         are evaluated against. They must support 'BatchGame'.
+            - memory (int = 1): number of past rounds the tables look at
+            - population (int = 1000): genomes per generation
+            - generations (int = 50): number of generations
+            - n_rounds (int = 100): number of rounds in each game
+            - error (float = 0.0): error probability (in base 1)
+            - repetitions (int = 1): games against each opponent
+            - mutation (float = 0.01): probability of flipping each gene
+            - crossover (float = 0.9): probability that a child mixes two
+         parents (single point crossover) instead of copying one
+            - elite (int = 10): best genomes copied unchanged to the next
+         generation
+            - tournament_size (int = 3): genomes compared to choose each
+         parent
+            - seed (int | None = None): seed of the random generator (drawn
+         from the 'random' module if not given)
+        """
+
+        assert BatchGame.supports(list(opponents)), \
+            "every opponent should have a 'batch_strategy'"
+        assert elite < population, "'elite' should be smaller than 'population'"
+
+        self.opponents = opponents
+        self.dilemma = opponents[0].dilemma
+        self.memory = memory
+        self.population = population
+        self.generations = generations
+        self.n_rounds = n_rounds
+        self.error = error
+        self.repetitions = repetitions
+        self.mutation = mutation
+        self.crossover = crossover
+        self.elite = elite
+        self.tournament_size = tournament_size
+        self.rng = seeded_rng(seed)
+
+        self.genome_size = 4 ** memory + memory
+        self.genomes = self.rng.integers(0, 2, (population, self.genome_size),
+                                         dtype=np.int8)
+        self.fitness_evolution = []   # (best, mean) fitness of each generation
+
+    def fitness(self, genomes: np.ndarray) -> np.ndarray:
+        """
+        Mean score per game of each genome against the opponents
+
+        Parameters:
+            - genomes (np.ndarray): one genome per row
+
+        Results:
+            - Array with the fitness of each genome
+        """
+        candidates = [LookupPlayer.from_genome(self.dilemma, genome, self.memory)
+                      for genome in genomes]
+        n_games = len(self.opponents) * self.repetitions
+        # Games ordered by genome, then opponent and repetition
+        players_1 = [candidate for candidate in candidates for _ in range(n_games)]
+        players_2 = list(self.opponents) * (self.repetitions * len(candidates))
+
+        game = BatchGame(players_1, players_2, self.n_rounds, self.error, rng=self.rng)
+        game.play()
+        return game.scores[:, 0].reshape(len(genomes), n_games).mean(axis=1)
+
+    def select(self, fitness: np.ndarray, n: int) -> np.ndarray:
+        """Indices of 'n' parents chosen by tournament selection"""
+        contenders = self.rng.integers(0, len(fitness), (n, self.tournament_size))
+        winners = np.argmax(fitness[contenders], axis=1)
+        return contenders[np.arange(n), winners]
+
+    def next_generation(self, fitness: np.ndarray) -> np.ndarray:
+        """
+        Elitism, tournament selection, single point crossover and mutation,
+        for the whole population at once
+
+        Results:
+            - The genomes of the next generation
+        """
+        n_children = self.population - self.elite
+        elite = np.argpartition(-fitness, self.elite - 1)[:self.elite] if self.elite else []
+
+        parents_1 = self.genomes[self.select(fitness, n_children)]
+        parents_2 = self.genomes[self.select(fitness, n_children)]
+        cuts = self.rng.integers(1, self.genome_size, n_children)
+        cuts[self.rng.random(n_children) >= self.crossover] = self.genome_size
+        from_first = np.arange(self.genome_size) < cuts[:, None]
+        children = np.where(from_first, parents_1, parents_2)
+
+        flips = self.rng.random(children.shape) < self.mutation
+        children ^= flips.astype(np.int8)
+        return np.concatenate([self.genomes[elite], children])
+
+    def play(self, do_print: bool = False) -> LookupPlayer:
+        """
+        Main call of the class. Evolves the genomes.
+
+        Parameters:
+            - do_print (bool = False): if True, prints the best and mean
+         fitness of each generation
+
+        Results:
+            - The best strategy of the last generation. The (best, mean)
+         fitness of every generation is stored in 'self.fitness_evolution'.
+        """
+        for gen in range(self.generations + 1):
+            with profiling.phase("fitness"):
+                fitness = self.fitness(self.genomes)
+            self.fitness_evolution.append((fitness.max().item(), fitness.mean().item()))
+            if do_print:
+                print(f"Generation {gen}: best={fitness.max():.2f}, "
+                      f"mean={fitness.mean():.2f}")
+            if gen == self.generations:
+                break
+            with profiling.phase("selection"):
+                self.genomes = self.next_generation(fitness)
+
+        self.best_genome = self.genomes[np.argmax(fitness)]
+        return LookupPlayer.from_genome(self.dilemma, self.best_genome,
+                                        self.memory, "GA")
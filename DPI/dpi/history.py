@@ -0,0 +1,185 @@
+from __future__ import annotations
+
+import numpy as np
+from typing import Iterator
+from .dilemma import C, D
+
+class History:
+
+    def __init__(self, actions: list[int] | None = None, capacity: int = 16):
+        """
+        Compact history of actions. Behaves like the list of ints it replaces
+        (indexing, slicing, iteration, 'len', 'in', comparison with lists),
+        but stores the actions in a preallocated int8 buffer and keeps running
+        counters, so summary queries such as 'D in history' are O(1).
+        The end of a history can be a cycle stored compactly ('repeat'): a
+        game whose score was extrapolated from a cycle has a history with all
+        its rounds, but only keeps the simulated ones.
+
+        Parameters:
+            - actions (list[int] | None = None): initial actions
+            - capacity (int = 16): initial size of the buffer. It doubles
+         every time it is full ('Game' reserves the whole game in advance).
+        """
+        self._buffer = np.zeros(max(capacity, 1), dtype=np.int8)
+        self._length = 0      # actions stored in the buffer
+        self._repeated = 0    # actions after them, which repeat the stored
+        self._cycle_start = 0 # ones from this index on ('repeat')
+        self.defections = 0   # number of D in the history
+        self._last = None     # last action, as a Python int
+
+        for action in actions or []:
+            self.append(action)
+
+    def reserve(self, capacity: int) -> None:
+        """Makes room for 'capacity' actions without reallocating"""
+        if capacity > len(self._buffer):
+            buffer = np.zeros(capacity, dtype=np.int8)
+            buffer[:self._length] = self._buffer[:self._length]
+            self._buffer = buffer
+
+    def append(self, action: int) -> None:
+        """Adds an action at the end of the history"""
+        if self._repeated:
+            self._expand()
+        if self._length == len(self._buffer):
+            self.reserve(2 * len(self._buffer))
+        self._buffer[self._length] = action
+        self._length += 1
+        self.defections += action == D
+        self._last = int(action)
+
+    def repeat(self, start: int, n_actions: int) -> None:
+        """
+        Extends the history to 'n_actions' actions by repeating its actions
+        from 'start' to the end, cyclically. The repetitions are not stored:
+        the history keeps the cycle and the number of repeated actions, so
+        this is O(length of the cycle) whatever 'n_actions'.
+
+        Parameters:
+            - start (int): first index of the cycle (the cycle goes to the
+         current end of the history)
+            - n_actions (int): length of the history afterwards
+        """
+        if self._repeated:
+            self._expand()
+        assert 0 <= start < self._length <= n_actions, \
+            "the cycle should be a non empty suffix of the history"
+        cycle = self._buffer[start:self._length]
+        n_cycles, remainder = divmod(n_actions - self._length, len(cycle))
+        self.defections += (n_cycles * int(np.count_nonzero(cycle == D))
+                            + int(np.count_nonzero(cycle[:remainder] == D)))
+        self._cycle_start = start
+        self._repeated = n_actions - self._length
+        if self._repeated:
+            self._last = int(self._buffer[self._position(n_actions - 1)])
+
+    def compressed(self) -> tuple[np.ndarray, np.ndarray]:
+        """
+        The stored actions and the number of times each one appears in the
+        history (more than once in a repeated cycle), so that sums over the
+        history are weighted sums over the stored actions
+
+        Results:
+            - A tuple with the stored actions (an int8 view) and their counts
+        """
+        counts = np.ones(self._length, dtype=np.int64)
+        if self._repeated:
+            period = self._length - self._cycle_start
+            n_cycles, remainder = divmod(self._repeated, period)
+            counts[self._cycle_start:] += n_cycles
+            counts[self._cycle_start:self._cycle_start + remainder] += 1
+        return self._buffer[:self._length], counts
+
+    def same_layout(self, other: History) -> bool:
+        """True if both histories store the same rounds and repeat the same
+        cycle (e.g. the histories of both players of a game), so their
+        'compressed' actions are aligned"""
+        return (self._length == other._length and self._repeated == other._repeated
+                and (not self._repeated or self._cycle_start == other._cycle_start))
+
+    def _position(self, index: int) -> int:
+        """Index in the buffer of the action 'index' (non negative)"""
+        if index < self._length:
+            return index
+        period = self._length - self._cycle_start
+        return self._cycle_start + (index - self._length) % period
+
+    def _expand(self) -> None:
+        """Stores the repeated actions (before changing the history)"""
+        actions = self.to_array()
+        self._buffer = np.zeros(max(len(self._buffer), len(actions)), dtype=np.int8)
+        self._buffer[:len(actions)] = actions
+        self._length, self._repeated = len(actions), 0
+
+    @property
+    def cooperations(self) -> int:
+        """Number of C in the history"""
+        return len(self) - self.defections
+
+    @property
+    def ever_defected(self) -> bool:
+        """True if there is at least one D in the history"""
+        return self.defections > 0
+
+    def last(self, k: int) -> list[int]:
+        """Last 'k' actions (or less, if the history is shorter)"""
+        if self._repeated:
+            return [int(self._buffer[self._position(index)])
+                    for index in range(max(len(self) - k, 0), len(self))]
+        return self._buffer[max(self._length - k, 0):self._length].tolist()
+
+    def to_array(self) -> np.ndarray:
+        """The actions as an int8 array (a view, not a copy, unless a cycle
+        is repeated)"""
+        stored = self._buffer[:self._length]
+        if self._repeated:
+            cycle = stored[self._cycle_start:]
+            return np.concatenate([stored, np.resize(cycle, self._repeated)])
+        return stored
+
+    def count(self, action: int) -> int:
+        if action == D:
+            return self.defections
+        if action == C:
+            return self.cooperations
+        return 0
+
+    def __len__(self) -> int:
+        return self._length + self._repeated
+
+    def __contains__(self, action: int) -> bool:
+        return self.count(action) > 0
+
+    def __getitem__(self, index: int | slice) -> int | list[int]:
+        if isinstance(index, slice):
+            return self.to_array()[index].tolist()
+        if index == -1 and len(self) > 0:
+            return self._last
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("history index out of range")
+        return int(self._buffer[self._position(index)])
+
+    def __setitem__(self, index: int, action: int) -> None:
+        previous = self[index]
+        if self._repeated:
+            self._expand()
+        if index < 0:
+            index += self._length
+        self._buffer[index] = action
+        self.defections += (action == D) - (previous == D)
+        if index == self._length - 1:
+            self._last = int(action)
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self.to_array().tolist())
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, (History, list, tuple)):
+            return list(self) == list(other)
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"History({list(self)})"
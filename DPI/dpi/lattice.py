@@ -0,0 +1,201 @@
+from __future__ import annotations
+
+import numpy as np
+from . import profiling
+from .player import Player
+from .payoff_matrix import PayoffMatrix
+from .parallel import seeded_rng
+
+# Offsets of the neighbours of a cell
+NEIGHBOURHOODS = {
+    "von_neumann": ((-1, 0), (1, 0), (0, -1), (0, 1)),
+    "moore": ((-1, -1), (-1, 0), (-1, 1), (0, -1),
+              (0, 1), (1, -1), (1, 0), (1, 1)),
+}
+
+UPDATE_RULES = ("imitate_best", "fermi")
+
+class Lattice:
+
+    def __init__(self, players: tuple[Player, ...],
+                       shape: tuple[int, int] = (100, 100),
+                       n_rounds: int = 100,
+                       error: float = 0.0,
+                       generations: int = 100,
+                       neighbourhood: str = "moore",
+                       update: str = "imitate_best",
+                       temperature: float = 0.1,
+                       initial_grid: np.ndarray | None = None,
+                       samples: int = 100,
+                       seed: int | None = None):
+        """
+        Spatial evolutionary tournament. Each cell of a toroidal grid holds
+        the index of a strategy of 'players' and plays against its
+        neighbours. The scores come from the expected scores between
+        strategies ('PayoffMatrix'), so a generation is a few array operations
+        over the whole grid, whatever its size.
+
+        Parameters:
+            - players (tuple[Player, ...]): one player per strategy
+            - shape (tuple[int, int] = (100, 100)): size of the grid
+            - n_rounds (int = 100): number of rounds in each game
+            - error (float = 0.0): error probability (in base 1)
+            - generations (int = 100): number of generations to simulate
+            - neighbourhood (str = "moore"): "moore" (8 neighbours) or
+         "von_neumann" (4 neighbours)
+            - update (str = "imitate_best"): how the cells change at the end
+         of each generation. With "imitate_best", every cell copies the
+         strategy of the best scoring cell among itself and its neighbours
+         (it keeps its own on ties). With "fermi", every cell compares itself
+         with a random neighbour and copies it with probability
+         1 / (1 + exp(-(neighbour score - own score) / (temperature * n_rounds)))
+            - temperature (float = 0.1): noise of the "fermi" rule, per round
+            - initial_grid (np.ndarray | None = None): initial strategy of
+         each cell. Random (uniform) if not given.
+            - samples (int = 100): games sampled to estimate the expected
+         score of a random pair of strategies (see 'PayoffMatrix')
+            - seed (int | None = None): seed of the random generator (drawn
+         from the 'random' module if not given)
+        """
+
+        assert neighbourhood in NEIGHBOURHOODS, \
+            f"'neighbourhood' should be one of {tuple(NEIGHBOURHOODS)}"
+        assert update in UPDATE_RULES, f"'update' should be one of {UPDATE_RULES}"
+
+        self.players = players
+        self.n_rounds = n_rounds
+        self.error = error
+        self.generations = generations
+        self.offsets = NEIGHBOURHOODS[neighbourhood]
+        self.update = update
+        self.temperature = temperature
+        self.rng = seeded_rng(seed)
+
+        # Smallest type that holds every strategy index
+        self.dtype = np.min_scalar_type(len(players) - 1)
+        if initial_grid is None:
+            self.grid = self.rng.integers(0, len(players), shape).astype(self.dtype)
+        else:
+            self.grid = np.asarray(initial_grid).astype(self.dtype)
+
+        self.payoffs = PayoffMatrix(players, n_rounds, error, samples, rng=self.rng)
+
+    def _neighbours(self, values: np.ndarray, offset: tuple[int, int]) -> np.ndarray:
+        """Value of the neighbour at 'offset' of every cell"""
+        return np.roll(values, (-offset[0], -offset[1]), axis=(0, 1))
+
+    def scores(self) -> np.ndarray:
+        """
+        Results:
+            - Array with the total expected score of every cell against its
+         neighbours
+        """
+        payoffs = self.payoffs.matrix()
+        scores = np.zeros(self.grid.shape)
+        for offset in self.offsets:
+            scores += payoffs[self.grid, self._neighbours(self.grid, offset)]
+        return scores
+
+    def step(self, scores: np.ndarray) -> np.ndarray:
+        """
+        Applies the update rule to the whole grid
+
+        Parameters:
+            - scores (np.ndarray): score of every cell ('scores')
+
+        Results:
+            - The grid of the next generation
+        """
+        if self.update == "imitate_best":
+            best_grid = self.grid
+            best_scores = scores
+            for offset in self.offsets:
+                neighbour_scores = self._neighbours(scores, offset)
+                better = neighbour_scores > best_scores
+                best_scores = np.where(better, neighbour_scores, best_scores)
+                best_grid = np.where(better, self._neighbours(self.grid, offset), best_grid)
+            return best_grid
+
+        # Fermi rule: every cell looks at one random neighbour
+        choice = self.rng.integers(0, len(self.offsets), self.grid.shape)
+        model_grid = self.grid
+        model_scores = scores
+        for k, offset in enumerate(self.offsets):
+            chosen = choice == k
+            model_grid = np.where(chosen, self._neighbours(self.grid, offset), model_grid)
+            model_scores = np.where(chosen, self._neighbours(scores, offset), model_scores)
+
+        scale = self.temperature * self.n_rounds
+        exponent = np.clip((scores - model_scores) / scale, -500, 500)
+        copy = self.rng.random(self.grid.shape) < 1 / (1 + np.exp(exponent))
+        return np.where(copy, model_grid, self.grid)
+
+    def count_strategies(self) -> np.ndarray:
+        """Number of cells of each strategy"""
+        return np.bincount(self.grid.ravel(), minlength=len(self.players))
+
+    def play(self, do_print: bool = False,
+                   plot: bool = True,
+                   snapshots: str | None = None) -> None:
+        """
+        Main call of the class. Simulates the generations.
+
+        Parameters:
+            - do_print (bool = False): if True, prints the number of cells of
+         each strategy at the end of each generation
+            - plot (bool = True): if True, shows the final grid at the end.
+         The counts of every generation are stored in 'self.count_evolution'
+         (same format as in 'Evolution').
+            - snapshots (str | None = None): if given, '.npy' file where the
+         grid of every generation is written as it is computed (array of
+         shape (generations + 1, *shape), memory-mapped, so it is not kept in
+         memory). It can be read with 'np.load(snapshots, mmap_mode="r")'.
+        """
+        history = None
+        if snapshots is not None:
+            history = np.lib.format.open_memmap(
+                snapshots, mode="w+", dtype=self.dtype,
+                shape=(self.generations + 1, *self.grid.shape))
+            history[0] = self.grid
+
+        counts = np.zeros((self.generations + 1, len(self.players)), dtype=np.int64)
+        counts[0] = self.count_strategies()
+
+        for gen in range(self.generations):
+            with profiling.phase("fitness"):
+                scores = self.scores()
+            with profiling.phase("selection"):
+                self.grid = self.step(scores)
+                counts[gen + 1] = self.count_strategies()
+            if history is not None:
+                with profiling.phase("snapshot"):
+                    history[gen + 1] = self.grid
+
+            if do_print:
+                print(f"Generation {gen + 1}: "
+                      + ", ".join(f"{player.name}={count}"
+                                  for player, count in zip(self.players, counts[gen + 1])))
+
+        if history is not None:
+            history.flush()
+            del history
+
+        self.count_evolution = {player.name: counts[:, i].tolist()
+                                for i, player in enumerate(self.players)}
+        if plot:
+            self.plot_grid()
+
+    def plot_grid(self) -> None:
+        """Shows the strategy of every cell"""
+        import matplotlib.pyplot as plt
+        from matplotlib.colors import ListedColormap
+
+        COLORS = ['blue', 'green', 'red', 'cyan', 'magenta', 'yellow', 'black']
+
+        colors = [COLORS[i % len(COLORS)] for i in range(len(self.players))]
+        plt.imshow(self.grid, cmap=ListedColormap(colors),
+                   vmin=-0.5, vmax=len(self.players) - 0.5, interpolation="nearest")
+        for player, color in zip(self.players, colors):
+            plt.plot([], [], "s", label=player.name, color=color)
+        plt.legend()
+        plt.show()
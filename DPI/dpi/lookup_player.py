@@ -0,0 +1,106 @@
+from __future__ import annotations
+
+import numpy as np
+from typing import Sequence
+from .dilemma import Dilemma, C, D
+from .markov import Automaton
+from .player import Player
+
+def joint_code(mine: int, theirs: int) -> int:
+    """Index of a joint action: CC=0, CD=1, DC=2, DD=3"""
+    return 2 * mine + theirs
+
+class LookupPlayer(Player):
+
+    deterministic = True
+
+    def __init__(self, dilemma: Dilemma, name: str = "",
+                       table: Sequence[int] = (C, D, C, D),
+                       opening: Sequence[int] | None = None):
+        """
+        Memory-n lookup-table strategy: the move is read from a table indexed
+        by the last n joint actions (this player's and the opponent's).
+        The first n moves, before there are n joint actions, come from
+        'opening'. With the defaults it is Tit-for-tat.
+
+        Parameters:
+            - dilemma (Dilemma): the dilemma that this player will play
+            - name (str): the name of the strategy
+            - table (Sequence[int]): 4**n actions. The index of a history is
+         sum(joint_code(mine, theirs) * 4**k), where k = 0 is the last round,
+         k = 1 the one before, etc.
+            - opening (Sequence[int] | None = None): the n first moves (all C
+         if not given)
+        """
+        super().__init__(dilemma, name)
+        self.table = np.array(table, dtype=np.int8)
+        self.memory = int(round(np.log(len(self.table)) / np.log(4)))
+        assert len(self.table) == 4 ** self.memory, "'table' should have 4**n entries"
+        self.opening = (np.zeros(self.memory, dtype=np.int8) if opening is None
+                        else np.array(opening, dtype=np.int8))
+        assert len(self.opening) == self.memory, "'opening' should have n moves"
+        # Own read-only copies: the parameters are shared by the forks
+        self.table.flags.writeable = False
+        self.opening.flags.writeable = False
+
+    @classmethod
+    def from_genome(cls, dilemma: Dilemma, genome: np.ndarray, memory: int,
+                    name: str = "") -> LookupPlayer:
+        """Player from a genome: the table followed by the opening"""
+        return cls(dilemma, name, genome[:4 ** memory], genome[4 ** memory:])
+
+    def genome(self) -> np.ndarray:
+        """The table followed by the opening, as used by 'GeneticSearch'"""
+        return np.concatenate([self.table, self.opening])
+
+    def _index(self, opponent: Player) -> int:
+        index = 0
+        mine = self.state.history.last(self.memory)
+        theirs = opponent.state.history.last(self.memory)
+        for my_action, their_action in zip(mine, theirs):
+            index = 4 * index + joint_code(my_action, their_action)
+        return index
+
+    def strategy(self, opponent: Player) -> int:
+        """Plays the opening, then the entry of the table of the last n rounds"""
+        turn = len(self.state.history)
+        if turn < self.memory:
+            return int(self.opening[turn])
+        return int(self.table[self._index(opponent)])
+
+    def state_key(self, opponent):
+        turn = len(self.state.history)
+        if turn < self.memory:
+            return turn
+        return self.memory, self._index(opponent)
+
+    def batch_group(self):
+        # Tables of the same size are played together, each match with its own
+        return LookupPlayer, self.memory
+
+    def batch_init(self, players):
+        return {"tables": np.stack([player.table for player in players]),
+                "openings": np.stack([player.opening for player in players]),
+                "index": np.zeros(len(players), dtype=np.int64),
+                "rows": np.arange(len(players))}
+
+    def batch_strategy(self, state, t, my_last, opp_last, rng):
+        if t > 0:
+            state["index"] = (4 * state["index"] + 2 * my_last + opp_last) % len(self.table)
+        if t < self.memory:
+            return state["openings"][:, t].copy()
+        return state["tables"][state["rows"], state["index"]]
+
+    def automaton(self):
+        # State: (round, up to n; index of the last n joint actions)
+        size = len(self.table)
+
+        def defect_probability(state):
+            turn, index = state
+            if turn < self.memory:
+                return float(self.opening[turn] == D)
+            return float(self.table[index] == D)
+
+        return Automaton((0, 0), defect_probability,
+                         lambda state, mine, theirs: (min(state[0] + 1, self.memory),
+                                                      (4 * state[1] + joint_code(mine, theirs)) % size))
@@ -0,0 +1,186 @@
+from __future__ import annotations
+
+import numpy as np
+from typing import Callable, Hashable
+from .dilemma import C, D
+
+# Games up to this length are solved by propagating the distribution round
+# by round. Longer ones use matrix powers (logarithmic in 'n_rounds').
+ITERATION_LIMIT = 1000
+
+class Automaton:
+
+    def __init__(self, initial: Hashable,
+                       defect_probability: Callable[[Hashable], float],
+                       transition: Callable[[Hashable, int, int], Hashable]):
+        """
+        Finite-state description of a strategy. Memory-one strategies are the
+        automata whose state is the last joint action.
+
+        Parameters:
+            - initial (Hashable): state before the first round
+            - defect_probability (Callable): probability of playing D (before
+         noise) in a given state
+            - transition (Callable): next state, given the current state, the
+         action played by this player and the one played by the opponent
+         (both after noise, as stored in the histories)
+        """
+        self.initial = initial
+        self.defect_probability = defect_probability
+        self.transition = transition
+
+
+class MarkovGame:
+
+    def __init__(self, player_1: Player,
+                       player_2: Player,
+                       n_rounds: int = 100,
+                       error: float = 0.0):
+        """
+        Exact expected result of a noisy game between two finite-state
+        strategies. The noise of 'Game.change_action' makes the game a Markov
+        chain over the joint states of both automata, so the expected score is
+        computed from its transition matrix instead of by simulation.
+
+        Parameters:
+            - player_1 (Player): first player of the game
+            - player_2 (Player): second player of the game
+            - n_rounds (int = 100): number of rounds in the game
+            - error (float = 0.0): error probability (in base 1)
+
+        As in 'Game', dilemmas with more than 2 actions raise a ValueError.
+        """
+
+        assert n_rounds > 0, "'n_rounds' should be greater than 0"
+        if player_1.dilemma.n_actions != 2:
+            raise ValueError("'MarkovGame' only plays games of 2 actions (C and D), "
+                             f"not {player_1.dilemma.n_actions}")
+        assert MarkovGame.supports(player_1, player_2), \
+            "both players should have an 'automaton'"
+
+        self.player_1 = player_1
+        self.player_2 = player_2
+        self.n_rounds = n_rounds
+        self.error = error
+
+        self.states, self.transitions, self.payoffs, self.outcome_probabilities = \
+            self._build_chain()
+
+    @staticmethod
+    def supports(player_1: Player, player_2: Player) -> bool:
+        """True if both players can be described as finite automata"""
+        return player_1.automaton() is not None and player_2.automaton() is not None
+
+    def _action_probabilities(self, automaton: Automaton, state: Hashable) -> np.ndarray:
+        """Probabilities of C and D actually played (after noise) in a state"""
+        p = automaton.defect_probability(state)
+        p = p * (1 - self.error) + (1 - p) * self.error
+        return np.array([1 - p, p])
+
+    def _build_chain(self) -> tuple[list, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Enumerates the reachable joint states and builds the chain
+
+        Results:
+            - The list of joint states (the first one is the initial state)
+            - Transition matrix between them
+            - Expected payoff of both players in each state (one column each)
+            - Probability of each joint action (CC, CD, DC, DD) in each state
+        """
+        automaton_1 = self.player_1.automaton()
+        automaton_2 = self.player_2.automaton()
+        dilemma = self.player_1.dilemma
+        outcome_payoffs = {(a_1, a_2): dilemma.evaluate_result(a_1, a_2)
+                           for a_1 in (C, D) for a_2 in (C, D)}
+
+        initial = (automaton_1.initial, automaton_2.initial)
+        index = {initial: 0}
+        states = [initial]
+        edges = []        # (from, to, probability)
+        payoffs = []
+        outcomes = []
+
+        k = 0
+        while k < len(states):
+            state_1, state_2 = states[k]
+            probs_1 = self._action_probabilities(automaton_1, state_1)
+            probs_2 = self._action_probabilities(automaton_2, state_2)
+
+            expected = np.zeros(2)
+            outcome = np.zeros(4)
+            for (a_1, a_2), payoff in outcome_payoffs.items():
+                prob = probs_1[a_1] * probs_2[a_2]
+                if prob == 0:
+                    continue
+                expected += prob * np.array(payoff, dtype=float)
+                outcome[2 * a_1 + a_2] = prob
+                following = (automaton_1.transition(state_1, a_1, a_2),
+                             automaton_2.transition(state_2, a_2, a_1))
+                if following not in index:
+                    index[following] = len(states)
+                    states.append(following)
+                edges.append((k, index[following], prob))
+            payoffs.append(expected)
+            outcomes.append(outcome)
+            k += 1
+
+        transitions = np.zeros((len(states), len(states)))
+        for origin, target, prob in edges:
+            transitions[origin, target] += prob
+        return states, transitions, np.array(payoffs), np.array(outcomes)
+
+    def expected_scores(self) -> tuple[float, float]:
+        """
+        Returns:
+            - A tuple with the exact expected score of both players after
+         'n_rounds' rounds
+        """
+        score_1, score_2 = self._visits() @ self.payoffs
+        return float(score_1), float(score_2)
+
+    def expected_outcomes(self) -> np.ndarray:
+        """
+        Returns:
+            - 2x2 array with the expected number of rounds of each joint
+         action after 'n_rounds' rounds (same layout as 'Game.outcomes')
+        """
+        return (self._visits() @ self.outcome_probabilities).reshape(2, 2)
+
+    def _visits(self) -> np.ndarray:
+        """Expected number of rounds spent in each joint state"""
+        n_states = len(self.states)
+        distribution = np.zeros(n_states)
+        distribution[0] = 1.0
+
+        if self.n_rounds <= ITERATION_LIMIT:
+            # Sum of the distributions of every round
+            visits = np.zeros(n_states)
+            for _ in range(self.n_rounds):
+                visits += distribution
+                distribution = distribution @ self.transitions
+        else:
+            # [[P, I], [0, I]] ^ n = [[P^n, I + P + ... + P^(n-1)], [0, I]]
+            block = np.block([[self.transitions, np.eye(n_states)],
+                              [np.zeros((n_states, n_states)), np.eye(n_states)]])
+            powers = np.linalg.matrix_power(block, self.n_rounds)
+            visits = distribution @ powers[:n_states, n_states:]
+        return visits
+
+    def stationary_scores(self) -> tuple[float, float]:
+        """
+        Long-run average payoff per round, from the stationary distribution of
+        the chain. Only meaningful if the chain has a single stationary
+        distribution (e.g. with 'error' > 0).
+
+        Returns:
+            - A tuple with the average payoff per round of both players
+        """
+        n_states = len(self.states)
+        # pi (P - I) = 0 with sum(pi) = 1
+        system = np.vstack([(self.transitions - np.eye(n_states)).T, np.ones(n_states)])
+        rhs = np.zeros(n_states + 1)
+        rhs[-1] = 1.0
+        stationary = np.linalg.lstsq(system, rhs, rcond=None)[0]
+
+        score_1, score_2 = stationary @ self.payoffs
+        return float(score_1), float(score_2)
@@ -0,0 +1,179 @@
+from __future__ import annotations
+
+import itertools
+import random
+import numpy as np
+from typing import Iterable, Iterator
+from .player import Player
+from .game import Game
+from .cache import pairing_seed
+
+# Players and settings of the tournament, sent once to each worker process
+_worker_players: tuple[Player, ...] = ()
+_worker_settings: tuple[int, float] = (100, 0.0)
+# Strategy keys of the players, when the matches are seeded by strategy
+_worker_keys: tuple[str, ...] | None = None
+
+def match_seed(seed: int, i: int, j: int, repetition: int) -> int:
+    """
+    Seed of a single match, derived from the master seed. It only depends on
+    the match itself, so the results do not depend on how the matches are
+    split among workers.
+
+    Parameters:
+        - seed (int): master seed of the tournament
+        - i (int): index of the first player
+        - j (int): index of the second player
+        - repetition (int): repetition of the pairing
+
+    Results:
+        - An integer seed for the 'random' module
+    """
+    return int(np.random.SeedSequence([seed, i, j, repetition]).generate_state(1)[0])
+
+def seeded_rng(seed: int | None = None) -> np.random.Generator:
+    """
+    NumPy generator seeded with 'seed', or drawn from the 'random' module if
+    it is None, so that 'random.seed' also reproduces the vectorized games
+    """
+    if seed is None:
+        seed = random.getrandbits(128)
+    return np.random.default_rng(seed)
+
+def check_shareable(players: tuple[Player, ...]) -> None:
+    """
+    Raises a ValueError if some player learns from match to match
+    ('cacheable = False'): its matches depend on the ones it played before,
+    so they cannot be split among processes
+    """
+    learners = [player.name for player in players if not player.cacheable]
+    if learners:
+        raise ValueError(f"players that learn from match to match ({', '.join(learners)}) "
+                         "cannot be split among processes")
+
+def init_worker(players: tuple[Player, ...], n_rounds: int, error: float,
+                keys: tuple[str, ...] | None = None) -> None:
+    """Stores the players and settings in the worker process (see
+    'iter_seeded' for 'keys')"""
+    global _worker_players, _worker_settings, _worker_keys
+    _worker_players = players
+    _worker_settings = (n_rounds, error)
+    _worker_keys = keys
+
+def play_matches(matches: list[tuple[int, int, int]], seed: int) -> np.ndarray:
+    """
+    Plays a chunk of matches in the current process. Each match is played by
+    forks of the players ('Player.fork') and with its own random stream: from
+    'match_seed', or from 'cache.pairing_seed' if the worker has the keys of
+    the strategies (in a symmetric dilemma the players then play in the
+    order of their keys, and the results are given back in the order of the
+    match).
+
+    Parameters:
+        - matches (list[tuple[int, int, int]]): (i, j, repetition) of each match
+        - seed (int): master seed of the tournament
+
+    Results:
+        - Array with one row per match: the scores of both players followed
+        by the number of CC, CD, DC and DD rounds
+    """
+    n_rounds, error = _worker_settings
+    results = np.zeros((len(matches), 6))
+    for k, (i, j, repetition) in enumerate(matches):
+        swapped = False
+        if _worker_keys is None:
+            random.seed(match_seed(seed, i, j, repetition))
+        else:
+            swapped = (_worker_players[i].dilemma.symmetric
+                       and _worker_keys[i] > _worker_keys[j])
+            if swapped:
+                i, j = j, i
+            random.seed(pairing_seed(seed, _worker_keys[i], _worker_keys[j], repetition))
+        game = Game(_worker_players[i].fork(), _worker_players[j].fork(),
+                    n_rounds, error)
+        game.play()
+        results[k, :2] = game.score
+        results[k, 2:] = game.outcomes.ravel()
+        if swapped:
+            results[k] = results[k, [1, 0, 2, 4, 3, 5]]
+    return results
+
+def iter_seeded(players: tuple[Player, ...],
+                matches: Iterable[tuple[int, int, int]],
+                n_rounds: int,
+                error: float,
+                seed: int,
+                n_jobs: int = 1,
+                chunk_size: int = 1000,
+                keys: tuple[str, ...] | None = None) -> Iterator[tuple[list, np.ndarray]]:
+    """
+    Plays the given matches with deterministic per-match seeding, in a pool
+    of 'n_jobs' processes (or in this process if 'n_jobs' is 1), yielding
+    the results chunk by chunk in the order of 'matches'. Only a few chunks
+    are in memory at any time, so 'matches' can be a lazy iterable.
+
+    Parameters:
+        - players (tuple[Player, ...]): players of the tournament
+        - matches (Iterable[tuple[int, int, int]]): (i, j, repetition) of each
+     match
+        - n_rounds (int): number of rounds in each game
+        - error (float): error probability (in base 1)
+        - seed (int): master seed
+        - n_jobs (int = 1): number of worker processes
+        - chunk_size (int = 1000): matches sent to a worker at once
+        - keys (tuple[str, ...] | None = None): strategy keys of the players
+     ('cache.strategy_key'). If given, the matches are seeded by strategy
+     instead of by index ('play_matches')
+
+    Results:
+        - Iterator of (chunk of matches, results of 'play_matches')
+    """
+    if n_jobs > 1:
+        check_shareable(players)
+    matches = iter(matches)
+    chunks = iter(lambda: list(itertools.islice(matches, chunk_size)), [])
+
+    if n_jobs == 1:
+        # Same code as the workers, keeping the random state of this process
+        state = random.getstate()
+        init_worker(players, n_rounds, error, keys)
+        try:
+            for chunk in chunks:
+                yield chunk, play_matches(chunk, seed)
+        finally:
+            random.setstate(state)
+        return
+
+    from concurrent.futures import ProcessPoolExecutor
+
+    with ProcessPoolExecutor(n_jobs, initializer=init_worker,
+                             initargs=(players, n_rounds, error, keys)) as pool:
+        # Keep a bounded window of chunks in flight
+        pending = []
+        for chunk in chunks:
+            pending.append((chunk, pool.submit(play_matches, chunk, seed)))
+            if len(pending) >= 2 * n_jobs:
+                chunk, future = pending.pop(0)
+                yield chunk, future.result()
+        for chunk, future in pending:
+            yield chunk, future.result()
+
+def play_seeded(players: tuple[Player, ...],
+                matches: list[tuple[int, int, int]],
+                n_rounds: int,
+                error: float,
+                seed: int,
+                n_jobs: int = 1,
+                chunk_size: int | None = None) -> np.ndarray:
+    """
+    Same as 'iter_seeded', but returns all the results at once
+
+    Results:
+        - Array with the scores of both players in each match (same order as
+        'matches')
+    """
+    if chunk_size is None:
+        chunk_size = max(1, len(matches) // (4 * n_jobs))
+    results = [result[:, :2] for _, result in
+               iter_seeded(players, matches, n_rounds, error, seed, n_jobs, chunk_size)]
+    return np.concatenate(results) if results else np.zeros((0, 2))
@@ -0,0 +1,158 @@
+from __future__ import annotations
+
+import numpy as np
+from .player import Player
+from .game import Game
+from .markov import MarkovGame
+from . import cache as match_cache
+from .batch_game import play_records
+from .parallel import seeded_rng
+from .running_stats import RunningStats
+
+class PayoffMatrix:
+
+    def __init__(self, players: tuple[Player, ...],
+                       n_rounds: int = 100,
+                       error: float = 0.0,
+                       samples: int = 100,
+                       precision: float | None = None,
+                       confidence: float = 0.95,
+                       rng: np.random.Generator | None = None):
+        """
+        Expected score of every strategy against every other one. All the
+        individuals of a strategy behave the same way, so a population game
+        only needs one entry per pair of strategies, whatever the population
+        size. Entries are computed on demand and cached.
+
+        Parameters:
+            - players (tuple[Player, ...]): one player per strategy
+            - n_rounds (int = 100): number of rounds in each game
+            - error (float = 0.0): error probability (in base 1)
+            - samples (int = 100): number of games averaged for the pairs whose
+         result is random (noise or random strategies). Deterministic pairs
+         are played once, and the pairs of finite-state strategies are
+         solved exactly with 'MarkovGame'.
+            - precision (float | None = None): if given, random pairs are
+         sampled in blocks and stop as soon as the confidence interval of both
+         expected scores is narrower than +/- 'precision' ('samples' is then
+         the maximum number of games)
+            - confidence (float = 0.95): confidence level of the intervals
+            - rng (np.random.Generator | None = None): random generator used
+         when sampling with 'BatchGame'
+        """
+
+        assert samples > 0, "'samples' should be greater than 0"
+
+        self.players = players
+        self.n_rounds = n_rounds
+        self.error = error
+        self.samples = samples
+        self.precision = precision
+        self.confidence = confidence
+        self.rng = rng if rng is not None else seeded_rng()
+
+        # (i, j) -> (expected score of i, expected score of j), i <= j
+        self.cache = {}
+
+    def is_deterministic(self, i: int, j: int) -> bool:
+        """True if a game between the strategies 'i' and 'j' has always the
+        same result"""
+        return (self.error == 0 and self.players[i].deterministic
+                and self.players[j].deterministic)
+
+    def expected_scores(self, i: int, j: int) -> tuple[float, float]:
+        """
+        Expected scores of a game between the strategies 'i' and 'j'
+
+        Parameters:
+            - i (int): index of the first strategy in 'players'
+            - j (int): index of the second strategy in 'players'
+
+        Results:
+            - A tuple of two floats, with the expected score of 'i' and 'j'
+        """
+        if i > j:
+            return self.expected_scores(j, i)[::-1]
+
+        if (i, j) not in self.cache:
+            self.cache[(i, j)] = self._play(i, j)
+        return self.cache[(i, j)]
+
+    def set(self, i: int, j: int, scores: tuple[float, float]) -> None:
+        """
+        Stores the expected scores of a game between the strategies 'i' and
+        'j' obtained elsewhere (e.g. by a 'Sweep'), so it is never played
+
+        Parameters:
+            - i (int): index of the first strategy in 'players'
+            - j (int): index of the second strategy in 'players'
+            - scores (tuple[float, float]): expected score of 'i' and 'j'
+        """
+        score_1, score_2 = scores
+        if i > j:
+            i, j, score_1, score_2 = j, i, score_2, score_1
+        if i == j:
+            # Both sides are the same strategy
+            score_1 = score_2 = (score_1 + score_2) / 2
+        self.cache[(i, j)] = (float(score_1), float(score_2))
+
+    def _play(self, i: int, j: int) -> tuple[float, float]:
+        """Plays (or samples) the games between 'i' and 'j'"""
+        player_1, player_2 = self.players[i], self.players[j]
+        args = (player_1, player_2, self.n_rounds, self.error)
+        cache = match_cache.active()
+
+        if self.is_deterministic(i, j):
+            # A single scalar game (it can extrapolate cycles), played once
+            # ever with a cache
+            stored = cache.fetch(*args) if cache is not None else None
+            if stored is not None and len(stored) > 0:
+                score_1, score_2 = stored[0, :2]
+            else:
+                game = Game(player_1.fork(), player_2.fork(), self.n_rounds, self.error)
+                game.play()
+                score_1, score_2 = game.score
+                if cache is not None:
+                    cache.store(*args, [[*game.score, *game.outcomes.ravel()]])
+        elif MarkovGame.supports(player_1, player_2):
+            score_1, score_2 = MarkovGame(player_1, player_2, self.n_rounds,
+                                          self.error).expected_scores()
+        else:
+            block = self.samples if self.precision is None else max(2, self.samples // 10)
+            stats = RunningStats((1, 2))
+
+            # Games stored by a previous run are used first
+            stored = cache.fetch(*args) if cache is not None else None
+            if stored is not None and len(stored) > 0:
+                stored = stored[:self.samples, :2]
+                stats.update(np.zeros(len(stored), dtype=np.int64), stored)
+
+            while stats.count[0] < self.samples:
+                if (self.precision is not None and stats.count[0] > 1
+                        and stats.half_width(self.confidence).max() <= self.precision):
+                    break
+                n_games = min(block, self.samples - stats.count[0])
+                records = play_records([player_1] * n_games, [player_2] * n_games,
+                                       self.n_rounds, self.error, self.rng)
+                if cache is not None:
+                    cache.store(*args, records, first_repetition=int(stats.count[0]))
+                stats.update(np.zeros(n_games, dtype=np.int64), records[:, :2])
+            score_1, score_2 = stats.mean()[0]
+
+        if i == j:
+            # Both sides are the same strategy
+            score_1 = score_2 = (score_1 + score_2) / 2
+        return float(score_1), float(score_2)
+
+    def matrix(self) -> np.ndarray:
+        """
+        Returns:
+            - np array 'A' where A[i, j] is the expected score of the strategy
+         'i' in a game against the strategy 'j'
+        """
+        n = len(self.players)
+        result = np.zeros((n, n))
+        for i in range(n):
+            for j in range(i, n):
+                result[i, j], result[j, i] = self.expected_scores(i, j)
+        return result
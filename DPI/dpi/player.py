@@ -1,15 +1,72 @@
 from __future__ import annotations
 
+import copy
 import numpy as np
 from abc import ABC, abstractmethod
-from dilemma import Dilemma, C, D
+from typing import Hashable
+from .dilemma import Dilemma, C, D
+from .markov import Automaton
+from .history import History
+
+class MatchState:
+
+    __slots__ = ("history", "trust", "iteration")
+
+    def __init__(self):
+        """
+        State of a player during a match: everything that changes while
+        playing. A new one is created for every match ('Player.fork') and
+        only lives as long as the game. Strategies with more match state
+        extend it (and its '__slots__').
+        """
+        self.history  = History()  # This is the main variable of this class.
+                                   # It is intended to store all the history
+                                   # of actions performed by this player.
+                                   # Example: [C, C, D, D, D] <- So far, the
+                                   # interaction lasts five rounds. In the
+                                   # first one, this player cooperated. In the
+                                   # second, he also cooperated. In the third,
+                                   # he defected. Etc. It works like a list,
+                                   # but 'D in history' is O(1).
+        self.trust = True
+        self.iteration = 0
 
 class Player(ABC):
 
+    # True if the moves only depend on the histories (no randomness), so a
+    # noise-free game against another deterministic player always ends the
+    # same way
+    deterministic = False
+
+    # False if the results of a match cannot be reused later (e.g. the player
+    # learns from every game), so 'MatchCache' never stores them
+    cacheable = True
+
+    # Class of the match state of the strategy
+    State = MatchState
+
+    # Attributes that describe 'strategy' (besides 'deterministic', the
+    # methods below). A class that defines 'strategy' without them gets the
+    # defaults of 'Player' back: a subclass with another 'strategy' is never
+    # cycle-extrapolated, cached, solved by 'MarkovGame' or batched with the
+    # description of its parent.
+    STRATEGY_ATTRIBUTES = ("deterministic", "state_key", "automaton", "batch_strategy")
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if "strategy" in vars(cls):
+            for name in Player.STRATEGY_ATTRIBUTES:
+                if name not in vars(cls):
+                    setattr(cls, name, vars(Player)[name])
+
     @abstractmethod
     def __init__(self, dilemma: Dilemma, name: str = ""):
         """
-        Abstract class that represents a generic player
+        Abstract class that represents a generic player. Its attributes are
+        the strategy (the parameters, which do not change while playing),
+        and 'state' is the state of its current match ('MatchState'), whose
+        attributes ('history', 'trust', 'iteration') can also be read and
+        set on the player itself.
 
         Parameters:
             - name (str): the name of the strategy
@@ -18,16 +75,32 @@ class Player(ABC):
 
         self.name = name
         self.dilemma = dilemma
+        self.state = self.State()
+
+    @property
+    def history(self) -> History:
+        """Actions of this player in the current match"""
+        return self.state.history
 
-        self.history  = []  # This is the main variable of this class. It is
-                            # intended to store all the history of actions
-                            # performed by this player.
-                            # Example: [C, C, D, D, D] <- So far, the
-                            # interaction lasts five rounds. In the first one,
-                            # this player cooperated. In the second, he also
-                            # cooperated. In the third, he defected. Etc.
-        self.trust=True
-        self.iteration=0
+    @history.setter
+    def history(self, history: History) -> None:
+        self.state.history = history
+
+    @property
+    def trust(self) -> bool:
+        return self.state.trust
+
+    @trust.setter
+    def trust(self, trust: bool) -> None:
+        self.state.trust = trust
+
+    @property
+    def iteration(self) -> int:
+        return self.state.iteration
+
+    @iteration.setter
+    def iteration(self, iteration: int) -> None:
+        self.state.iteration = iteration
 
     @abstractmethod
     def strategy(self, opponent: Player) -> int:
@@ -54,21 +127,116 @@ class Player(ABC):
             - A tuple of two floats, where the first value is the current
             player's payoff, and the second value is the opponent's payoff.
         """
-        other_player_actions=opponent.history
-        results = np.array([self.dilemma.evaluate_result(action1,action2) for action1,action2 in zip(self.history,other_player_actions)])
-        current_player_payoff=results[:,0].sum()
-        opponent_player_payoff=results[:,1].sum()
-        return int(current_player_payoff), int(opponent_player_payoff)
+        mine, theirs = self.history, opponent.history
+        if isinstance(mine, History) and isinstance(theirs, History) and mine.same_layout(theirs):
+            # Repeated cycles (extrapolated games) are scored once per stored
+            # round, weighted by their number of repetitions
+            my_actions, counts = mine.compressed()
+            other_player_actions, _ = theirs.compressed()
+        else:
+            n_rounds = min(len(mine), len(theirs))
+            my_actions = np.asarray(mine[:n_rounds])
+            other_player_actions = np.asarray(theirs[:n_rounds])
+            counts = np.ones(n_rounds, dtype=np.int64)
+        current_player_payoff, opponent_player_payoff = self.dilemma.evaluate_result(
+            my_actions.astype(np.intp), other_player_actions.astype(np.intp))
+        return ((current_player_payoff * counts).sum().item(),
+                (opponent_player_payoff * counts).sum().item())
+
+    def reset(self) -> None:
+        """Replaces the match state by the one of a new match"""
+        self.state = self.State()
 
     def clean_history(self):
-        """Resets the history of the current player"""
-        self.history = []
-        self.iteration=0
-        self.trust=True
+        """Resets the history of the current player (see 'reset')"""
+        self.reset()
+
+    def fork(self) -> Player:
+        """
+        Player for a new match. The players given to the engines are specs
+        of their strategies (class and parameters) that never play: every
+        match plays with forks of them, shallow copies with a new match state
+        ('State'). The parameters are shared, so a fork is cheap and the same
+        spec can be in several matches at once (threads or processes) without
+        cross-talk. Strategies must therefore keep everything that changes
+        while playing in their 'State' (e.g. 'DestructomaticState') and never
+        modify their own attributes; parameters that are containers are
+        immutable (tuples, read-only arrays).
+
+        Results:
+            - A new player with the same strategy and an empty match state
+        """
+        player = copy.copy(self)
+        player.state = self.State()
+        return player
+
+    def state_key(self, opponent: Player) -> Hashable | None:
+        """
+        Hashable summary of everything this player's future moves depend on
+        (its internal state and the parts of the histories it reads). Two
+        rounds with the same key for both players are followed by the same
+        moves, which lets 'Game' detect cycles in noise-free games.
+
+        Parameters:
+            - opponent (Player): is another instance of Player.
+
+        Results:
+            - A hashable object, or None if the strategy is not deterministic
+            or does not expose its state.
+        """
+        return None
+
+    def automaton(self) -> Automaton | None:
+        """
+        Finite-state description of the strategy, used by 'MarkovGame' to
+        compute exact expected scores of noisy games.
+
+        Results:
+            - An 'Automaton', or None if the strategy has no finite one
+        """
+        return None
+
+    # Vectorized form of the strategy, used by 'BatchGame' to play many
+    # matches in lockstep. Strategies that support it define
+    #     batch_strategy(state, t, my_last, opp_last, rng) -> np.ndarray
+    # with the state built by 'batch_init', the current round 't' (0-based),
+    # the last action of this player and of the opponent in each match
+    # (meaningless when t == 0) and the random generator of the batch, and
+    # return an int8 array with the action (C=0 or D=1) of each match. The
+    # class that defines 'strategy' must also define 'batch_strategy' (see
+    # 'STRATEGY_ATTRIBUTES').
+    batch_strategy = None
+
+    def has_batch_strategy(self) -> bool:
+        """True if this player can be played by 'BatchGame'"""
+        return self.batch_strategy is not None
+
+    def batch_group(self) -> Hashable:
+        """
+        Key used by 'BatchGame' to group the matches whose moves are computed
+        in a single 'batch_strategy' call. Players with the same key must
+        behave identically.
+        """
+        return type(self)
+
+    def batch_init(self, players: list[Player]) -> dict[str, np.ndarray]:
+        """
+        Initial vectorized state of a group of matches
+
+        Parameters:
+            - players (list[Player]): the player of each match of the group
+
+        Results:
+            - A dict of arrays (one value per match) that 'batch_strategy'
+            is free to update in place.
+        """
+        return {}
 # ----------------------------------------------------------
 # Las 5 estrategias básicas del juego de Nicky Case
 class Cooperator(Player):
 
+    deterministic = True
+
     def __init__(self, dilemma: Dilemma, name: str = ""):
         """Cooperator"""
         super().__init__(dilemma,name)
@@ -76,9 +244,20 @@ class Cooperator(Player):
     def strategy(self, opponent: Player) -> int:
         """Cooperates always"""
         return C
+
+    def state_key(self, opponent):
+        return ()
+
+    def batch_strategy(self, state, t, my_last, opp_last, rng):
+        return np.full(len(opp_last), C, dtype=np.int8)
+
+    def automaton(self):
+        return Automaton((), lambda state: 0.0, lambda state, mine, theirs: ())
 # ------------------------------------------------------------
 class Defector(Player):
 
+    deterministic = True
+
     def __init__(self, dilemma: Dilemma, name: str = ""):
         """Defector"""
         super().__init__(dilemma,name)
@@ -86,9 +265,20 @@ class Defector(Player):
     def strategy(self, opponent: Player) -> int:
         """Defects always"""
         return D
+
+    def state_key(self, opponent):
+        return ()
+
+    def batch_strategy(self, state, t, my_last, opp_last, rng):
+        return np.full(len(opp_last), D, dtype=np.int8)
+
+    def automaton(self):
+        return Automaton((), lambda state: 1.0, lambda state, mine, theirs: ())
 # ------------------------------------------------------------
 class Tft(Player):
 
+    deterministic = True
+
     def __init__(self, dilemma: Dilemma, name: str = ""):
         """Tit-for-tat"""
         super().__init__(dilemma,name)
@@ -96,16 +286,35 @@ class Tft(Player):
     def strategy(self, opponent: Player) -> int:
         """Cooperates first, then repeat last action of the opponent"""
 
-        if self.trust:
-            if D in opponent.history:
-                self.trust = False
-                return opponent.history[-1]
+        if self.state.trust:
+            if D in opponent.state.history:
+                self.state.trust = False
+                return opponent.state.history[-1]
             return C
         else:
-            return opponent.history[-1]
+            return opponent.state.history[-1]
+
+    def state_key(self, opponent):
+        # While 'trust' holds, a defection of the opponent can only be its
+        # last move
+        return self.state.trust, opponent.state.history[-1] if opponent.state.history else None
+
+    def batch_strategy(self, state, t, my_last, opp_last, rng):
+        # While the opponent has never defected its last move is C, so TFT is
+        # just "repeat the last move of the opponent"
+        if t == 0:
+            return np.full(len(opp_last), C, dtype=np.int8)
+        return opp_last.astype(np.int8)
+
+    def automaton(self):
+        # State: last action of the opponent (C before the first round)
+        return Automaton(C, lambda state: float(state == D),
+                         lambda state, mine, theirs: theirs)
 # ------------------------------------------------------------
 class Grudger(Player):
 
+    deterministic = True
+
     def __init__(self, dilemma: Dilemma, name: str = ""):
         """Grudger"""
         super().__init__(dilemma,name)
@@ -115,43 +324,101 @@ class Grudger(Player):
         Cooperates always, but if opponent ever defects, it will defect for the
         rest of the game
         """
-        if self.trust:
-            if D in opponent.history:
-                self.trust = False
+        if self.state.trust:
+            if D in opponent.state.history:
+                self.state.trust = False
                 return D
             return C
         else:
             return D
+
+    def state_key(self, opponent):
+        return self.state.trust, opponent.state.history[-1] if opponent.state.history else None
+
+    def batch_init(self, players):
+        return {"grudge": np.zeros(len(players), dtype=bool)}
+
+    def batch_strategy(self, state, t, my_last, opp_last, rng):
+        if t > 0:
+            state["grudge"] |= opp_last == D
+        return np.where(state["grudge"], D, C).astype(np.int8)
+
+    def automaton(self):
+        # State: whether the opponent has ever defected
+        return Automaton(False, lambda grudge: float(grudge),
+                         lambda grudge, mine, theirs: grudge or theirs == D)
 # ------------------------------------------------------------
 class Detective4MovsTft(Player):
 
+    deterministic = True
+
     def __init__(self, dilemma: Dilemma, name: str = ""):
         """Four movement - tit for tat detective"""
         super().__init__(dilemma,name)
-        self.first_movements=[C,D,C,C]
+        self.first_movements=(C,D,C,C)
 
     def strategy(self, opponent: Player) -> int:
         """
         Starts with a fixed sequence of actions: [C,D,C,C]. After that, if
         the opponent has ever defected, plays 'TFT'. If not, plays 'Defector'.
         """
-        if self.iteration <= 3:
-            self.iteration+=1
-            return self.first_movements[self.iteration-1]
+        if self.state.iteration <= 3:
+            self.state.iteration+=1
+            return self.first_movements[self.state.iteration-1]
         else:
-            if D in opponent.history:
-                return opponent.history[-1]
+            if D in opponent.state.history:
+                return opponent.state.history[-1]
             else:
                 return D
+
+    def state_key(self, opponent):
+        if self.state.iteration <= 3:
+            return self.state.iteration, opponent.state.history[-1] if opponent.state.history else None
+        return self.state.iteration, D in opponent.state.history, opponent.state.history[-1]
+
+    def batch_init(self, players):
+        return {"betrayed": np.zeros(len(players), dtype=bool)}
+
+    def batch_strategy(self, state, t, my_last, opp_last, rng):
+        if t > 0:
+            state["betrayed"] |= opp_last == D
+        if t <= 3:
+            return np.full(len(opp_last), self.first_movements[t], dtype=np.int8)
+        return np.where(state["betrayed"], opp_last, D).astype(np.int8)
+
+    def automaton(self):
+        # State: (round, up to 4; whether the opponent has ever defected; last
+        # action of the opponent)
+        def defect_probability(state):
+            turn, betrayed, last = state
+            if turn <= 3:
+                return float(self.first_movements[turn] == D)
+            return float(last == D) if betrayed else 1.0
+
+        return Automaton((0, False, C), defect_probability,
+                         lambda state, mine, theirs: (min(state[0] + 1, 4),
+                                                      state[1] or theirs == D,
+                                                      theirs))
 # ------------------------------------------------------------
-class Destructomatic(Player):
+class DestructomaticState(MatchState):
 
-    def __init__(self, dilemma: Dilemma, name: str = ""):
-        super().__init__(dilemma, name)
+    __slots__ = ("defection_count", "consecutive_cooperation", "rounds_to_defect")
+
+    def __init__(self):
+        super().__init__()
         self.defection_count = 0
         self.consecutive_cooperation = 0
         self.rounds_to_defect = 0
 
+class Destructomatic(Player):
+
+    deterministic = True
+
+    State = DestructomaticState
+
+    def __init__(self, dilemma: Dilemma, name: str = ""):
+        super().__init__(dilemma, name)
+
     def strategy(self, opponent: Player) -> int:
         """
         A gradual forgiveness strategy.
@@ -159,67 +426,162 @@ class Destructomatic(Player):
         and resets after a series of cooperations.
         """
 
-        turns = len(self.history)
+        state = self.state
+        turns = len(state.history)
 
         if turns == 0:  # First move, always cooperate
             return C
 
-        if self.rounds_to_defect > 0:
-            self.rounds_to_defect -= 1
+        if state.rounds_to_defect > 0:
+            state.rounds_to_defect -= 1
             return D  # Defect if we're in a defection period
 
-        last_move = opponent.history[-1]
+        last_move = opponent.state.history[-1]
 
         if last_move == C:
-            self.consecutive_cooperation += 1
-            if self.consecutive_cooperation >= 5:
-                self.defection_count = 0
-                self.consecutive_cooperation = 0
+            state.consecutive_cooperation += 1
+            if state.consecutive_cooperation >= 5:
+                state.defection_count = 0
+                state.consecutive_cooperation = 0
         else:  # Opponent defected
-            self.defection_count += 1
-            self.consecutive_cooperation = 0
-            self.rounds_to_defect = self.defection_count
+            state.defection_count += 1
+            state.consecutive_cooperation = 0
+            state.rounds_to_defect = state.defection_count
             return D  # Defect immediately after opponent's defection
 
         return C  # Cooperate otherwise
+
+    def state_key(self, opponent):
+        state = self.state
+        return (len(state.history) == 0, state.rounds_to_defect,
+                state.defection_count, state.consecutive_cooperation,
+                opponent.state.history[-1] if opponent.state.history else None)
+
+    def batch_init(self, players):
+        n = len(players)
+        return {"defection_count": np.zeros(n, dtype=np.int64),
+                "consecutive_cooperation": np.zeros(n, dtype=np.int64),
+                "rounds_to_defect": np.zeros(n, dtype=np.int64)}
+
+    def batch_strategy(self, state, t, my_last, opp_last, rng):
+        actions = np.full(len(opp_last), C, dtype=np.int8)
+        if t == 0:
+            return actions
+
+        defection_count = state["defection_count"]
+        consecutive_cooperation = state["consecutive_cooperation"]
+        rounds_to_defect = state["rounds_to_defect"]
+
+        # Matches in a defection period
+        punishing = rounds_to_defect > 0
+        rounds_to_defect[punishing] -= 1
+        actions[punishing] = D
+
+        # The opponent cooperated
+        cooperated = ~punishing & (opp_last == C)
+        consecutive_cooperation[cooperated] += 1
+        forgiven = cooperated & (consecutive_cooperation >= 5)
+        defection_count[forgiven] = 0
+        consecutive_cooperation[forgiven] = 0
+
+        # The opponent defected
+        defected = ~punishing & (opp_last == D)
+        defection_count[defected] += 1
+        consecutive_cooperation[defected] = 0
+        rounds_to_defect[defected] = defection_count[defected]
+        actions[defected] = D
+
+        return actions
 # ------------------------------------------------------------
 class Periodic_CD(Player):
 
+    deterministic = True
+
     def __init__(self, dilemma: Dilemma, name: str = ""):
         super().__init__(dilemma,name)
-        self.movements=[C,D]
+        self.movements=(C,D)
 
     def strategy(self, opponent: Player) -> int:
-        self.iteration += 1
-        return self.movements[(self.iteration-1) % 2]
+        self.state.iteration += 1
+        return self.movements[(self.state.iteration-1) % 2]
+
+    def state_key(self, opponent):
+        return self.state.iteration % len(self.movements)
+
+    def automaton(self):
+        # State: position in the period
+        return Automaton(0, lambda phase: float(self.movements[phase] == D),
+                         lambda phase, mine, theirs: (phase + 1) % len(self.movements))
+
+    def batch_strategy(self, state, t, my_last, opp_last, rng):
+        return np.full(len(opp_last), self.movements[t % len(self.movements)], dtype=np.int8)
 # ------------------------------------------------------------
 class Periodic_DC(Player):
 
+    deterministic = True
+
     def __init__(self, dilemma: Dilemma, name: str = ""):
         super().__init__(dilemma,name)
-        self.movements=[D,C]
+        self.movements=(D,C)
 
     def strategy(self, opponent: Player) -> int:
-        self.iteration += 1
-        return self.movements[(self.iteration-1) % 2]
+        self.state.iteration += 1
+        return self.movements[(self.state.iteration-1) % 2]
+
+    def state_key(self, opponent):
+        return self.state.iteration % len(self.movements)
+
+    def automaton(self):
+        # State: position in the period
+        return Automaton(0, lambda phase: float(self.movements[phase] == D),
+                         lambda phase, mine, theirs: (phase + 1) % len(self.movements))
+
+    def batch_strategy(self, state, t, my_last, opp_last, rng):
+        return np.full(len(opp_last), self.movements[t % len(self.movements)], dtype=np.int8)
 # ------------------------------------------------------------
 class Periodic_CCD(Player):
 
+    deterministic = True
+
     def __init__(self, dilemma: Dilemma, name: str = ""):
         super().__init__(dilemma,name)
-        self.movements=[C,C,D]
+        self.movements=(C,C,D)
 
     def strategy(self, opponent: Player) -> int:
-        self.iteration += 1
-        return self.movements[(self.iteration-1) % 3]
+        self.state.iteration += 1
+        return self.movements[(self.state.iteration-1) % 3]
+
+    def state_key(self, opponent):
+        return self.state.iteration % len(self.movements)
+
+    def automaton(self):
+        # State: position in the period
+        return Automaton(0, lambda phase: float(self.movements[phase] == D),
+                         lambda phase, mine, theirs: (phase + 1) % len(self.movements))
+
+    def batch_strategy(self, state, t, my_last, opp_last, rng):
+        return np.full(len(opp_last), self.movements[t % len(self.movements)], dtype=np.int8)
 # ------------------------------------------------------------
 class Periodic_CDD(Player):
 
+    deterministic = True
+
     def __init__(self, dilemma: Dilemma, name: str = ""):
         super().__init__(dilemma,name)
-        self.movements=[C,D,D]
+        self.movements=(C,D,D)
 
     def strategy(self, opponent: Player) -> int:
-        self.iteration += 1
-        return self.movements[(self.iteration-1) % 3]
+        self.state.iteration += 1
+        return self.movements[(self.state.iteration-1) % 3]
+
+    def state_key(self, opponent):
+        return self.state.iteration % len(self.movements)
+
+    def automaton(self):
+        # State: position in the period
+        return Automaton(0, lambda phase: float(self.movements[phase] == D),
+                         lambda phase, mine, theirs: (phase + 1) % len(self.movements))
+
+    def batch_strategy(self, state, t, my_last, opp_last, rng):
+        return np.full(len(opp_last), self.movements[t % len(self.movements)], dtype=np.int8)
 # ------------------------------------------------------------
\ No newline at end of file
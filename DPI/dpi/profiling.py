@@ -0,0 +1,117 @@
+from __future__ import annotations
+
+import json
+import time
+from contextlib import contextmanager, nullcontext
+from typing import Iterator
+
+# Profiler receiving the measurements (None when profiling is disabled)
+_active: Profiler | None = None
+
+class Profiler:
+
+    def __init__(self):
+        """
+        Opt-in instrumentation of games, tournaments and evolutions. While it
+        is active ('with Profiler() as profiler:' or 'enable'), the engines
+        record wall time and number of calls:
+            - per phase: 'strategy', 'noise' and 'scoring' in every round
+         ('Game', 'BatchGame'), 'games', 'fitness' and 'selection' in every
+         generation ('Evolution')
+            - per strategy class: time spent in 'strategy' (or
+         'batch_strategy') and number of decisions
+            - per match: players, rounds and time of each scalar 'Game'
+        When no profiler is active, the engines only check a module variable
+        once per game, round or generation. Phases can be nested (e.g. the
+        games played inside 'fitness'). Games played in worker processes
+        ('n_jobs' > 1) are not recorded.
+        """
+        self.phases = {}       # phase -> [calls, seconds]
+        self.strategies = {}   # class name -> [calls, seconds]
+        self.matches = []      # one dict per scalar game
+
+    def add_phase(self, phase: str, seconds: float, calls: int = 1) -> None:
+        totals = self.phases.setdefault(phase, [0, 0.0])
+        totals[0] += calls
+        totals[1] += seconds
+
+    def add_strategy(self, name: str, seconds: float, calls: int = 1) -> None:
+        totals = self.strategies.setdefault(name, [0, 0.0])
+        totals[0] += calls
+        totals[1] += seconds
+
+    def add_match(self, record: dict) -> None:
+        self.matches.append(record)
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """Times the enclosed block as one call of phase 'name'"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_phase(name, time.perf_counter() - start)
+
+    def __enter__(self) -> Profiler:
+        enable(self)
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        disable()
+
+    def to_dict(self) -> dict:
+        """Structured dump of all the measurements"""
+        return {"phases": {name: {"calls": calls, "seconds": seconds}
+                           for name, (calls, seconds) in self.phases.items()},
+                "strategies": {name: {"calls": calls, "seconds": seconds}
+                               for name, (calls, seconds) in self.strategies.items()},
+                "matches": self.matches}
+
+    def dump(self, path: str) -> None:
+        """Writes 'to_dict' as JSON"""
+        with open(path, "w") as file:
+            json.dump(self.to_dict(), file, indent=2)
+
+    def summary(self) -> str:
+        """
+        Results:
+            - A table with the calls, total time, time per call and share of
+         the total of every phase and strategy class (slowest first)
+        """
+        lines = []
+        for title, table in (("phase", self.phases), ("strategy", self.strategies)):
+            total = sum(seconds for _, seconds in table.values()) or 1.0
+            lines.append(f"{title:<24}{'calls':>12}{'seconds':>12}"
+                         f"{'us/call':>12}{'share':>9}")
+            for name, (calls, seconds) in sorted(table.items(),
+                                                 key=lambda item: -item[1][1]):
+                lines.append(f"{name:<24}{calls:>12}{seconds:>12.4f}"
+                             f"{1e6 * seconds / max(calls, 1):>12.2f}"
+                             f"{100 * seconds / total:>8.1f}%")
+            lines.append("")
+        if self.matches:
+            seconds = sum(match["seconds"] for match in self.matches)
+            lines.append(f"{len(self.matches)} matches, {seconds:.4f} s")
+        return "\n".join(lines).rstrip()
+
+
+def active() -> Profiler | None:
+    """The profiler receiving the measurements, if any"""
+    return _active
+
+def enable(profiler: Profiler | None = None) -> Profiler:
+    """Starts recording into 'profiler' (a new one if not given)"""
+    global _active
+    _active = profiler if profiler is not None else Profiler()
+    return _active
+
+def disable() -> None:
+    """Stops recording"""
+    global _active
+    _active = None
+
+def phase(name: str):
+    """Times the enclosed block if profiling is enabled (no-op otherwise)"""
+    if _active is None:
+        return nullcontext()
+    return _active.phase(name)
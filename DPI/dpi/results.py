@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+import glob
+import json
+import os
+import numpy as np
+from typing import Iterator
+
+# Columns of a match record and their types on disk
+RECORD_FIELDS = {
+    "player_1": np.int32,     # index of the first player
+    "player_2": np.int32,     # index of the second player
+    "repetition": np.int32,
+    "seed": np.uint32,        # seed of the match
+    "score_1": np.float64,
+    "score_2": np.float64,
+    "cc": np.int64,           # rounds of each joint action
+    "cd": np.int64,
+    "dc": np.int64,
+    "dd": np.int64,
+}
+
+class ResultsWriter:
+
+    def __init__(self, path: str,
+                       batch_size: int = 100_000,
+                       metadata: dict | None = None):
+        """
+        Append-only columnar store of match records. Records are buffered and
+        written in batches, one compressed '.npz' file per batch (one array per
+        column), so memory stays constant whatever the number of matches.
+
+        Parameters:
+            - path (str): directory of the store (created if needed)
+            - batch_size (int = 100_000): records per file
+            - metadata (dict | None = None): JSON-serializable information
+         about the run (player names, settings...), stored in 'meta.json'
+        """
+        self.path = path
+        self.batch_size = batch_size
+        os.makedirs(path, exist_ok=True)
+
+        # Continue after the chunks already in the directory
+        self.n_chunks = len(glob.glob(os.path.join(path, "chunk_*.npz")))
+        self.columns = {field: [] for field in RECORD_FIELDS}
+
+        if metadata is not None:
+            with open(os.path.join(path, "meta.json"), "w") as file:
+                json.dump(metadata, file)
+
+    def write(self, record: dict) -> None:
+        """Adds a match record (a dict with all the 'RECORD_FIELDS')"""
+        for field, column in self.columns.items():
+            column.append(record[field])
+        if len(self.columns["player_1"]) >= self.batch_size:
+            self.flush()
+
+    def flush(self) -> None:
+        """Writes the buffered records to a new chunk file"""
+        if not self.columns["player_1"]:
+            return
+        arrays = {field: np.array(column, dtype=RECORD_FIELDS[field])
+                  for field, column in self.columns.items()}
+        np.savez_compressed(os.path.join(self.path, f"chunk_{self.n_chunks:06d}.npz"),
+                            **arrays)
+        self.n_chunks += 1
+        self.columns = {field: [] for field in RECORD_FIELDS}
+
+    def close(self) -> None:
+        self.flush()
+
+    def __enter__(self) -> ResultsWriter:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def iter_results(path: str) -> Iterator[dict[str, np.ndarray]]:
+    """
+    Reads a store chunk by chunk (constant memory)
+
+    Parameters:
+        - path (str): directory of the store
+
+    Results:
+        - Iterator of dicts of columns, one per chunk
+    """
+    for filename in sorted(glob.glob(os.path.join(path, "chunk_*.npz"))):
+        with np.load(filename) as chunk:
+            yield {field: chunk[field] for field in chunk.files}
+
+def load_results(path: str) -> dict[str, np.ndarray]:
+    """
+    Loads a whole store, for vectorized queries
+
+    Parameters:
+        - path (str): directory of the store
+
+    Results:
+        - A dict with one array per column of 'RECORD_FIELDS'
+    """
+    chunks = list(iter_results(path))
+    if not chunks:
+        return {field: np.zeros(0, dtype=dtype) for field, dtype in RECORD_FIELDS.items()}
+    return {field: np.concatenate([chunk[field] for chunk in chunks])
+            for field in RECORD_FIELDS}
+
+def load_metadata(path: str) -> dict:
+    """Metadata of a store (empty if it has none)"""
+    filename = os.path.join(path, "meta.json")
+    if not os.path.exists(filename):
+        return {}
+    with open(filename) as file:
+        return json.load(file)
@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+import numpy as np
+from statistics import NormalDist
+
+def z_score(confidence: float) -> float:
+    """Number of standard deviations of a two-sided normal interval with the
+    given confidence level"""
+    return NormalDist().inv_cdf((1 + confidence) / 2)
+
+class RunningStats:
+
+    def __init__(self, shape: tuple[int, ...]):
+        """
+        Running mean and variance of many independent samples at once (e.g.
+        the score of both players of every pairing of a tournament). Uses
+        Welford's update (merged batch by batch, as in Chan et al.), which
+        stays accurate when the means are large compared with the spread,
+        e.g. scores of games of thousands of rounds.
+
+        Parameters:
+            - shape (tuple[int, ...]): shape of the array of statistics
+        """
+        self.count = np.zeros(shape[0], dtype=np.int64)
+        self._mean = np.zeros(shape)
+        self._m2 = np.zeros(shape)   # sum of squared deviations from the mean
+
+    def update(self, idx: np.ndarray, values: np.ndarray) -> None:
+        """
+        Adds one sample to each of the rows 'idx' (a row can appear several
+        times)
+
+        Parameters:
+            - idx (np.ndarray): rows that receive a new sample
+            - values (np.ndarray): the new samples (one per row of 'idx')
+        """
+        idx = np.asarray(idx)
+        values = np.asarray(values, dtype=float)
+        if len(idx) == 0:
+            return
+
+        # Statistics of the new samples of each row
+        rows, inverse, batch_count = np.unique(idx, return_inverse=True, return_counts=True)
+        shape = (-1,) + (1,) * (values.ndim - 1)
+        batch_mean = np.zeros((len(rows),) + values.shape[1:])
+        np.add.at(batch_mean, inverse, values)
+        batch_mean /= batch_count.reshape(shape)
+        batch_m2 = np.zeros_like(batch_mean)
+        np.add.at(batch_m2, inverse, (values - batch_mean[inverse]) ** 2)
+
+        # Merged with the previous ones
+        count = self.count[rows].reshape(shape)
+        total = count + batch_count.reshape(shape)
+        delta = batch_mean - self._mean[rows]
+        self._mean[rows] += delta * batch_count.reshape(shape) / total
+        self._m2[rows] += batch_m2 + delta ** 2 * count * batch_count.reshape(shape) / total
+        self.count[rows] += batch_count
+
+    def mean(self) -> np.ndarray:
+        """Mean of each row (0 if it has no samples)"""
+        return self._mean.copy()
+
+    def variance(self) -> np.ndarray:
+        """Unbiased variance of each row (inf if it has less than 2 samples)"""
+        count = self._count()
+        return np.divide(self._m2, count - 1, out=np.full_like(self._m2, np.inf),
+                         where=count > 1)
+
+    def mean_variance(self) -> np.ndarray:
+        """Variance of the mean of each row (variance / count)"""
+        return self.variance() / np.maximum(self._count(), 1)
+
+    def half_width(self, confidence: float = 0.95) -> np.ndarray:
+        """Half width of the normal confidence interval of each mean"""
+        return z_score(confidence) * np.sqrt(self.mean_variance())
+
+    def _count(self) -> np.ndarray:
+        """'count' broadcastable against the statistics"""
+        return self.count.reshape((-1,) + (1,) * (self._mean.ndim - 1))
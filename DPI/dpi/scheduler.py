@@ -0,0 +1,331 @@
+from __future__ import annotations
+
+import collections
+import copy
+import itertools
+import multiprocessing
+import os
+import queue
+import random
+import threading
+import time
+import numpy as np
+from multiprocessing.connection import Client, Connection, Listener, wait
+from .player import Player
+from .parallel import check_shareable, init_worker, play_matches
+
+# Tasks sent to a worker before it returns the first one, so it never waits
+# for the coordinator
+PREFETCH = 2
+
+# Errors of a connection whose worker is gone
+LOST_WORKER = (EOFError, OSError)
+
+def strategy_costs(players: tuple[Player, ...],
+                   probe_rounds: int = 50) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Measures how expensive each strategy is, by playing a short game of each
+    player against itself. The state of 'random' is restored afterwards, so
+    the probes do not change later unseeded results. Players that learn
+    ('cacheable = False') play their probes with copies, so their models do
+    not change either.
+
+    Parameters:
+        - players (tuple[Player, ...]): players of the tournament
+        - probe_rounds (int = 50): rounds of each probe game
+
+    Results:
+        - A tuple of two arrays: the seconds needed to create the player of a
+     match ('Player.fork') and the seconds per move of each strategy
+    """
+    setup = np.zeros(len(players))
+    step = np.zeros(len(players))
+    state = random.getstate()
+    try:
+        for k, player in enumerate(players):
+            start = time.perf_counter()
+            if player.cacheable:
+                player_1, player_2 = player.fork(), player.fork()
+            else:
+                player_1, player_2 = copy.deepcopy(player), copy.deepcopy(player)
+            setup[k] = (time.perf_counter() - start) / 2
+
+            start = time.perf_counter()
+            for _ in range(probe_rounds):
+                action_1 = player_1.strategy(player_2)
+                action_2 = player_2.strategy(player_1)
+                player_1.history.append(action_1)
+                player_2.history.append(action_2)
+            step[k] = (time.perf_counter() - start) / (2 * probe_rounds)
+    finally:
+        random.setstate(state)
+    return setup, step
+
+def plan_tasks(match_costs: np.ndarray,
+               repetitions: int,
+               n_tasks: int) -> list[tuple[float, list[tuple[int, int, int]]]]:
+    """
+    Splits the matches of a tournament into tasks of similar cost, sorted
+    from the most to the least expensive (longest processing time first):
+    expensive pairings are split by repetitions and cheap ones are packed
+    together.
+
+    Parameters:
+        - match_costs (np.ndarray): (n, n) estimated seconds of a match
+     between the players i and j
+        - repetitions (int): matches of each pairing
+        - n_tasks (int): approximate number of tasks
+
+    Results:
+        - List of (estimated cost, matches), where each match is (i, j,
+     repetition)
+    """
+    n = len(match_costs)
+    pairs = sorted(itertools.combinations(range(n), 2),
+                   key=lambda pair: match_costs[pair], reverse=True)
+    total = sum(match_costs[pair] for pair in pairs) * repetitions
+    target = total / max(1, n_tasks)
+
+    tasks = []
+    cost, matches = 0.0, []
+    for i, j in pairs:
+        for repetition in range(repetitions):
+            matches.append((i, j, repetition))
+            cost += match_costs[i, j]
+            if cost >= target:
+                tasks.append((cost, matches))
+                cost, matches = 0.0, []
+    if matches:
+        tasks.append((cost, matches))
+    tasks.sort(key=lambda task: task[0], reverse=True)
+    return tasks
+
+def summarize(matches: list[tuple[int, int, int]],
+              results: np.ndarray) -> dict[tuple[int, int], np.ndarray]:
+    """Partial ranking of a task: the results of each pairing, summed"""
+    partial = {}
+    for (i, j, _), row in zip(matches, results):
+        if (i, j) in partial:
+            partial[(i, j)] += row
+        else:
+            partial[(i, j)] = row.copy()
+    return partial
+
+def run_worker(address: tuple[str, int] | str, authkey: bytes,
+               retry: float = 30.0) -> None:
+    """
+    Worker of a 'Scheduler': connects to the coordinator at 'address',
+    receives the tournament once and then plays the tasks it is sent, until
+    it receives None. Each task is answered with its partial ranking.
+
+    Parameters:
+        - address (tuple[str, int] | str): address of the coordinator
+        - authkey (bytes): shared secret of the coordinator and its workers
+        - retry (float = 30.0): seconds during which the connection is
+     retried, so workers can be started before the coordinator
+    """
+    deadline = time.monotonic() + retry
+    while True:
+        try:
+            connection = Client(address, authkey=authkey)
+            break
+        except ConnectionRefusedError:
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.5)
+
+    with connection:
+        try:
+            players, n_rounds, error, seed = connection.recv()
+        except EOFError:
+            return  # the tournament ended before this worker was needed
+        init_worker(players, n_rounds, error)
+        while True:
+            task = connection.recv()
+            if task is None:
+                break
+            task_id, matches = task
+            connection.send((task_id, summarize(matches, play_matches(matches, seed))))
+
+class Scheduler:
+
+    def __init__(self, players: tuple[Player, ...],
+                       n_rounds: int = 100,
+                       error: float = 0.0,
+                       repetitions: int = 1,
+                       seed: int | None = None,
+                       n_workers: int = 1,
+                       remote_workers: int = 0,
+                       address: tuple[str, int] = ("127.0.0.1", 0),
+                       authkey: bytes | None = None,
+                       tasks_per_worker: int = 8):
+        """
+        Cost-aware scheduler of the matches of a tournament. The cost of each
+        pairing is estimated from the measured cost of each strategy
+        ('strategy_costs'), the matches are split into tasks of similar cost
+        ('plan_tasks') and the tasks are handed out from a shared queue, the
+        most expensive first, to whichever worker is free: a worker busy with
+        a slow pairing never holds work that another one could do.
+
+        The workers are processes connected to this one by a socket
+        ('multiprocessing.connection'), and send back the partial ranking of
+        each task, which are merged here. 'n_workers' of them are started on
+        this machine, and 'remote_workers' more are expected to connect from
+        elsewhere ('python -m dpi worker'). The tasks of a worker that
+        disconnects are given to the others. Every match has its own seed
+        ('parallel.match_seed'), so the results do not depend on the workers.
+
+        Parameters:
+            - players (tuple[Player, ...]): players of the tournament
+            - n_rounds (int = 100): number of rounds in each game
+            - error (float = 0.0): error probability (in base 1)
+            - repetitions (int = 1): matches of each pairing
+            - seed (int | None = None): master seed (a random one if not
+         given)
+            - n_workers (int = 1): worker processes started on this machine
+            - remote_workers (int = 0): workers expected from other machines
+            - address (tuple[str, int] = ("127.0.0.1", 0)): address where
+         the workers connect (port 0 picks a free one)
+            - authkey (bytes | None = None): shared secret of the workers.
+         Required with remote workers (a random one is used otherwise)
+            - tasks_per_worker (int = 8): tasks per worker in the plan. More
+         tasks balance better, fewer send less messages.
+        """
+
+        assert n_workers + remote_workers > 0, "there should be at least one worker"
+        assert remote_workers == 0 or authkey is not None, \
+            "remote workers need an 'authkey'"
+        check_shareable(players)
+
+        self.players = players
+        self.n_rounds = n_rounds
+        self.error = error
+        self.repetitions = repetitions
+        self.seed = (seed if seed is not None
+                     else int(np.random.SeedSequence().generate_state(1)[0]))
+        self.n_workers = n_workers
+        self.remote_workers = remote_workers
+        self.address = address
+        self.authkey = authkey if authkey is not None else os.urandom(32)
+        self.tasks_per_worker = tasks_per_worker
+
+        n = len(players)
+        self.totals = np.zeros(n)   # points of each player
+        self.outcomes = np.zeros((n, n, 2, 2), dtype=np.int64)  # rounds of
+                                    # each joint action of every pairing,
+                                    # from the point of view of the first one
+        self.worker_tasks = collections.Counter()  # tasks done by each worker
+
+    def match_costs(self) -> np.ndarray:
+        """Estimated seconds of a match between every two players"""
+        setup, step = strategy_costs(self.players)
+        match_step = setup + self.n_rounds * step
+        return match_step[:, None] + match_step[None, :]
+
+    def plan(self) -> list[tuple[float, list[tuple[int, int, int]]]]:
+        """Tasks of the tournament (see 'plan_tasks')"""
+        n_tasks = self.tasks_per_worker * (self.n_workers + self.remote_workers)
+        return plan_tasks(self.match_costs(), self.repetitions, n_tasks)
+
+    def merge(self, partial: dict[tuple[int, int], np.ndarray]) -> None:
+        """Adds the partial ranking of a task"""
+        for (i, j), row in partial.items():
+            self.totals[i] += row[0]
+            self.totals[j] += row[1]
+            outcomes = row[2:].astype(np.int64).reshape(2, 2)
+            self.outcomes[i, j] += outcomes
+            self.outcomes[j, i] += outcomes.T
+
+    def play(self) -> np.ndarray:
+        """
+        Main call of the class. Plays every match with the workers.
+
+        Results:
+            - Array with the points of each player. The outcomes of every
+         pairing are stored in 'self.outcomes'.
+        """
+        tasks = [matches for _, matches in self.plan()]
+        pending = collections.deque(range(len(tasks)))
+        in_flight = {}      # connection -> ids of the tasks sent to it
+        n_done = 0
+
+        listener = Listener(self.address, authkey=self.authkey)
+        connections = queue.Queue()
+        n_expected = self.n_workers + self.remote_workers
+
+        def accept():
+            for _ in range(n_expected):
+                try:
+                    connections.put(listener.accept())
+                except OSError:
+                    return
+
+        threading.Thread(target=accept, daemon=True).start()
+        processes = [multiprocessing.Process(target=run_worker,
+                                             args=(listener.address, self.authkey),
+                                             daemon=True)
+                     for _ in range(self.n_workers)]
+        for process in processes:
+            process.start()
+
+        def drop(connection: Connection) -> None:
+            """Lost worker: its tasks go back to the front of the queue"""
+            pending.extendleft(reversed(in_flight.pop(connection)))
+            connection.close()
+
+        def send_tasks(connection: Connection, n_tasks: int) -> None:
+            for _ in range(min(n_tasks, len(pending))):
+                task_id = pending.popleft()
+                in_flight[connection].append(task_id)
+                try:
+                    connection.send((task_id, tasks[task_id]))
+                except LOST_WORKER:
+                    drop(connection)
+                    return
+
+        try:
+            while n_done < len(tasks):
+                while not connections.empty():
+                    connection = connections.get()
+                    try:
+                        connection.send((self.players, self.n_rounds, self.error, self.seed))
+                    except LOST_WORKER:
+                        connection.close()
+                        continue
+                    in_flight[connection] = []
+                    send_tasks(connection, PREFETCH)
+
+                if not in_flight and self.remote_workers == 0 \
+                        and not any(process.is_alive() for process in processes):
+                    raise RuntimeError("every worker has stopped")
+
+                for connection in wait(list(in_flight), timeout=0.1):
+                    try:
+                        task_id, partial = connection.recv()
+                    except LOST_WORKER:
+                        drop(connection)
+                        continue
+                    in_flight[connection].remove(task_id)
+                    self.merge(partial)
+                    self.worker_tasks[id(connection)] += 1
+                    n_done += 1
+                    send_tasks(connection, 1)
+
+                # Workers that connected after the queue had been given out
+                for connection, task_ids in list(in_flight.items()):
+                    if not task_ids:
+                        send_tasks(connection, 1)
+        finally:
+            while not connections.empty():
+                connections.get().close()
+            for connection in in_flight:
+                try:
+                    connection.send(None)
+                    connection.close()
+                except OSError:
+                    pass
+            listener.close()
+            for process in processes:
+                process.join(timeout=5)
+
+        return self.totals
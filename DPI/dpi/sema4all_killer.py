@@ -1,8 +1,10 @@
 from __future__ import annotations
 
 import random
-from player import Player
-from dilemma import Dilemma, C, D
+import numpy as np
+from .player import Player
+from .dilemma import Dilemma, C, D
+from .markov import Automaton
 
 class Sema4All_Killer(Player):
 
@@ -18,8 +20,8 @@ class Sema4All_Killer(Player):
         if it cooperates or defects, giving more weight to defect (60%).
         - It is based on the strategy called: ADAPTIVE PAVLOV
         """
-        if self.iteration < 2:
-            self.iteration += 1 
+        if self.state.iteration < 2:
+            self.state.iteration += 1 
             return self.first_movement
         
         if random.randint(0, 100) < 1:
@@ -28,9 +30,36 @@ class Sema4All_Killer(Player):
             else:
                 return C
         
-        if self.history[-1] == opponent.history[-1]:
-            return self.history[-1]
+        if self.state.history[-1] == opponent.state.history[-1]:
+            return self.state.history[-1]
         else:
-            self.history[-1] = 1 - self.history[-1]
-            return self.history[-1]
+            return 1 - self.state.history[-1]
+
+    def batch_strategy(self, state, t, my_last, opp_last, rng):
+        n = len(opp_last)
+        if t < 2:
+            return np.full(n, self.first_movement, dtype=np.int8)
+
+        # Same probabilities as 'strategy': 1/101 of random moves, 60% of
+        # them defections
+        random_move = rng.integers(0, 101, n) < 1
+        random_action = np.where(rng.random(n) > 0.4, D, C)
+        # Stay if both played the same, shift otherwise
+        pavlov = np.where(my_last == opp_last, my_last, 1 - my_last)
+        return np.where(random_move, random_action, pavlov).astype(np.int8)
+
+    def automaton(self):
+        # State: 0 and 1 for the first two rounds, then the last joint action
+        # (own action, opponent's action)
+        def defect_probability(state):
+            if state in (0, 1):
+                return float(self.first_movement == D)
+            mine, theirs = state
+            pavlov = mine if mine == theirs else 1 - mine
+            return (1 / 101) * 0.6 + (100 / 101) * pavlov
+
+        def transition(state, mine, theirs):
+            return 1 if state == 0 else (mine, theirs)
+
+        return Automaton(0, defect_probability, transition)
 # -----------------------------------------------------------------  
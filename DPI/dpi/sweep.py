@@ -0,0 +1,309 @@
+from __future__ import annotations
+
+import copy
+import csv
+import itertools
+import random
+import numpy as np
+from typing import Sequence
+from . import profiling
+from .player import Player
+from .game import Game
+from .batch_game import BatchGame
+from .parallel import match_seed
+from .evolution import Evolution
+
+# Pairings played together in a work unit
+UNIT_PAIRS = 64
+
+def prefix_outcomes(history_1: np.ndarray, history_2: np.ndarray,
+                    checkpoints: np.ndarray) -> np.ndarray:
+    """
+    Outcome counts of the first rounds of some games
+
+    Parameters:
+        - history_1 (np.ndarray): (m, n_rounds) actions of the first players
+        - history_2 (np.ndarray): (m, n_rounds) actions of the second players
+        - checkpoints (np.ndarray): increasing numbers of rounds
+
+    Results:
+        - Array (m, len(checkpoints), 4) with the number of CC, CD, DC and DD
+     rounds among the first 'checkpoints[k]' rounds of each game
+    """
+    codes = 2 * history_1.astype(np.int64) + history_2
+    segments = np.zeros((len(codes), len(checkpoints), 4), dtype=np.int64)
+    start = 0
+    for k, end in enumerate(checkpoints):
+        segment = codes[:, start:end]
+        for code in range(4):
+            segments[:, k, code] = (segment == code).sum(axis=1)
+        start = end
+    return segments.cumsum(axis=1)
+
+def play_unit(players: tuple[Player, ...],
+              pairs: list[tuple[int, int]],
+              games: list[int],
+              checkpoints: np.ndarray,
+              error: float,
+              seed: int) -> np.ndarray:
+    """
+    Plays the games of some pairings once, for the longest number of rounds,
+    and keeps the outcome counts at every checkpoint: the first rounds of a
+    game are the same game with fewer rounds (the strategies do not know the
+    length, and the random draws of a round do not depend on it). The batched
+    games only keep their outcome counts at the checkpoints
+    ('BatchGame(checkpoints=...)'), never the histories.
+
+    Parameters:
+        - players (tuple[Player, ...]): players of the sweep
+        - pairs (list[tuple[int, int]]): (i, j) of each pairing
+        - games (list[int]): number of games of each pairing
+        - checkpoints (np.ndarray): increasing numbers of rounds
+        - error (float): error probability (in base 1)
+        - seed (int): seed of the unit
+
+    Results:
+        - Array (len(pairs), max(games), len(checkpoints), 4) with the
+     outcome counts of every game (zeros beyond the games of a pairing)
+    """
+    n_rounds = int(checkpoints[-1])
+    # Learning players start every unit from their initial model
+    players = [player if player.cacheable else copy.deepcopy(player) for player in players]
+    matches = [(k, i, j, repetition) for k, (i, j) in enumerate(pairs)
+               for repetition in range(games[k])]
+    result = np.zeros((len(pairs), max(games), len(checkpoints), 4), dtype=np.int64)
+    index = tuple(np.array([match[m] for match in matches]) for m in (0, 3))
+
+    players_1 = [players[i] for _, i, _, _ in matches]
+    players_2 = [players[j] for _, _, j, _ in matches]
+    if BatchGame.supports(players_1 + players_2):
+        game = BatchGame(players_1, players_2, n_rounds, error,
+                         rng=np.random.default_rng(seed), checkpoints=checkpoints)
+        game.play()
+        result[index] = game.checkpoint_outcomes.reshape(len(matches), len(checkpoints), 4)
+        return result
+
+    state = random.getstate()
+    try:
+        for k, i, j, repetition in matches:
+            random.seed(match_seed(seed, i, j, repetition))
+            game = Game(players[i].fork(), players[j].fork(), n_rounds, error)
+            game.play()
+            if game.simulated_rounds == n_rounds:
+                result[k, repetition] = prefix_outcomes(
+                    np.array([game.player_1.history[:]]),
+                    np.array([game.player_2.history[:]]), checkpoints)[0]
+                continue
+            # A cycle was extrapolated (noise-free and deterministic): the
+            # shorter games are solved the same way
+            for c, rounds in enumerate(checkpoints):
+                game = Game(players[i].fork(), players[j].fork(),
+                            int(rounds), error)
+                game.play()
+                result[k, repetition, c] = game.outcomes.ravel()
+    finally:
+        random.setstate(state)
+    return result
+
+class Sweep:
+
+    def __init__(self, players: tuple[Player, ...],
+                       errors: Sequence[float] = (0.0,),
+                       rounds: Sequence[int] = (100,),
+                       repetitions: Sequence[int] = (2,),
+                       rosters: Sequence[Sequence[int | str]] | None = None,
+                       seed: int | None = None,
+                       n_jobs: int = 1):
+        """
+        Tournaments (and evolutions) over a grid of 'error', 'n_rounds',
+        'repetitions' and rosters, sharing the work between grid points:
+            - every pairing is played once for all the rosters that include
+         both players
+            - each game is played once, for the largest number of rounds, and
+         its first rounds give the games with fewer rounds
+            - the games of the largest number of repetitions give the smaller
+         ones (their first games)
+            - noise-free games between deterministic strategies are played
+         once, whatever the number of repetitions
+        The remaining games are split into work units (one error and up to
+        'UNIT_PAIRS' pairings, played with 'BatchGame' when possible) that
+        run in 'n_jobs' processes. The results are tidy tables: one row per
+        grid point and player.
+
+        Parameters:
+            - players (tuple[Player, ...]): every strategy of the sweep
+            - errors (Sequence[float] = (0.0,)): error probabilities
+            - rounds (Sequence[int] = (100,)): numbers of rounds of the games
+            - repetitions (Sequence[int] = (2,)): games of each pairing
+            - rosters (Sequence[Sequence[int | str]] | None = None): subsets
+         of 'players' (indices or names) that play a tournament. All the
+         players if not given.
+            - seed (int | None = None): master seed (each unit gets its own
+         stream, so the results do not depend on 'n_jobs')
+            - n_jobs (int = 1): number of worker processes
+        """
+
+        assert min(rounds) > 0, "'rounds' should be greater than 0"
+        assert min(repetitions) > 0, "'repetitions' should be greater than 0"
+
+        self.players = players
+        self.errors = sorted(set(errors))
+        self.rounds = sorted(set(rounds))
+        self.repetitions = sorted(set(repetitions))
+        names = [player.name for player in players]
+        rosters = [range(len(players))] if rosters is None else rosters
+        self.rosters = [tuple(sorted(names.index(member) if isinstance(member, str)
+                                     else member for member in roster))
+                        for roster in rosters]
+        self.seed = (seed if seed is not None
+                     else int(np.random.SeedSequence().generate_state(1)[0]))
+        self.n_jobs = n_jobs
+
+        # Pairings of some roster, with the self-pairings used by 'evolve'
+        members = sorted(set(itertools.chain.from_iterable(self.rosters)))
+        self.pairs = [(i, j) for i in members for j in members if i <= j]
+        self.pair_index = {pair: k for k, pair in enumerate(self.pairs)}
+
+        # error -> outcome counts (n_pairs, games, checkpoints, 4), filled by
+        # 'compute'
+        self.outcomes = {}
+
+    def is_deterministic(self, i: int, j: int, error: float) -> bool:
+        """True if every game between 'i' and 'j' has the same result"""
+        return error == 0 and self.players[i].deterministic and self.players[j].deterministic
+
+    def units(self) -> list[tuple]:
+        """Arguments of 'play_unit' for every work unit"""
+        checkpoints = np.array(self.rounds)
+        units = []
+        for e, error in enumerate(self.errors):
+            for c, start in enumerate(range(0, len(self.pairs), UNIT_PAIRS)):
+                pairs = self.pairs[start:start + UNIT_PAIRS]
+                games = [1 if self.is_deterministic(i, j, error) else self.repetitions[-1]
+                         for i, j in pairs]
+                seed = int(np.random.SeedSequence([self.seed, e, c]).generate_state(1)[0])
+                units.append((self.players, pairs, games, checkpoints, error, seed))
+        return units
+
+    def compute(self) -> None:
+        """Plays every work unit (once: later calls do nothing)"""
+        if self.outcomes:
+            return
+        units = self.units()
+        with profiling.phase("games"):
+            if self.n_jobs == 1:
+                results = [play_unit(*unit) for unit in units]
+            else:
+                from concurrent.futures import ProcessPoolExecutor
+                with ProcessPoolExecutor(self.n_jobs) as pool:
+                    results = list(pool.map(play_unit, *zip(*units)))
+
+        n_games = self.repetitions[-1]
+        for error in self.errors:
+            self.outcomes[error] = np.zeros((len(self.pairs), n_games, len(self.rounds), 4),
+                                            dtype=np.int64)
+        for (_, pairs, _, _, error, _), result in zip(units, results):
+            start = self.pair_index[pairs[0]]
+            self.outcomes[error][start:start + len(pairs), :result.shape[1]] = result
+
+    def pair_points(self, error: float) -> np.ndarray:
+        """
+        Points of both players of every pairing
+
+        Results:
+            - Array (n_pairs, len(repetitions), len(rounds), 2) with the
+         points of both players in the first 'repetitions[r]' games of
+         'rounds[c]' rounds
+        """
+        self.compute()
+        payoffs = self.players[0].dilemma.payoffs.reshape(2, 4)
+        points = self.outcomes[error] @ payoffs.T   # (n_pairs, games, checkpoints, 2)
+        cumulative = points.cumsum(axis=1)
+        result = cumulative[:, [r - 1 for r in self.repetitions]]
+
+        # Deterministic pairings played a single game
+        for k, (i, j) in enumerate(self.pairs):
+            if self.is_deterministic(i, j, error):
+                result[k] = np.array(self.repetitions)[:, None, None] * points[k, 0]
+        return result
+
+    def grid(self) -> list[tuple[float, int, int, int]]:
+        """Every (error, n_rounds, repetitions, roster) of the sweep"""
+        return list(itertools.product(self.errors, self.rounds, self.repetitions,
+                                      range(len(self.rosters))))
+
+    def play(self) -> np.ndarray:
+        """
+        Main call of the class. Plays the tournament of every grid point.
+
+        Results:
+            - Structured array with one row per grid point and player of its
+         roster, with the fields 'error', 'n_rounds', 'repetitions', 'roster'
+         (index in 'self.rosters'), 'player' (name), 'points' and 'rank' (1
+         is the winner)
+        """
+        rows = []
+        points_by_error = {error: self.pair_points(error) for error in self.errors}
+        for error, n_rounds, repetitions, roster in self.grid():
+            points = points_by_error[error][:, self.repetitions.index(repetitions),
+                                            self.rounds.index(n_rounds)]
+            totals = {i: 0.0 for i in self.rosters[roster]}
+            for i, j in itertools.combinations(self.rosters[roster], 2):
+                k = self.pair_index[(i, j)]
+                totals[i] += points[k, 0].item()
+                totals[j] += points[k, 1].item()
+            ranking = sorted(totals.items(), key=lambda item: item[1], reverse=True)
+            for rank, (i, total) in enumerate(ranking, start=1):
+                rows.append((error, n_rounds, repetitions, roster,
+                             self.players[i].name, total, rank))
+        return self._table(rows, ("points", "f8"), ("rank", "i8"))
+
+    def evolve(self, generations: int = 100,
+                     reproductivity: float = 0.05,
+                     initial_population: tuple[int, ...] | int = 100,
+                     dynamics: str = "selection",
+                     selection: float = 1.0) -> np.ndarray:
+        """
+        Runs an 'Evolution' for every grid point. Their expected scores
+        between strategies ('PayoffMatrix') are the mean scores of the first
+        'repetitions' games of the sweep, so the evolutions play no game.
+
+        Parameters:
+            - the evolution settings, as in 'Evolution'
+
+        Results:
+            - Structured array with one row per grid point and player of its
+         roster, with the fields of 'play' but 'count' (individuals in the
+         last generation) instead of 'points' and 'rank'
+        """
+        rows = []
+        points_by_error = {error: self.pair_points(error) for error in self.errors}
+        for error, n_rounds, repetitions, roster in self.grid():
+            members = self.rosters[roster]
+            scores = points_by_error[error][:, self.repetitions.index(repetitions),
+                                            self.rounds.index(n_rounds)] / repetitions
+            evolution = Evolution(tuple(self.players[i] for i in members), n_rounds,
+                                  error, repetitions, generations, reproductivity,
+                                  initial_population, seed=self.seed,
+                                  dynamics=dynamics, selection=selection)
+            for a, b in itertools.combinations_with_replacement(range(len(members)), 2):
+                evolution.payoffs.set(a, b, scores[self.pair_index[(members[a], members[b])]])
+            evolution.play(plot=False)
+            for i, values in zip(members, evolution.count_evolution.values()):
+                rows.append((error, n_rounds, repetitions, roster,
+                             self.players[i].name, values[-1]))
+        # Only the replicator dynamics give fractional counts
+        return self._table(rows, ("count", "f8" if dynamics == "replicator" else "i8"))
+
+    def _table(self, rows: list[tuple], *fields: tuple[str, str]) -> np.ndarray:
+        name_size = max(len(player.name) for player in self.players)
+        dtype = [("error", "f8"), ("n_rounds", "i8"), ("repetitions", "i8"),
+                 ("roster", "i8"), ("player", f"U{max(1, name_size)}"), *fields]
+        return np.array(rows, dtype=dtype)
+
+def write_csv(table: np.ndarray, path: str) -> None:
+    """Writes a table of 'Sweep' (or any structured array) as CSV"""
+    with open(path, "w", newline="") as file:
+        writer = csv.writer(file)
+        writer.writerow(table.dtype.names)
+        writer.writerows(row.tolist() for row in table)
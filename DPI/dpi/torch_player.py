@@ -0,0 +1,135 @@
+from __future__ import annotations
+
+import numpy as np
+import torch
+import torch.nn as nn
+from abc import abstractmethod
+from .dilemma import Dilemma, C
+from .player import Player
+
+class TorchPlayer(Player):
+
+    # Number of previous moves of the opponent read by the model
+    window = 4
+
+    # The model changes with every game
+    cacheable = False
+
+    def __init__(self, dilemma: Dilemma, name: str = "", batch_size: int = 32):
+        """
+        Base of the players that predict the next move of the opponent with a
+        torch model fed with its last 'window' moves, and defect if it
+        predicts a defection (they cooperate until 'window' moves are known).
+        The model keeps learning while playing: every new move of the
+        opponent is a training sample, and the samples are gathered into
+        mini-batches of 'batch_size' before each optimizer step.
+
+        'BatchGame' groups all the games of the same player object, so each
+        round of a tournament makes a single forward pass (without gradients)
+        for all of them, and their samples fill the mini-batches together.
+        On every path the model carries its learning from match to match
+        ('fork' returns the player itself), so the matches of a player are
+        played in this process, never split among workers.
+
+        Parameters:
+            - dilemma (Dilemma): the dilemma that this player will play
+            - name (str): the name of the strategy
+            - batch_size (int = 32): training samples per optimizer step
+        """
+        super().__init__(dilemma, name)
+        self.batch_size = batch_size
+        self.model = self.build_model()
+        self.optimizer = self.build_optimizer()
+        self.criterion = nn.BCELoss()
+
+        self._inputs = []   # training samples not used yet
+        self._targets = []
+        self._pending = 0
+
+    @abstractmethod
+    def build_model(self) -> nn.Module:
+        """Model giving the probability of a defection of the opponent"""
+
+    @abstractmethod
+    def build_optimizer(self) -> torch.optim.Optimizer:
+        """Optimizer of the parameters of 'self.model'"""
+
+    def model_inputs(self, windows: torch.Tensor) -> torch.Tensor:
+        """Input of the model from a (n, window) batch of opponent moves"""
+        return windows
+
+    def predict(self, windows: np.ndarray) -> np.ndarray:
+        """
+        Moves of this player for a batch of games
+
+        Parameters:
+            - windows (np.ndarray): float32 array (n, window) with the last
+         moves of the opponent in each game
+
+        Results:
+            - An int8 array with the action (C=0 or D=1) of each game
+        """
+        with torch.no_grad():
+            probabilities = self.model(self.model_inputs(torch.from_numpy(windows)))
+        return (probabilities.reshape(-1) > 0.5).numpy().astype(np.int8)
+
+    def learn(self, windows: np.ndarray, targets: np.ndarray) -> None:
+        """
+        Adds training samples (the moves of the opponent in 'windows' followed
+        by 'targets') and trains on every complete mini-batch
+        """
+        self._inputs.append(windows)
+        self._targets.append(targets)
+        self._pending += len(windows)
+        if self._pending < self.batch_size:
+            return
+
+        inputs = np.concatenate(self._inputs)
+        targets = np.concatenate(self._targets)
+        n_used = len(inputs) - len(inputs) % self.batch_size
+        for start in range(0, n_used, self.batch_size):
+            batch = slice(start, start + self.batch_size)
+            output = self.model(self.model_inputs(torch.from_numpy(inputs[batch])))
+            loss = self.criterion(output, torch.from_numpy(targets[batch]).unsqueeze(1))
+            self.optimizer.zero_grad()
+            loss.backward()
+            self.optimizer.step()
+
+        self._inputs = [inputs[n_used:]]
+        self._targets = [targets[n_used:]]
+        self._pending = len(inputs) - n_used
+
+    def strategy(self, opponent: Player) -> int:
+        """Defects if the model predicts a defection of the opponent"""
+        n_moves = len(opponent.history)
+        if n_moves > self.window:
+            recent = np.array(opponent.history.last(self.window + 1), dtype=np.float32)
+            self.learn(recent[None, :-1], recent[-1:])
+        if n_moves < self.window:
+            return C
+        window = np.array(opponent.history.last(self.window), dtype=np.float32)
+        return int(self.predict(window[None])[0])
+
+    def fork(self):
+        # The model keeps learning from match to match, so every match plays
+        # with this same object (its matches cannot run in other processes)
+        self.reset()
+        return self
+
+    def batch_group(self):
+        # Each player object has its own model
+        return self
+
+    def batch_init(self, players):
+        return {"window": np.zeros((len(players), self.window), dtype=np.float32)}
+
+    def batch_strategy(self, state, t, my_last, opp_last, rng):
+        window = state["window"]
+        if t > 0:
+            if t > self.window:
+                self.learn(window.copy(), opp_last.astype(np.float32))
+            window[:, :-1] = window[:, 1:]
+            window[:, -1] = opp_last
+        if t < self.window:
+            return np.full(len(opp_last), C, dtype=np.int8)
+        return self.predict(window)
@@ -1,20 +1,74 @@
 from __future__ import annotations
 
 import itertools
-import matplotlib.pyplot as plt
-from game import Game
-from player import Player
-from dilemma import Dilemma
-from player import Player, Cooperator, Defector, Tft, Grudger, Detective4MovsTft, Destructomatic
-from player import Periodic_CD, Periodic_DC, Periodic_CCD, Periodic_CDD
-from sema4all_killer import Sema4All_Killer
+import numpy as np
+from typing import Iterator, Sequence
+from .game import Game
+from . import cache as match_cache
+from .batch_game import BatchGame, round_robin_scores, play_records
+from .running_stats import RunningStats, z_score
+from .markov import MarkovGame
+from .parallel import iter_seeded, match_seed, seeded_rng
+from .results import ResultsWriter
+from .scheduler import Scheduler
+from .player import Player
+from .dilemma import Dilemma
+
+def payoff_tensor(payoffs: Sequence[Dilemma] | np.ndarray) -> np.ndarray:
+    """
+    Payoffs of several 2x2 dilemmas as an array (k, 2, 2, 2) like
+    'Dilemma.payoffs': from a sequence of dilemmas, from their 'payoffs', or
+    from rows of symmetric (cc, cd, dc, dd)
+    """
+    if len(payoffs) > 0 and isinstance(payoffs[0], Dilemma):
+        return np.stack([dilemma.payoffs for dilemma in payoffs])
+    payoffs = np.asarray(payoffs, dtype=float)
+    if payoffs.ndim == 2:
+        assert payoffs.shape[1] == 4, "rows should be (cc, cd, dc, dd)"
+        matrix = payoffs.reshape(-1, 2, 2)
+        return np.stack([matrix, matrix.transpose(0, 2, 1)], axis=1)
+    assert payoffs.shape[1:] == (2, 2, 2), "payoffs should have shape (k, 2, 2, 2)"
+    return payoffs
+
+def rescore_outcomes(outcomes: np.ndarray,
+                     payoffs: Sequence[Dilemma] | np.ndarray) -> np.ndarray:
+    """
+    Points of every player under every dilemma, from the outcome counts of a
+    tournament, with a single matrix product
+
+    Parameters:
+        - outcomes (np.ndarray): (n, n, 2, 2) array like 'Tournament.outcomes'
+        - payoffs (Sequence[Dilemma] | np.ndarray): k dilemmas (see
+     'payoff_tensor')
+
+    Results:
+        - Array (k, n) with the points of each player under each dilemma
+    """
+    payoffs = payoff_tensor(payoffs)
+    n = len(outcomes)
+    # The payoffs of asymmetric dilemmas depend on the side of the player:
+    # 'i' is the first player of its games against j > i, the second otherwise
+    first = np.triu(np.ones((n, n), dtype=bool), 1)[:, :, None, None]
+    features = np.concatenate([np.where(first, outcomes, 0).sum(axis=1).reshape(n, 4),
+                               np.where(first, 0, outcomes).sum(axis=1).reshape(n, 4)],
+                              axis=1)
+    # As second player, 'i' plays a_i as the column of the payoff matrix
+    weights = np.concatenate([payoffs[:, 0].reshape(-1, 4),
+                              payoffs[:, 1].transpose(0, 2, 1).reshape(-1, 4)], axis=1)
+    return weights @ features.T
 
 class Tournament:
 
     def __init__(self, players: tuple[Player, ...],
                        n_rounds: int = 100,
                        error: float = 0.0,
-                       repetitions: int = 2):
+                       repetitions: int = 2,
+                       n_jobs: int = 1,
+                       seed: int | None = None,
+                       precision: float | None = None,
+                       confidence: float = 0.95,
+                       min_repetitions: int = 5,
+                       exact_expectation: bool = False):
         """
         All-against-all tournament
 
@@ -25,12 +79,37 @@ class Tournament:
             - error (float = 0.0): error probability (in base 1)
             - repetitions (int = 2): number of games each player plays against
          the rest
+            - n_jobs (int = 1): number of worker processes. With more than one,
+         the games are split among them by a cost-aware 'Scheduler'
+         ('play_sharded'). Not supported with 'precision' or
+         'exact_expectation', nor with players that learn from match to match
+         ('cacheable = False').
+            - seed (int | None = None): master seed. If given (or if 'n_jobs' >
+         1), each game gets its own random stream derived from it, so the
+         result does not depend on the number of workers
+            - precision (float | None = None): if given, the tournament is
+         played in adaptive mode: each pairing is repeated until the
+         confidence interval of its mean scores is narrower than +/-
+         'precision' points per game, or until the ranking is resolved
+         ('repetitions' is then the maximum number of repetitions)
+            - confidence (float = 0.95): confidence level of the intervals
+            - min_repetitions (int = 5): minimum number of repetitions of a
+         random pairing in adaptive mode
+            - exact_expectation (bool = False): if True, the pairings of
+         finite-state strategies ('Player.automaton') are not simulated: they
+         add the exact expected score of 'repetitions' games ('MarkovGame')
         """
 
         self.players = players
         self.n_rounds = n_rounds
         self.error = error
         self.repetitions = repetitions
+        self.n_jobs = n_jobs
+        self.seed = seed
+        self.precision = precision
+        self.confidence = confidence
+        self.min_repetitions = min_repetitions
+        self.exact_expectation = exact_expectation
 
         # This is a key variable of the class. It is intended to store the
         # ongoing ranking of the tournament. It is a dictionary whose keys are
@@ -40,37 +119,421 @@ class Tournament:
         # values.
         self.ranking = {player: 0.0 for player in self.players}  # initial vals
 
+        # Only filled in adaptive mode: confidence interval of the points of
+        # each player, and number of games played by each pairing
+        self.confidence_intervals = {}
+        self.pair_repetitions = {}
+
+        # Rounds of each joint action of every pairing, summed over its games:
+        # outcomes[i, j, a_i, a_j] counts the rounds in which 'i' played a_i
+        # and 'j' played a_j ('i' is the first player of the games if i < j).
+        # The moves do not depend on the payoffs, so they give the ranking
+        # under any other dilemma ('rescore'). Expected counts in the
+        # adaptive and exact expectation modes.
+        n = len(self.players)
+        self.outcomes = np.zeros((n, n, 2, 2))
+
     def sort_ranking(self) -> None:
         self.ranking = dict(sorted(self.ranking.items(), key=lambda item: item[1],reverse=True))
 
     #pista: utiliza 'itertools.combinations' para hacer los cruces
-    def play(self) -> None:
+    def play(self, sink: ResultsWriter | None = None) -> None:
         """
         Main call of the class. It must simulate the championship and update
         the variable 'self.ranking' with the accumulated points obtained by
         each player in their interactions.
+        If every player has a vectorized strategy, all the games are played
+        at once with 'BatchGame'.
+
+        Parameters:
+            - sink (ResultsWriter | None = None): if given, the record of
+         every match ('iter_matches') is written to it. Not supported in the
+         adaptive and exact expectation modes, which are not played match by
+         match.
         """
+        if self.precision is not None or self.exact_expectation:
+            mode = "'precision'" if self.precision is not None else "'exact_expectation'"
+            if sink is not None:
+                raise ValueError(f"a 'sink' cannot be used with {mode}")
+            if self.n_jobs > 1:
+                raise ValueError(f"'n_jobs' > 1 cannot be used with {mode}")
+
+        if self.precision is not None:
+            self.play_adaptive()
+            return
+
+        if self.exact_expectation:
+            self.play_expected()
+            return
+
+        cache = match_cache.active()
+        if cache is not None and sink is None:
+            self.play_cached(cache)
+            return
+
+        if self.n_jobs > 1 and sink is None:
+            self.play_sharded()
+            return
+
+        if self.seed is not None or sink is not None:
+            self.play_parallel(sink)
+            return
+
+        if BatchGame.supports(self.players):
+            totals = round_robin_scores(list(self.players), self.n_rounds,
+                                        self.error, self.repetitions,
+                                        seeded_rng(self.seed), self.outcomes)
+            for player, total in zip(self.players, totals):
+                self.ranking[player] = self.ranking[player] + total.item()
+            self.sort_ranking()
+            return
+
         combinations = list(itertools.combinations(self.players, 2))
+        indices = list(itertools.combinations(range(len(self.players)), 2))
         for repetetion in range(self.repetitions):
-            for combination in combinations:
-                game=Game(combination[0],combination[1],self.n_rounds,self.error)
+            for combination, (i, j) in zip(combinations, indices):
+                # Each match plays with its own players ('Player.fork')
+                game=Game(combination[0].fork(),combination[1].fork(),self.n_rounds,self.error)
                 # print('*'*50)
                 # print(f'Nuevo enfrentamiento{combination[0].name,combination[1].name}')
                 game.play(do_print=False)
-                combination[0].clean_history()
-                combination[1].clean_history()
                 score_0,score_1=game.score
+                self._add_outcomes(i, j, game.outcomes)
                 
                 self.ranking[combination[0]] = self.ranking[combination[0]]+ score_0
                 self.ranking[combination[1]] = self.ranking[combination[1]] +score_1
             self.sort_ranking()
 
+    def iter_matches(self) -> Iterator[dict]:
+        """
+        Plays the tournament match by match, with one random stream per game
+        derived from 'self.seed', splitting the games among 'self.n_jobs'
+        processes. Every game is played by fresh copies of the players. Does
+        not update 'self.ranking'.
+
+        Results:
+            - Iterator of match records (dicts with the fields of
+         'results.RECORD_FIELDS': indices of the players, repetition, seed,
+         scores and number of rounds of each joint action), in a fixed order
+        """
+        if self.seed is None:
+            self.seed = int(np.random.SeedSequence().generate_state(1)[0])
+
+        pairs = list(itertools.combinations(range(len(self.players)), 2))
+        matches = ((i, j, repetition) for repetition in range(self.repetitions)
+                   for i, j in pairs)
+        chunk_size = max(1, min(1000, len(pairs) * self.repetitions // (4 * self.n_jobs)))
+
+        for chunk, results in iter_seeded(self.players, matches, self.n_rounds,
+                                          self.error, self.seed, self.n_jobs,
+                                          chunk_size):
+            for (i, j, repetition), row in zip(chunk, results):
+                yield {"player_1": i, "player_2": j, "repetition": repetition,
+                       "seed": match_seed(self.seed, i, j, repetition),
+                       "score_1": row[0].item(), "score_2": row[1].item(),
+                       "cc": int(row[2]), "cd": int(row[3]),
+                       "dc": int(row[4]), "dd": int(row[5])}
+
+    def play_parallel(self, sink: ResultsWriter | None = None) -> None:
+        """
+        Plays the tournament with 'iter_matches' and adds the results to
+        'self.ranking' in a fixed order, so they do not depend on the number
+        of workers.
+
+        Parameters:
+            - sink (ResultsWriter | None = None): if given, every match record
+         is also written to it
+        """
+        totals = np.zeros(len(self.players))
+        for record in self.iter_matches():
+            totals[record["player_1"]] += record["score_1"]
+            totals[record["player_2"]] += record["score_2"]
+            self._add_outcomes(record["player_1"], record["player_2"],
+                               np.array([[record["cc"], record["cd"]],
+                                         [record["dc"], record["dd"]]]))
+            if sink is not None:
+                sink.write(record)
+        if sink is not None:
+            sink.flush()
+
+        for player, total in zip(self.players, totals):
+            self.ranking[player] = self.ranking[player] + total.item()
+        self.sort_ranking()
+
+    def play_sharded(self, remote_workers: int = 0,
+                           address: tuple[str, int] = ("127.0.0.1", 0),
+                           authkey: bytes | None = None) -> None:
+        """
+        Plays the tournament with a cost-aware 'Scheduler': 'self.n_jobs'
+        worker processes on this machine (plus 'remote_workers' connected
+        to 'address' from other machines) take the matches from a shared
+        queue, the most expensive first, and their partial rankings are
+        merged here. With the same seed, the result is the one of
+        'play_parallel'.
+
+        Parameters:
+            - remote_workers (int = 0): workers expected from other machines
+         ('python -m dpi worker')
+            - address (tuple[str, int] = ("127.0.0.1", 0)): address where the
+         workers connect
+            - authkey (bytes | None = None): shared secret of the workers
+         (required with remote workers)
+        """
+        if self.seed is None:
+            self.seed = int(np.random.SeedSequence().generate_state(1)[0])
+        scheduler = Scheduler(self.players, self.n_rounds, self.error,
+                              self.repetitions, self.seed, n_workers=self.n_jobs,
+                              remote_workers=remote_workers, address=address,
+                              authkey=authkey)
+        totals = scheduler.play()
+        self.outcomes += scheduler.outcomes
+
+        for player, total in zip(self.players, totals):
+            self.ranking[player] = self.ranking[player] + total.item()
+        self.sort_ranking()
+
+    def play_cached(self, cache: match_cache.MatchCache) -> None:
+        """
+        Plays the tournament reusing the matches stored in 'cache': the
+        noise-free pairings of deterministic strategies are played once ever,
+        and the other pairings only play the repetitions that are not stored
+        yet (which are then stored). The missing games are played with
+        'BatchGame' when possible, or with per-match seeds (in 'self.n_jobs'
+        processes) if 'self.seed' is given or 'self.n_jobs' > 1. Those seeds
+        come from the strategies of the match ('cache.pairing_seed'), not
+        from their indices in 'self.players', so a seeded run gives the same
+        results with a cold or a warm cache, even if the cache was filled by
+        tournaments with other rosters.
+
+        Parameters:
+            - cache (MatchCache): the cache of matches
+        """
+        n = len(self.players)
+        totals = np.zeros(n)
+        weights = {}    # (i, j) -> games represented by each stored one
+        missing = []    # (i, j, repetition) of the games not stored yet
+
+        for i, j in itertools.combinations(range(n), 2):
+            player_1, player_2 = self.players[i], self.players[j]
+            deterministic = cache.is_deterministic(player_1, player_2, self.error)
+            needed = 1 if deterministic else self.repetitions
+            weights[(i, j)] = self.repetitions if deterministic else 1
+
+            stored = cache.fetch(player_1, player_2, self.n_rounds, self.error, self.seed)
+            stored = np.zeros((0, 6)) if stored is None else stored[:needed]
+            totals[i] += weights[(i, j)] * stored[:, 0].sum()
+            totals[j] += weights[(i, j)] * stored[:, 1].sum()
+            self._add_outcomes(i, j, weights[(i, j)] * stored[:, 2:].sum(axis=0).reshape(2, 2))
+            missing.extend((i, j, repetition)
+                           for repetition in range(len(stored), needed))
+
+        records = self._play_missing(missing)
+        for (i, j), group in itertools.groupby(zip(missing, records),
+                                               key=lambda item: item[0][:2]):
+            group = list(group)
+            rows = np.array([row for _, row in group])
+            cache.store(self.players[i], self.players[j], self.n_rounds, self.error,
+                        rows, first_repetition=group[0][0][2], seed=self.seed)
+            totals[i] += weights[(i, j)] * rows[:, 0].sum()
+            totals[j] += weights[(i, j)] * rows[:, 1].sum()
+            self._add_outcomes(i, j, weights[(i, j)] * rows[:, 2:].sum(axis=0).reshape(2, 2))
+
+        for player, total in zip(self.players, totals):
+            self.ranking[player] = self.ranking[player] + total.item()
+        self.sort_ranking()
+
+    def _play_missing(self, matches: list[tuple[int, int, int]]) -> np.ndarray:
+        """Records (scores and outcome counts) of the given matches"""
+        if not matches:
+            return np.zeros((0, 6))
+        if self.seed is None and self.n_jobs == 1:
+            return play_records([self.players[i] for i, _, _ in matches],
+                                [self.players[j] for _, j, _ in matches],
+                                self.n_rounds, self.error)
+
+        seed = self.seed
+        if seed is None:
+            seed = int(np.random.SeedSequence().generate_state(1)[0])
+        chunk_size = max(1, min(1000, len(matches) // (4 * self.n_jobs)))
+        keys = tuple(match_cache.strategy_key(player) for player in self.players)
+        return np.concatenate([results for _, results in
+                               iter_seeded(self.players, matches, self.n_rounds,
+                                           self.error, seed, self.n_jobs, chunk_size,
+                                           keys)])
+
+    def play_adaptive(self) -> None:
+        """
+        Plays the tournament repeating each pairing only while it is needed.
+        Keeps the running mean and variance of the scores of every pairing,
+        and stops repeating a pairing once the confidence interval of its
+        means is narrower than +/- 'self.precision' (after at least
+        'self.min_repetitions' games). Deterministic pairings are played once.
+        The whole tournament stops when the ranking is resolved (the
+        confidence intervals of consecutive players do not overlap).
+
+        The points of each player are the expected points of playing every
+        pairing 'self.repetitions' times, so they are comparable with 'play'.
+        """
+        rng = seeded_rng(self.seed)
+        pairs = np.array(list(itertools.combinations(range(len(self.players)), 2)),
+                         dtype=np.int64).reshape(-1, 2)
+        deterministic = np.array([self.error == 0 and self.players[i].deterministic
+                                  and self.players[j].deterministic for i, j in pairs],
+                                 dtype=bool)
+
+        stats = RunningStats((len(pairs), 2))
+        outcome_sums = np.zeros((len(pairs), 2, 2))
+        active = np.ones(len(pairs), dtype=bool)
+        if self.exact_expectation:
+            # Exact pairings count as one noiseless sample of their expectation
+            exact = np.flatnonzero(self._exact_pairings(pairs))
+            scores, outcome_sums[exact] = self._expected_games(pairs[exact])
+            stats.update(exact, scores)
+            deterministic[exact] = True
+            active[exact] = False
+
+        for repetition in range(self.repetitions):
+            idx = np.flatnonzero(active)
+            if len(idx) == 0:
+                break
+            records = play_records([self.players[i] for i in pairs[idx, 0]],
+                                   [self.players[j] for j in pairs[idx, 1]],
+                                   self.n_rounds, self.error, rng)
+            stats.update(idx, records[:, :2])
+            outcome_sums[idx] += records[:, 2:].reshape(-1, 2, 2)
+
+            # Pairings already resolved to the requested precision
+            resolved = ((stats.count >= self.min_repetitions)
+                        & (stats.half_width(self.confidence).max(axis=1) <= self.precision))
+            active &= ~(resolved | deterministic)
+
+            totals, half_widths = self._adaptive_totals(pairs, stats, deterministic)
+            if repetition + 1 >= self.min_repetitions and self._ranking_resolved(totals, half_widths):
+                break
+
+        totals, half_widths = self._adaptive_totals(pairs, stats, deterministic)
+        for k, player in enumerate(self.players):
+            self.ranking[player] = self.ranking[player] + totals[k].item()
+            self.confidence_intervals[player] = (self.ranking[player] - half_widths[k].item(),
+                                                 self.ranking[player] + half_widths[k].item())
+        self.pair_repetitions = {(self.players[i], self.players[j]): stats.count[k].item()
+                                 for k, (i, j) in enumerate(pairs)}
+        mean_outcomes = outcome_sums / np.maximum(stats.count, 1)[:, None, None]
+        self._add_outcomes(pairs[:, 0], pairs[:, 1], self.repetitions * mean_outcomes)
+        self.sort_ranking()
+
+    def play_expected(self) -> None:
+        """
+        Adds to 'self.ranking' the exact expected points of the pairings of
+        finite-state strategies ('MarkovGame'), and simulates the other
+        pairings 'self.repetitions' times.
+        """
+        pairs = np.array(list(itertools.combinations(range(len(self.players)), 2)),
+                         dtype=np.int64).reshape(-1, 2)
+        exact = self._exact_pairings(pairs)
+
+        scores = np.zeros((len(pairs), 2))
+        outcomes = np.zeros((len(pairs), 2, 2))
+        expected_scores, expected_outcomes = self._expected_games(pairs[exact])
+        scores[exact] = self.repetitions * expected_scores
+        outcomes[exact] = self.repetitions * expected_outcomes
+
+        simulated = np.tile(np.flatnonzero(~exact), self.repetitions)
+        rng = seeded_rng(self.seed)
+        records = play_records([self.players[i] for i in pairs[simulated, 0]],
+                               [self.players[j] for j in pairs[simulated, 1]],
+                               self.n_rounds, self.error, rng)
+        np.add.at(scores, simulated, records[:, :2])
+        np.add.at(outcomes, simulated, records[:, 2:].reshape(-1, 2, 2))
+        self._add_outcomes(pairs[:, 0], pairs[:, 1], outcomes)
+
+        totals = np.zeros(len(self.players))
+        np.add.at(totals, pairs[:, 0], scores[:, 0])
+        np.add.at(totals, pairs[:, 1], scores[:, 1])
+        for player, total in zip(self.players, totals):
+            self.ranking[player] = self.ranking[player] + total.item()
+        self.sort_ranking()
+
+    def _exact_pairings(self, pairs: np.ndarray) -> np.ndarray:
+        """Mask of the pairings that 'MarkovGame' can solve"""
+        return np.array([MarkovGame.supports(self.players[i], self.players[j])
+                         for i, j in pairs], dtype=bool)
+
+    def _expected_games(self, pairs: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """Exact expected scores and outcome counts of one game of each
+        pairing"""
+        scores = np.zeros((len(pairs), 2))
+        outcomes = np.zeros((len(pairs), 2, 2))
+        for k, (i, j) in enumerate(pairs):
+            game = MarkovGame(self.players[i], self.players[j], self.n_rounds, self.error)
+            scores[k] = game.expected_scores()
+            outcomes[k] = game.expected_outcomes()
+        return scores, outcomes
+
+    def _add_outcomes(self, idx_1: int | np.ndarray, idx_2: int | np.ndarray,
+                      outcomes: np.ndarray) -> None:
+        """Adds the outcome counts (2x2, or one 2x2 per pair of indices) of
+        the games between 'idx_1' and 'idx_2' to 'self.outcomes'"""
+        np.add.at(self.outcomes, (idx_1, idx_2), outcomes)
+        np.add.at(self.outcomes, (idx_2, idx_1), np.swapaxes(outcomes, -1, -2))
+
+    def rescore(self, payoffs: Dilemma | Sequence[Dilemma] | np.ndarray) \
+                -> dict[Player, float] | np.ndarray:
+        """
+        Points the players would have obtained under other payoffs, from
+        'self.outcomes' (without replaying any game). Many dilemmas are
+        scored at once with a single matrix product, so sweeping thousands of
+        them is fast.
+
+        Parameters:
+            - payoffs (Dilemma | Sequence[Dilemma] | np.ndarray): a dilemma,
+         several dilemmas, or an array with one dilemma per row, either as
+         (cc, cd, dc, dd) (symmetric 2x2 dilemmas, shape (k, 4)) or as
+         'Dilemma.payoffs' (shape (k, 2, 2, 2))
+
+        Results:
+            - With a single 'Dilemma', a ranking like 'self.ranking'. Otherwise
+         an array (k, n) with the points of each player (same order as
+         'self.players') under each dilemma.
+        """
+        if isinstance(payoffs, Dilemma):
+            points = rescore_outcomes(self.outcomes, payoffs.payoffs[None])[0]
+            ranking = {player: points[i].item() for i, player in enumerate(self.players)}
+            return dict(sorted(ranking.items(), key=lambda item: item[1], reverse=True))
+        return rescore_outcomes(self.outcomes, payoffs)
+
+    def _adaptive_totals(self, pairs: np.ndarray, stats: RunningStats,
+                         deterministic: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """Expected points of each player and half width of their confidence
+        intervals, from the statistics of every pairing"""
+        n = len(self.players)
+        variance = np.where(deterministic[:, None], 0.0, stats.mean_variance())
+
+        totals, variances = np.zeros(n), np.zeros(n)
+        for side in (0, 1):
+            np.add.at(totals, pairs[:, side], stats.mean()[:, side])
+            np.add.at(variances, pairs[:, side], variance[:, side])
+
+        return (self.repetitions * totals,
+                self.repetitions * z_score(self.confidence) * np.sqrt(variances))
+
+    @staticmethod
+    def _ranking_resolved(totals: np.ndarray, half_widths: np.ndarray) -> bool:
+        """True if the confidence intervals of consecutive players of the
+        ranking do not overlap"""
+        order = np.argsort(-totals)
+        lower = totals[order] - half_widths[order]
+        upper = totals[order] + half_widths[order]
+        return bool(np.all(lower[:-1] > upper[1:]))
+
     def plot_results(self):
         """
         Plots a bar chart of the final ranking. On the x-axis should appear
         the names of the sorted ranking of players participating in the
         tournament. On the y-axis the points obtained.
         """
+        import matplotlib.pyplot as plt
+
         player_names = [x.name for x in self.ranking.keys()]
         player_scores = list(self.ranking.values())
 
@@ -82,25 +545,3 @@ class Tournament:
             plt.text(x=i, y=player_scores[i], s=player_scores[i], ha = 'center', bbox = dict(facecolor = 'yellow', alpha =.8))
         
         plt.show()
-# -----------------------------------------------
-dilemma = Dilemma(2, -1, 3, 0)
-
-# cooperator_player = Cooperator(dilemma, "cooperator")
-# defector_player = Defector(dilemma, "defector")
-tft_player = Tft(dilemma, "tft")
-grudger_player = Grudger(dilemma, "grudger")
-detective_player = Detective4MovsTft(dilemma, "detective")
-periodic_cd  = Periodic_CD(dilemma, "periodic_cd")
-periodic_dc  = Periodic_DC(dilemma, "periodic_dc")
-periodic_ccd = Periodic_CCD(dilemma, "periodic_ccd")
-periodic_cdd = Periodic_CDD(dilemma, "periodic_cdd")
-
-destructor_player = Destructomatic(dilemma, "destructor")
-sema4all_player = Sema4All_Killer(dilemma, "sema4all")
-
-all_players = (tft_player, grudger_player, detective_player, destructor_player, sema4all_player,
-               periodic_cd, periodic_dc, periodic_ccd, periodic_cdd,)
-
-torneo = Tournament(all_players, n_rounds=150, error=0, repetitions=1)
-torneo.play()
-torneo.plot_results()
@@ -14,6 +14,6 @@ participants = (Destructomatic(dilemma, "destr"),
                 Tft(dilemma, "tft"),
                 Detective4MovsTft(dilemma, "detect"))
 
-tournament = Tournament(participants, dilemma, n_rounds=100, error=0.01, repetitions=2)
+tournament = Tournament(participants, n_rounds=100, error=0.01, repetitions=2)
 tournament.play()
 tournament.plot_results()
\ No newline at end of file
@@ -0,0 +1,18 @@
+import pytest
+from dpi.__main__ import build_players, DEFAULT_PLAYERS, STRATEGIES
+from dpi.dilemma import Dilemma
+
+@pytest.fixture
+def dilemma():
+    return Dilemma(2, -1, 3, 0)
+
+@pytest.fixture
+def players(dilemma):
+    """The default roster of the command line"""
+    return build_players(DEFAULT_PLAYERS, dilemma)
+
+@pytest.fixture
+def deterministic_players(dilemma):
+    """Every built-in strategy whose moves only depend on the histories"""
+    return tuple(player for player in build_players(list(STRATEGIES), dilemma)
+                 if player.deterministic)
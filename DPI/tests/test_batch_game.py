@@ -0,0 +1,61 @@
+import itertools
+import random
+import numpy as np
+import pytest
+from dpi import batch_game
+from dpi.batch_game import BatchGame, round_robin_scores
+from dpi.game import Game
+from dpi.tournament import Tournament
+
+def test_matches_scalar_games(deterministic_players):
+    pairs = list(itertools.product(deterministic_players, repeat=2))
+    game = BatchGame([p for p, _ in pairs], [q for _, q in pairs], 37, record_history=True)
+    game.play()
+    for k, (player_1, player_2) in enumerate(pairs):
+        scalar = Game(player_1.fork(), player_2.fork(), 37)
+        scalar.play()
+        assert tuple(game.scores[k]) == pytest.approx(scalar.score)
+        assert (game.outcomes[k] == scalar.outcomes).all()
+        assert list(game.history_1[k]) == list(scalar.player_1.history)
+        assert list(game.history_2[k]) == list(scalar.player_2.history)
+
+def test_outcomes_match_recorded_histories(players):
+    pairs = list(itertools.product(players, repeat=2))
+    game = BatchGame([p for p, _ in pairs], [q for _, q in pairs], 50, error=0.1,
+                     rng=np.random.default_rng(0), record_history=True,
+                     checkpoints=[10, 50])
+    game.play()
+    codes = 2 * game.history_1 + game.history_2
+    for c, n_rounds in enumerate(game.checkpoints):
+        counts = np.stack([(codes[:, :n_rounds] == code).sum(axis=1) for code in range(4)], axis=1)
+        assert (game.checkpoint_outcomes[:, c].reshape(-1, 4) == counts).all()
+    assert (game.checkpoint_outcomes[:, -1] == game.outcomes).all()
+    assert game.scores == pytest.approx((game.outcomes.reshape(-1, 1, 4)
+                                         * game.dilemma.payoffs.reshape(1, 2, 4)).sum(axis=2))
+
+def test_histories_are_opt_in(players):
+    game = BatchGame(list(players), list(players), 10)
+    game.play()
+    assert game.history_1 is None and game.history_2 is None
+
+def test_round_robin_does_not_depend_on_batch_size(deterministic_players, monkeypatch):
+    n = len(deterministic_players)
+    outcomes = np.zeros((n, n, 2, 2))
+    totals = round_robin_scores(list(deterministic_players), 30, repetitions=3,
+                                outcomes=outcomes)
+    monkeypatch.setattr(batch_game, "BATCH_SIZE", 7)
+    small_outcomes = np.zeros((n, n, 2, 2))
+    small = round_robin_scores(list(deterministic_players), 30, repetitions=3,
+                               outcomes=small_outcomes)
+    assert (totals == small).all()
+    assert (outcomes == small_outcomes).all()
+
+def test_random_seed_reproduces_batched_tournaments(players):
+    assert BatchGame.supports(players)
+    rankings = []
+    for _ in range(2):
+        random.seed(7)
+        tournament = Tournament(players, n_rounds=30, error=0.05)
+        tournament.play()
+        rankings.append(list(tournament.ranking.values()))
+    assert rankings[0] == rankings[1]
@@ -0,0 +1,85 @@
+import multiprocessing
+import numpy as np
+import pytest
+from dpi import cache as match_cache
+from dpi.cache import MatchCache
+from dpi.dilemma import Dilemma
+from dpi.payoff_matrix import PayoffMatrix
+from dpi.player import Cooperator, Defector
+from dpi.tournament import Tournament
+
+def test_store_and_fetch_in_both_orders(players, tmp_path):
+    cache = MatchCache(str(tmp_path / "matches.db"))
+    rows = np.array([[10.0, 4.0, 1, 2, 3, 4], [11.0, 5.0, 4, 3, 2, 1]])
+    cache.store(players[0], players[4], 10, 0.1, rows, seed=1)
+    assert np.array_equal(cache.fetch(players[0], players[4], 10, 0.1, seed=1), rows)
+    assert np.array_equal(cache.fetch(players[4], players[0], 10, 0.1, seed=1),
+                          rows[:, [1, 0, 2, 4, 3, 5]])
+    # Different settings are different matches
+    assert len(cache.fetch(players[0], players[4], 10, 0.1, seed=2)) == 0
+    assert len(cache.fetch(players[0], players[4], 20, 0.1, seed=1)) == 0
+    cache.close()
+
+def test_eviction_keeps_the_recent_matches(players, tmp_path):
+    cache = MatchCache(str(tmp_path / "matches.db"), max_entries=3)
+    for k, player in enumerate(players[1:5]):
+        cache.store(players[0], player, 10, 0.0, [[k, k, 0, 0, 0, 10]])
+    assert len(cache) == 3
+    assert len(cache.fetch(players[0], players[1], 10, 0.0)) == 0
+    assert len(cache.fetch(players[0], players[4], 10, 0.0)) == 1
+    cache.close()
+
+def test_deterministic_games_are_played_once(deterministic_players, tmp_path):
+    players = deterministic_players[2], deterministic_players[5]
+    cold = PayoffMatrix(players, n_rounds=50).expected_scores(0, 1)
+    with MatchCache(str(tmp_path / "matches.db")) as cache:
+        PayoffMatrix(players, n_rounds=50).expected_scores(0, 1)
+        assert len(cache) == 1
+        # A stored game is not played again
+        cache.store(*players, 50, 0.0, [[1.0, 2.0, 0, 0, 0, 50]])
+        assert PayoffMatrix(players, n_rounds=50).expected_scores(0, 1) == (1.0, 2.0)
+    assert PayoffMatrix(players, n_rounds=50).expected_scores(0, 1) == cold
+
+def test_warm_tournaments_match_cold_ones(players, tmp_path):
+    path = str(tmp_path / "matches.db")
+    rankings = []
+    for roster in (players, players[::-1], players):
+        with MatchCache(path):
+            tournament = Tournament(roster, n_rounds=30, error=0.05, repetitions=3, seed=4)
+            tournament.play()
+        rankings.append({player.name: points for player, points in tournament.ranking.items()})
+    assert rankings[0] == rankings[1] == rankings[2]
+
+def test_asymmetric_dilemmas_keep_the_seats(tmp_path):
+    dilemma = Dilemma.from_matrices(np.array([[3, 0], [5, 1]]), np.array([[10, 20], [30, 40]]))
+    players = (Defector(dilemma, "d"), Cooperator(dilemma, "c"))
+    for roster in (players[::-1], players, players):
+        expected = Tournament(roster, n_rounds=10, seed=1)
+        expected.play()
+        with MatchCache(str(tmp_path / "matches.db")):
+            cached = Tournament(roster, n_rounds=10, seed=1)
+            cached.play()
+        assert cached.ranking == expected.ranking
+
+    # Noisy games are seeded by strategy: the other seat order is another match
+    rankings = []
+    for path, rosters in (("cold.db", [players]), ("warm.db", [players[::-1], players])):
+        with MatchCache(str(tmp_path / path)):
+            for roster in rosters:
+                tournament = Tournament(roster, n_rounds=10, error=0.1, seed=1)
+                tournament.play()
+        rankings.append(tournament.ranking)
+    assert rankings[0] == rankings[1]
+
+def report_cache(queue):
+    queue.put(match_cache.active() is None)
+
+def test_forked_processes_do_not_use_the_cache(tmp_path):
+    context = multiprocessing.get_context("fork")
+    queue = context.Queue()
+    with MatchCache(str(tmp_path / "matches.db")) as cache:
+        process = context.Process(target=report_cache, args=(queue,))
+        process.start()
+        assert queue.get(timeout=10)
+        process.join()
+        assert match_cache.active() is cache
@@ -0,0 +1,27 @@
+import os
+import subprocess
+import sys
+from dpi.__main__ import main, parse_args, DEFAULT_PLAYERS
+
+PACKAGE_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def test_import_has_no_side_effects():
+    code = ("import sys, dpi; "
+            "print(sorted(m for m in ('matplotlib', 'torch') if m in sys.modules))")
+    result = subprocess.run([sys.executable, "-c", code], cwd=PACKAGE_ROOT,
+                            capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == "[]"
+    assert result.stderr == ""
+
+def test_parse_args():
+    args = parse_args(["tournament", "--rounds", "20", "--seed", "3"])
+    assert (args.command, args.rounds, args.seed, args.players) == \
+        ("tournament", 20, 3, DEFAULT_PLAYERS)
+    args = parse_args(["sweep", "--errors", "0", "0.1", "--roster", "tft", "grudger"])
+    assert args.errors == [0.0, 0.1] and args.roster == [["tft", "grudger"]]
+
+def test_tournament_command(capsys):
+    main(["tournament", "--rounds", "20", "--players", "tft", "defector",
+          "--no-plot"])
+    lines = capsys.readouterr().out.splitlines()
+    assert lines == ["defector: 6.0", "tft: -2.0"]
@@ -0,0 +1,46 @@
+import itertools
+import numpy as np
+import pytest
+from dpi.batch_game import BatchGame
+from dpi.dilemma import Dilemma, C, D
+from dpi.game import Game
+from dpi.markov import MarkovGame
+from dpi.player import Cooperator, Tft
+
+def test_vectorized_scoring_matches_scalar():
+    dilemma = Dilemma(2, -1, 3, 0)
+    rng = np.random.default_rng(0)
+    a_1, a_2 = rng.integers(0, 2, (2, 3, 50))
+    payoff_1, payoff_2 = dilemma.evaluate_result(a_1, a_2)
+    assert payoff_1.shape == a_1.shape
+    for index in np.ndindex(a_1.shape):
+        assert (payoff_1[index], payoff_2[index]) == \
+            dilemma.evaluate_result(int(a_1[index]), int(a_2[index]))
+
+def test_symmetric_payoffs():
+    dilemma = Dilemma(2, -1, 3, 0)
+    assert dilemma.symmetric
+    assert dilemma.evaluate_result(C, D) == (-1, 3)
+    assert dilemma.evaluate_result(D, C) == (3, -1)
+    for a_1, a_2 in itertools.product((C, D), repeat=2):
+        assert dilemma.table[a_1][a_2] == tuple(dilemma.payoffs[:, a_1, a_2])
+
+def test_general_games():
+    matrix_1 = np.array([[0, -1, 1], [1, 0, -1], [-1, 1, 0]])
+    game = Dilemma.from_matrices(matrix_1, -matrix_1)
+    # Rock-paper-scissors is zero-sum and symmetric
+    assert game.n_actions == 3 and game.symmetric
+    assert not Dilemma.from_matrices(matrix_1, matrix_1).symmetric
+    payoff_1, payoff_2 = game.evaluate_result(np.array([0, 1, 2]), np.array([1, 2, 0]))
+    assert payoff_1.tolist() == [-1, -1, -1] and payoff_2.tolist() == [1, 1, 1]
+    assert Dilemma.from_matrices(np.array([[2, -1], [3, 0]])).table == Dilemma(2, -1, 3, 0).table
+
+def test_engines_reject_more_than_two_actions():
+    matrix = np.array([[0, -1, 1], [1, 0, -1], [-1, 1, 0]])
+    game = Dilemma.from_matrices(matrix, -matrix)
+    player_1, player_2 = Tft(game), Cooperator(game)
+    for engine in (Game, MarkovGame):
+        with pytest.raises(ValueError):
+            engine(player_1, player_2)
+    with pytest.raises(ValueError):
+        BatchGame([player_1], [player_2])
@@ -0,0 +1,43 @@
+import numpy as np
+import pytest
+from dpi.dynamics import replicator, replicator_derivative, moran, moran_step, wright_fisher
+
+PAYOFFS = np.array([[3.0, 0.0, 1.0],
+                    [5.0, 1.0, 2.0],
+                    [4.0, 0.5, 2.0]])
+
+def test_replicator_keeps_frequencies():
+    x = replicator(PAYOFFS, [0.5, 0.2, 0.3], time=2.0, steps=50)
+    assert x.sum() == pytest.approx(1.0)
+    assert (x >= 0).all()
+    # The second strategy dominates the others
+    assert x[1] > 0.2
+    # Pure populations are fixed points
+    assert replicator_derivative(PAYOFFS, np.array([0.0, 0.0, 1.0])) == pytest.approx(0)
+
+def test_moran_matches_its_steps_on_average():
+    counts = np.tile([10, 5, 5], (20000, 1))
+    leap = moran(PAYOFFS, counts, np.random.default_rng(3), events=1)
+    steps = moran_step(PAYOFFS, counts, np.random.default_rng(4))
+    assert leap.mean(axis=0) == pytest.approx(steps.mean(axis=0), abs=0.03)
+
+    # Whole generations: the dominant strategy takes over a large population
+    counts = np.array([400_000, 300_000, 300_000])
+    rng = np.random.default_rng(5)
+    for _ in range(50):
+        counts = moran(PAYOFFS, counts, rng)
+    assert counts.sum() == 1_000_000 and counts[1] > 990_000
+
+@pytest.mark.parametrize("process", [moran, wright_fisher])
+def test_population_size_is_kept(process):
+    counts = np.array([[10, 5, 5], [0, 20, 0], [1, 1, 18]])
+    new_counts = process(PAYOFFS, counts, np.random.default_rng(0))
+    assert (new_counts.sum(axis=1) == 20).all()
+    assert (new_counts >= 0).all()
+    # A strategy that is extinct stays extinct
+    assert (new_counts[1] == [0, 20, 0]).all()
+
+def test_neutral_drift_keeps_the_mean():
+    counts = np.tile([30, 50, 20], (4000, 1))
+    new_counts = wright_fisher(PAYOFFS, counts, np.random.default_rng(1), selection=0.0)
+    assert new_counts.mean(axis=0) == pytest.approx([30, 50, 20], abs=0.5)
@@ -0,0 +1,76 @@
+import pickle
+import random
+import numpy as np
+import pytest
+from dpi.__main__ import main
+from dpi.evolution import Evolution
+
+@pytest.mark.parametrize("settings", [
+    {"dynamics": "moran", "error": 0.05},
+    {"exact_games": True, "error": 0.05, "initial_population": 18},
+])
+def test_resume_is_bit_identical(players, settings, tmp_path):
+    settings = {"n_rounds": 20, "samples": 10, "seed": 2, "reproductivity": 0.2,
+                "initial_population": 45, **settings}
+    random.seed(0)
+    uninterrupted = Evolution(players, generations=6, **settings)
+    uninterrupted.play(plot=False)
+
+    checkpoint = str(tmp_path / "evolution.pkl")
+    random.seed(0)
+    Evolution(players, generations=3, **settings).play(plot=False, checkpoint=checkpoint,
+                                                       checkpoint_every=2)
+    random.seed(1)   # the checkpoint restores the random states
+    resumed = Evolution.resume(checkpoint, plot=False, generations=6)
+    assert resumed.count_evolution == uninterrupted.count_evolution
+
+def test_exact_games_keep_the_population(deterministic_players):
+    evolution = Evolution(deterministic_players, n_rounds=20, generations=4,
+                          initial_population=5 * len(deterministic_players),
+                          exact_games=True, reproductivity=0.1)
+    evolution.play(plot=False)
+    totals = np.array(list(evolution.count_evolution.values())).sum(axis=0)
+    assert (totals == 5 * len(deterministic_players)).all()
+
+    # Without noise, exact games give the fitness of the payoff matrix
+    counts = np.array([values[-2] for values in evolution.count_evolution.values()])
+    expected = Evolution(deterministic_players, n_rounds=20, generations=1,
+                         initial_population=list(counts), reproductivity=0.1)
+    expected.play(plot=False)
+    assert [values[-1] for values in expected.count_evolution.values()] == \
+        [values[-1] for values in evolution.count_evolution.values()]
+
+def test_resume_keeps_the_saved_target(players, tmp_path):
+    settings = {"n_rounds": 20, "samples": 10, "seed": 2, "reproductivity": 0.2}
+    random.seed(0)
+    uninterrupted = Evolution(players, generations=6, **settings)
+    uninterrupted.play(plot=False)
+
+    # A 6-generation run interrupted after its checkpoint of generation 3
+    checkpoint = str(tmp_path / "evolution.pkl")
+    random.seed(0)
+    Evolution(players, generations=3, **settings).play(plot=False, checkpoint=checkpoint)
+    with open(checkpoint, "rb") as file:
+        state = pickle.load(file)
+    state["evolution"].generations = 6
+    with open(checkpoint, "wb") as file:
+        pickle.dump(state, file)
+
+    with pytest.raises(ValueError):
+        Evolution.resume(checkpoint, plot=False, generations=2)
+    main(["evolution", "--checkpoint", checkpoint, "--no-plot"])
+    resumed = Evolution.resume(checkpoint, plot=False)
+    assert resumed.count_evolution == uninterrupted.count_evolution
+
+@pytest.mark.parametrize("reproductivity", [0.0, 0.1, 0.3])
+def test_natural_selection_matches_a_full_sort(players, reproductivity):
+    evolution = Evolution(players, reproductivity=reproductivity)
+    rng = np.random.default_rng(0)
+    types = rng.integers(0, len(players), 200)
+    scores = rng.integers(0, 10, 200).astype(float)   # many ties
+
+    n = int(len(types) * reproductivity)
+    order = np.argsort(-scores, kind="stable")
+    expected = np.bincount(np.concatenate([types[order[:len(types) - n]], types[order[:n]]]),
+                           minlength=len(players))
+    assert evolution.natural_selection(types, scores).tolist() == expected.tolist()
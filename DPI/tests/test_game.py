@@ -0,0 +1,63 @@
+import itertools
+import random
+import pytest
+from dpi.dilemma import C, D
+from dpi.game import Game
+from dpi.markov import MarkovGame
+from dpi.player import Tft
+
+def test_running_score_matches_compute_scores(players):
+    random.seed(0)
+    for player_1, player_2 in itertools.combinations(players, 2):
+        player_1, player_2 = player_1.fork(), player_2.fork()
+        game = Game(player_1, player_2, 60, error=0.1)
+        game.play()
+        assert game.score == pytest.approx(player_1.compute_scores(player_2))
+        assert game.outcomes.sum() == 60
+
+@pytest.mark.parametrize("n_rounds", [1, 7, 1000, 12345])
+def test_extrapolation_matches_full_simulation(deterministic_players, n_rounds, monkeypatch):
+    pairs = list(itertools.combinations_with_replacement(deterministic_players, 2))
+    extrapolated = []
+    for player_1, player_2 in pairs:
+        game = Game(player_1.fork(), player_2.fork(), n_rounds)
+        game.play()
+        extrapolated.append(game)
+
+    # Without cycle detection, every round is simulated
+    monkeypatch.setattr(Game, "_joint_state", lambda self: None)
+    for (player_1, player_2), fast in zip(pairs, extrapolated):
+        full = Game(player_1.fork(), player_2.fork(), n_rounds)
+        full.play()
+        assert full.simulated_rounds == n_rounds
+        assert fast.score == full.score
+        assert (fast.outcomes == full.outcomes).all()
+        # The histories describe the whole game, and score like it
+        assert list(fast.player_1.history) == list(full.player_1.history)
+        assert list(fast.player_2.history) == list(full.player_2.history)
+        assert fast.player_1.compute_scores(fast.player_2) == pytest.approx(full.score)
+
+def test_long_games_are_extrapolated(deterministic_players):
+    player_1, player_2 = deterministic_players[0].fork(), deterministic_players[-1].fork()
+    game = Game(player_1, player_2, 10 ** 9)
+    game.play()
+    assert game.simulated_rounds < 100
+    assert game.outcomes.sum() == 10 ** 9
+    assert len(player_1.history) == 10 ** 9
+    assert player_1.compute_scores(player_2) == pytest.approx(game.score)
+
+class Alternator(Tft):
+    """Another strategy that only redefines 'strategy'"""
+
+    def strategy(self, opponent):
+        return D if len(self.history) % 3 == 2 else C
+
+def test_subclasses_do_not_inherit_the_description(dilemma):
+    player, opponent = Alternator(dilemma, "alternator"), Tft(dilemma, "tft")
+    assert not player.deterministic and not player.has_batch_strategy()
+    assert player.state_key(opponent) is None and player.automaton() is None
+    assert not MarkovGame.supports(player, opponent)
+    game = Game(player.fork(), opponent.fork(), 1000)
+    game.play()
+    assert game.simulated_rounds == 1000
+    assert list(game.player_1.history) == [C, C, D] * 333 + [C]
@@ -0,0 +1,54 @@
+import numpy as np
+from dpi.dilemma import C, D
+from dpi.history import History
+
+def test_behaves_like_a_list():
+    actions = [C, D, D, C, C, D, C] * 5
+    history = History(capacity=1)
+    reference = []
+    for action in actions:
+        history.append(action)
+        reference.append(action)
+        assert history == reference
+        assert history[-1] == reference[-1]
+        assert (D in history) == (D in reference)
+        assert history.count(C) == reference.count(C)
+        assert history.last(4) == reference[-4:]
+    assert history[3:11] == reference[3:11]
+    assert list(history.to_array()) == reference
+
+    history[-1] = D
+    history[2] = C
+    reference[-1], reference[2] = D, C
+    assert history == reference
+    assert history.defections == reference.count(D)
+    assert history[-1] == D
+
+def test_repeated_cycles():
+    history = History([C, C, D, C, D])
+    reference = [C, C, D, C, D] + [D, C, D] * 333 + [D, C]
+    history.repeat(2, len(reference))
+    assert len(history) == len(reference)
+    assert history == reference
+    assert history[-1] == reference[-1] and history[-2] == reference[-2]
+    assert history.defections == reference.count(D)
+    assert history.last(3) == reference[-3:]
+
+    actions, counts = history.compressed()
+    assert counts.sum() == len(reference)
+    assert (counts * actions).sum() == reference.count(D)
+
+    # Changing a repeated history stores the repetitions first
+    history.append(C)
+    reference.append(C)
+    assert history == reference
+    assert history.compressed()[1].max() == 1
+
+def test_same_layout():
+    first, second = History([C, D, C]), History([D, D, C])
+    assert first.same_layout(second)
+    first.repeat(1, 10)
+    assert not first.same_layout(second)
+    second.repeat(1, 10)
+    assert first.same_layout(second)
+    assert np.array_equal(first.to_array()[1::2], np.full(5, D))
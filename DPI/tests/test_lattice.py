@@ -0,0 +1,41 @@
+import numpy as np
+import pytest
+from dpi.lattice import Lattice
+
+@pytest.mark.parametrize("update", ["imitate_best", "fermi"])
+def test_seeded_runs_are_reproducible(players, update, tmp_path):
+    runs = []
+    for k in range(2):
+        lattice = Lattice(players, shape=(12, 15), n_rounds=20, error=0.05, generations=4,
+                          update=update, samples=5, seed=9)
+        path = str(tmp_path / f"grids_{k}.npy")
+        lattice.play(plot=False, snapshots=path)
+        runs.append((lattice.count_evolution, np.load(path)))
+    assert runs[0][0] == runs[1][0]
+    assert np.array_equal(runs[0][1], runs[1][1])
+
+    grids = runs[0][1]
+    assert grids.shape == (5, 12, 15)
+    counts = np.array([np.bincount(grid.ravel(), minlength=len(players)) for grid in grids])
+    assert list(runs[0][0].values()) == counts.T.tolist()
+
+def test_scores_against_neighbours(deterministic_players):
+    grid = np.zeros((4, 4), dtype=int)
+    grid[1, 2] = 1
+    lattice = Lattice(deterministic_players, shape=(4, 4), n_rounds=10,
+                      neighbourhood="von_neumann", initial_grid=grid)
+    payoffs = lattice.payoffs.matrix()
+    scores = lattice.scores()
+    assert scores[1, 2] == pytest.approx(4 * payoffs[1, 0])
+    assert scores[1, 1] == pytest.approx(3 * payoffs[0, 0] + payoffs[0, 1])
+    assert scores[3, 3] == pytest.approx(4 * payoffs[0, 0])
+
+def test_imitate_best_copies_the_best_neighbour(deterministic_players):
+    grid = np.zeros((5, 5), dtype=int)
+    grid[2, 2] = 1
+    lattice = Lattice(deterministic_players, shape=(5, 5), initial_grid=grid)
+    scores = np.zeros((5, 5))
+    scores[2, 2] = 1.0
+    new_grid = lattice.step(scores)
+    assert new_grid[1:4, 1:4].tolist() == [[1, 1, 1]] * 3
+    assert new_grid.sum() == 9
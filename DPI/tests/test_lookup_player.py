@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+from dpi.batch_game import BatchGame
+from dpi.dilemma import C, D
+from dpi.game import Game
+from dpi.genetic import GeneticSearch
+from dpi.lookup_player import LookupPlayer
+from dpi.markov import MarkovGame
+from dpi.player import Tft
+
+def test_default_table_is_tit_for_tat(dilemma, players):
+    lookup, tft = LookupPlayer(dilemma), Tft(dilemma)
+    for opponent in players:
+        if opponent.deterministic:
+            lookup_game = Game(lookup.fork(), opponent.fork(), 40)
+            tft_game = Game(tft.fork(), opponent.fork(), 40)
+            lookup_game.play()
+            tft_game.play()
+            assert lookup_game.score == tft_game.score
+        if MarkovGame.supports(lookup, opponent):
+            assert MarkovGame(lookup, opponent, 40, 0.1).expected_scores() == \
+                pytest.approx(MarkovGame(tft, opponent, 40, 0.1).expected_scores())
+
+def test_memory_two_batch_matches_scalar(dilemma, deterministic_players):
+    rng = np.random.default_rng(0)
+    lookup = LookupPlayer(dilemma, "m2", rng.integers(0, 2, 16), opening=(D, C))
+    game = BatchGame([lookup] * len(deterministic_players), list(deterministic_players), 30)
+    game.play()
+    for k, opponent in enumerate(deterministic_players):
+        scalar = Game(lookup.fork(), opponent.fork(), 30)
+        scalar.play()
+        assert tuple(game.scores[k]) == pytest.approx(scalar.score)
+
+def test_genome_round_trip(dilemma):
+    genome = np.array([1, 0, 0, 1, 1, 0, 1, 1, 0, 0, 1, 0, 1, 1, 0, 1, 1, 0], dtype=np.int8)
+    player = LookupPlayer.from_genome(dilemma, genome, 2)
+    assert player.memory == 2
+    assert np.array_equal(player.genome(), genome)
+    # The player keeps its own read-only copy
+    genome[0] = 0
+    assert player.table[0] == 1
+    with pytest.raises(ValueError):
+        player.table[0] = 0
+
+def test_genetic_search(deterministic_players):
+    search = GeneticSearch(deterministic_players, memory=1, population=20, generations=4,
+                           n_rounds=20, elite=2, seed=3)
+    best = search.play()
+    best_fitness = [fitness for fitness, _ in search.fitness_evolution]
+    # The elite survives, so the best fitness never decreases without noise
+    assert best_fitness == sorted(best_fitness)
+    assert search.fitness(best.genome()[None]) == pytest.approx(best_fitness[-1])
+
+    again = GeneticSearch(deterministic_players, memory=1, population=20, generations=4,
+                          n_rounds=20, elite=2, seed=3)
+    assert np.array_equal(again.play().genome(), best.genome())
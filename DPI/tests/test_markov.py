@@ -0,0 +1,34 @@
+import itertools
+import numpy as np
+import pytest
+from dpi import markov
+from dpi.batch_game import play_records
+from dpi.game import Game
+from dpi.markov import MarkovGame
+
+def finite_state_pairs(players):
+    finite_state = [player for player in players if MarkovGame.supports(player, player)]
+    return list(itertools.combinations_with_replacement(finite_state, 2))
+
+def test_noise_free_games_are_exact(deterministic_players):
+    for player_1, player_2 in finite_state_pairs(deterministic_players):
+        game = Game(player_1.fork(), player_2.fork(), 25)
+        game.play()
+        markov_game = MarkovGame(player_1, player_2, 25)
+        assert markov_game.expected_scores() == pytest.approx(game.score)
+        assert markov_game.expected_outcomes() == pytest.approx(game.outcomes)
+
+def test_matches_monte_carlo(players):
+    rng = np.random.default_rng(0)
+    n_games = 4000
+    for player_1, player_2 in finite_state_pairs(players)[:12]:
+        records = play_records([player_1] * n_games, [player_2] * n_games, 20, 0.1, rng)
+        expected = MarkovGame(player_1, player_2, 20, 0.1).expected_scores()
+        standard_error = records[:, :2].std(axis=0) / np.sqrt(n_games)
+        assert np.all(np.abs(records[:, :2].mean(axis=0) - expected) <= 5 * standard_error + 1e-9)
+
+def test_long_games_use_matrix_powers(players, monkeypatch):
+    player_1, player_2 = players[0], players[2]
+    iterated = MarkovGame(player_1, player_2, 300, 0.05).expected_scores()
+    monkeypatch.setattr(markov, "ITERATION_LIMIT", 10)
+    assert MarkovGame(player_1, player_2, 300, 0.05).expected_scores() == pytest.approx(iterated)
@@ -0,0 +1,67 @@
+import itertools
+import numpy as np
+import pytest
+from dpi.batch_game import play_records
+from dpi.dilemma import C, D
+from dpi.parallel import play_seeded
+from dpi.player import Cooperator, Player
+from dpi.tournament import Tournament
+
+def matches(players, repetitions):
+    pairs = itertools.combinations(range(len(players)), 2)
+    return [(i, j, repetition) for i, j in pairs for repetition in range(repetitions)]
+
+def test_results_do_not_depend_on_workers_or_chunks(players):
+    games = matches(players, 3)
+    serial = play_seeded(players, games, 40, 0.05, seed=7)
+    assert (play_seeded(players, games, 40, 0.05, seed=7, chunk_size=5) == serial).all()
+    assert (play_seeded(players, games, 40, 0.05, seed=7, n_jobs=2) == serial).all()
+    # Each match has its own stream: it does not depend on the other matches
+    assert (play_seeded(players, games[::-1], 40, 0.05, seed=7) == serial[::-1]).all()
+    assert not (play_seeded(players, games, 40, 0.05, seed=8) == serial).all()
+
+def test_tournament_does_not_depend_on_workers(players):
+    rankings = []
+    for n_jobs in (1, 2):
+        tournament = Tournament(players, n_rounds=40, error=0.05, repetitions=3,
+                                n_jobs=n_jobs, seed=3)
+        tournament.play()
+        rankings.append(({p.name: v for p, v in tournament.ranking.items()},
+                         tournament.outcomes))
+    assert rankings[0][0] == rankings[1][0]
+    assert np.array_equal(rankings[0][1], rankings[1][1])
+
+class Learner(Player):
+
+    cacheable = False
+
+    def __init__(self, dilemma, name=""):
+        """Cooperates in its odd matches and defects in its even ones"""
+        super().__init__(dilemma, name)
+        self.matches = 0
+
+    def strategy(self, opponent):
+        if len(self.history) == 0:
+            self.matches += 1
+        return C if self.matches % 2 else D
+
+    def fork(self):
+        self.reset()
+        return self
+
+def test_learners_carry_over_on_every_path(dilemma, players):
+    roster = (Learner(dilemma, "learner"),) + tuple(players[:4])
+    rankings = []
+    for seed in (None, 3):
+        roster[0].matches = 0
+        tournament = Tournament(roster, n_rounds=10, repetitions=3, seed=seed)
+        tournament.play()
+        rankings.append(tournament.ranking[roster[0]])
+    assert rankings[0] == rankings[1]
+
+    roster[0].matches = 0
+    records = play_records([roster[0]] * 4, [Cooperator(dilemma)] * 4, 10)
+    assert records[:, 0].tolist() == [20, 30, 20, 30]
+
+    with pytest.raises(ValueError):
+        Tournament(roster, n_jobs=2, seed=3).play()
@@ -0,0 +1,30 @@
+import numpy as np
+import pytest
+from dpi.evolution import Evolution
+from dpi.game import Game
+from dpi.payoff_matrix import PayoffMatrix
+
+def test_deterministic_entries_are_single_games(deterministic_players):
+    payoffs = PayoffMatrix(deterministic_players, n_rounds=40)
+    for i, player_1 in enumerate(deterministic_players):
+        for j, player_2 in enumerate(deterministic_players):
+            game = Game(player_1.fork(), player_2.fork(), 40)
+            game.play()
+            expected = game.score if i != j else (sum(game.score) / 2,) * 2
+            assert payoffs.expected_scores(i, j) == pytest.approx(expected)
+
+def test_set_is_stored_in_order(players):
+    payoffs = PayoffMatrix(players)
+    payoffs.set(3, 1, (10.0, 20.0))
+    assert payoffs.expected_scores(1, 3) == (20.0, 10.0)
+    assert payoffs.expected_scores(3, 1) == (10.0, 20.0)
+    payoffs.set(2, 2, (1.0, 3.0))
+    assert payoffs.expected_scores(2, 2) == (2.0, 2.0)
+
+def test_fitness_matches_games_between_individuals(deterministic_players):
+    evolution = Evolution(deterministic_players, n_rounds=30, repetitions=2,
+                          initial_population=3 * len(deterministic_players))
+    counts = np.array([1, 4, 0, 2, 3, 1, 1, 2, 5, 1])[:len(deterministic_players)]
+    types = np.repeat(np.arange(len(deterministic_players)), counts)
+    scores = evolution.play_individuals(types)
+    assert scores == pytest.approx(evolution.fitness(counts)[types])
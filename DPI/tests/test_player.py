@@ -0,0 +1,57 @@
+import pickle
+from dpi.cache import strategy_key
+from dpi.dilemma import D
+from dpi.game import Game
+from dpi.player import Destructomatic, MatchState
+
+def test_interleaved_forks_do_not_interfere(deterministic_players):
+    spec = next(player for player in deterministic_players if isinstance(player, Destructomatic))
+    opponents = [player for player in deterministic_players if player is not spec]
+    sequential = []
+    for opponent in opponents:
+        game = Game(spec.fork(), opponent.fork(), 30)
+        game.play()
+        sequential.append(list(game.player_1.history))
+
+    # Every game advances one round at a time, all of them with forks of
+    # the same spec
+    pairs = [(spec.fork(), opponent.fork()) for opponent in opponents]
+    for _ in range(30):
+        for player, opponent in pairs:
+            action, reply = player.strategy(opponent), opponent.strategy(player)
+            player.history.append(action)
+            opponent.history.append(reply)
+    assert [list(player.history) for player, _ in pairs] == sequential
+    assert len(spec.history) == 0 and spec.state.defection_count == 0
+
+def test_match_state_is_per_match(players):
+    for player in players:
+        fork = player.fork()
+        assert isinstance(fork.state, MatchState) and fork.state is not player.state
+        assert type(fork.state) is type(player).State
+        fork.history.append(D)
+        fork.iteration = 3
+        assert len(player.history) == 0 and player.iteration == 0
+        assert not hasattr(fork.state, "__dict__")
+        fork.reset()
+        assert len(fork.history) == 0 and fork.trust
+
+def test_parameters_are_immutable(players):
+    for player in players:
+        for value in vars(player).values():
+            assert not isinstance(value, (list, dict, set))
+
+def test_forks_pickle(players):
+    fork = players[3].fork()
+    Game(fork, players[0].fork(), 12).play()
+    copy = pickle.loads(pickle.dumps(fork))
+    assert list(copy.history) == list(fork.history)
+    assert copy.state.rounds_to_defect == fork.state.rounds_to_defect
+
+def test_strategy_key_ignores_the_match_state(players):
+    for player in players:
+        fork = player.fork()
+        key = strategy_key(fork)
+        Game(fork, players[0].fork(), 20, error=0.1).play()
+        assert strategy_key(fork) == key == strategy_key(player)
+    assert len({strategy_key(player) for player in players}) == len(players)
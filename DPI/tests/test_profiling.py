@@ -0,0 +1,42 @@
+import json
+import random
+from dpi.evolution import Evolution
+from dpi.game import Game
+from dpi.profiling import Profiler
+from dpi.tournament import Tournament
+
+def play_game(players):
+    random.seed(4)
+    game = Game(players[0].fork(), players[4].fork(), 50, error=0.1)
+    game.play()
+    return game
+
+def test_results_do_not_change(players):
+    game = play_game(players)
+    tournament = Tournament(players, n_rounds=30, error=0.05, seed=3)
+    tournament.play()
+    with Profiler() as profiler:
+        profiled_game = play_game(players)
+        profiled = Tournament(players, n_rounds=30, error=0.05, seed=3)
+        profiled.play()
+    assert profiled_game.score == game.score
+    assert list(profiled_game.player_1.history) == list(game.player_1.history)
+    assert list(profiled.ranking.values()) == list(tournament.ranking.values())
+
+    assert {"strategy", "noise", "scoring"} <= set(profiler.phases)
+    assert profiler.phases["noise"][0] >= 2 * 50
+    assert profiler.strategies["Tft"][0] >= 50
+    assert profiler.matches[0]["simulated_rounds"] == 50
+
+def test_evolution_phases(players, tmp_path):
+    with Profiler() as profiler:
+        Evolution(players, n_rounds=20, generations=3, initial_population=18,
+                  samples=5).play(plot=False)
+    assert profiler.phases["fitness"][0] == 3
+    assert profiler.phases["selection"][0] == 3
+
+    path = str(tmp_path / "profile.json")
+    profiler.dump(path)
+    with open(path) as file:
+        assert json.load(file)["phases"]["fitness"]["calls"] == 3
+    assert "fitness" in profiler.summary()
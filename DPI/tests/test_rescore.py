@@ -0,0 +1,33 @@
+import numpy as np
+import pytest
+from dpi.__main__ import build_players, DEFAULT_PLAYERS
+from dpi.dilemma import Dilemma
+from dpi.tournament import Tournament, rescore_outcomes
+
+def play_tournament(dilemma, **settings):
+    tournament = Tournament(build_players(DEFAULT_PLAYERS, dilemma), n_rounds=30,
+                            repetitions=2, **settings)
+    tournament.play()
+    return tournament
+
+# The seed fixes the moves of the random strategies and the noise
+@pytest.mark.parametrize("settings", [{"seed": 3}, {"error": 0.05, "seed": 3},
+                                      {"error": 0.05, "exact_expectation": True, "seed": 3}])
+def test_rescore_matches_replaying(dilemma, settings):
+    others = [Dilemma(3, 0, 5, 1), Dilemma(1, -2, 4, -1),
+              Dilemma.from_matrices(np.array([[3, 0], [5, 1]]), np.array([[2, 1], [4, 0]]))]
+    tournament = play_tournament(dilemma, **settings)
+    points = tournament.rescore(others)
+    for row, other in zip(points, others):
+        replayed = play_tournament(other, **settings)
+        assert row == pytest.approx([replayed.ranking[player] for player in replayed.players])
+        assert list(tournament.rescore(other).values()) == pytest.approx(
+            list(replayed.ranking.values()))
+
+def test_payoff_rows(dilemma):
+    tournament = play_tournament(dilemma, seed=3)
+    rows = np.array([[2, -1, 3, 0], [3, 0, 5, 1]])
+    assert np.allclose(rescore_outcomes(tournament.outcomes, rows),
+                       tournament.rescore([Dilemma(*row) for row in rows]))
+    assert rescore_outcomes(tournament.outcomes, rows[:1])[0] == pytest.approx(
+        [tournament.ranking[player] for player in tournament.players])
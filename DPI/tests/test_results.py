@@ -0,0 +1,33 @@
+import numpy as np
+import pytest
+from dpi.results import ResultsWriter, RECORD_FIELDS, iter_results, load_results, load_metadata
+from dpi.tournament import Tournament
+
+def test_tournament_records_round_trip(players, tmp_path):
+    path = str(tmp_path / "store")
+    with ResultsWriter(path, batch_size=10, metadata={"players": len(players)}) as sink:
+        tournament = Tournament(players, n_rounds=30, error=0.05, repetitions=2, seed=5)
+        tournament.play(sink=sink)
+
+    results = load_results(path)
+    records = list(Tournament(players, n_rounds=30, error=0.05, repetitions=2,
+                              seed=5).iter_matches())
+    assert len(list(iter_results(path))) == -(-len(records) // 10)
+    for field, dtype in RECORD_FIELDS.items():
+        assert results[field].dtype == dtype
+        assert results[field].tolist() == pytest.approx([record[field] for record in records])
+    assert load_metadata(path) == {"players": len(players)}
+
+    # The ranking is recovered from the store
+    totals = (np.bincount(results["player_1"], results["score_1"], len(players))
+              + np.bincount(results["player_2"], results["score_2"], len(players)))
+    assert totals == pytest.approx([tournament.ranking[player] for player in players])
+
+def test_writers_append_to_a_store(tmp_path):
+    path = str(tmp_path)
+    record = {field: 1 for field in RECORD_FIELDS}
+    for _ in range(2):
+        with ResultsWriter(path) as sink:
+            sink.write(record)
+    assert len(load_results(path)["player_1"]) == 2
+    assert load_results(str(tmp_path / "missing"))["score_1"].shape == (0,)
@@ -0,0 +1,45 @@
+import numpy as np
+import pytest
+from dpi.running_stats import RunningStats
+from dpi.tournament import Tournament
+from dpi.results import ResultsWriter
+
+def test_matches_numpy_with_repeated_rows():
+    rng = np.random.default_rng(0)
+    idx = rng.integers(0, 5, 400)
+    values = 1e9 + rng.normal(size=(400, 2))
+    stats = RunningStats((5, 2))
+    for start in range(0, 400, 37):
+        stats.update(idx[start:start + 37], values[start:start + 37])
+
+    for row in range(5):
+        samples = values[idx == row]
+        assert stats.count[row] == len(samples)
+        assert stats.mean()[row] == pytest.approx(samples.mean(axis=0), rel=1e-15)
+        assert stats.variance()[row] == pytest.approx(samples.var(axis=0, ddof=1), rel=1e-6)
+
+def test_variance_needs_two_samples():
+    stats = RunningStats((2,))
+    stats.update(np.array([0]), np.array([3.0]))
+    assert np.isinf(stats.variance()).all()
+    assert np.isinf(stats.half_width()).all()
+
+def test_adaptive_intervals_contain_the_expected_points(players):
+    finite_state = [player for player in players if player.automaton() is not None]
+    exact = Tournament(finite_state, n_rounds=30, error=0.05, repetitions=50,
+                       exact_expectation=True)
+    exact.play()
+    adaptive = Tournament(finite_state, n_rounds=30, error=0.05, repetitions=50,
+                          seed=1, precision=2.0, confidence=0.999)
+    adaptive.play()
+    assert min(adaptive.pair_repetitions.values()) < 50
+    for player in finite_state:
+        low, high = adaptive.confidence_intervals[player]
+        assert low <= exact.ranking[player] <= high
+
+@pytest.mark.parametrize("mode", [{"precision": 1.0}, {"exact_expectation": True}])
+def test_unsupported_combinations_raise(players, mode, tmp_path):
+    with pytest.raises(ValueError):
+        Tournament(players, n_jobs=2, **mode).play()
+    with pytest.raises(ValueError):
+        Tournament(players, **mode).play(sink=ResultsWriter(str(tmp_path)))
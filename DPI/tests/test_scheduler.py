@@ -0,0 +1,54 @@
+import multiprocessing
+import random
+import numpy as np
+from multiprocessing.connection import Client
+from dpi import scheduler
+from dpi.scheduler import Scheduler, plan_tasks, strategy_costs
+from dpi.tournament import Tournament
+
+def test_plan_covers_every_match_once():
+    rng = np.random.default_rng(0)
+    costs = rng.random((6, 6))
+    costs = costs + costs.T
+    tasks = plan_tasks(costs, repetitions=3, n_tasks=5)
+    matches = sorted(match for _, task in tasks for match in task)
+    assert matches == sorted((i, j, r) for i in range(6) for j in range(i + 1, 6)
+                             for r in range(3))
+    assert [cost for cost, _ in tasks] == sorted((cost for cost, _ in tasks), reverse=True)
+
+def test_costs_do_not_change_the_random_state(players):
+    random.seed(5)
+    expected = random.random()
+    random.seed(5)
+    setup, step = strategy_costs(players)
+    assert random.random() == expected
+    assert (setup >= 0).all() and (step > 0).all()
+
+def test_matches_the_seeded_tournament(players):
+    tournament = Tournament(players, n_rounds=40, error=0.05, repetitions=3, seed=2)
+    tournament.play_parallel()
+    totals = Scheduler(players, 40, 0.05, 3, seed=2, n_workers=2).play()
+    assert totals.tolist() == [tournament.ranking[player] for player in players]
+
+def vanish(address, authkey, wait_for_task):
+    """A worker that connects and leaves (after its first task, or at once)"""
+    connection = Client(address, authkey=authkey)
+    if wait_for_task:
+        connection.recv()
+    connection.close()
+
+def test_lost_workers_give_back_their_tasks(players, monkeypatch):
+    expected = Scheduler(players, 40, 0.05, 3, seed=2).play().copy()
+
+    class Listener(scheduler.Listener):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            context = multiprocessing.get_context("fork")
+            for wait_for_task in (False, True):
+                context.Process(target=vanish, daemon=True,
+                                args=(self.address, b"secret", wait_for_task)).start()
+
+    monkeypatch.setattr(scheduler, "Listener", Listener)
+    sharded = Scheduler(players, 40, 0.05, 3, seed=2, remote_workers=2,
+                        authkey=b"secret")
+    assert np.array_equal(sharded.play(), expected)
@@ -0,0 +1,56 @@
+import csv
+import numpy as np
+import pytest
+from dpi.batch_game import BatchGame
+from dpi.evolution import Evolution
+from dpi.sweep import Sweep, play_unit, write_csv
+from dpi.tournament import Tournament
+
+def test_noise_free_sweep_matches_tournaments(deterministic_players):
+    roster = [player.name for player in deterministic_players[2:6]]
+    sweep = Sweep(deterministic_players, rounds=(30, 100), repetitions=(1, 2),
+                  rosters=[range(len(deterministic_players)), roster])
+    table = sweep.play()
+    for n_rounds in (30, 100):
+        for repetitions in (1, 2):
+            for k, members in enumerate(sweep.rosters):
+                players = tuple(deterministic_players[i] for i in members)
+                tournament = Tournament(players, n_rounds=n_rounds, repetitions=repetitions)
+                tournament.play()
+                rows = table[(table["n_rounds"] == n_rounds)
+                             & (table["repetitions"] == repetitions) & (table["roster"] == k)]
+                assert dict(zip(rows["player"], rows["points"])) == pytest.approx(
+                    {player.name: points for player, points in tournament.ranking.items()})
+                assert rows["rank"].tolist() == list(range(1, len(players) + 1))
+
+def test_results_do_not_depend_on_workers(players):
+    settings = {"errors": (0.0, 0.05), "rounds": (10, 40), "repetitions": (1, 3), "seed": 3}
+    table = Sweep(players, **settings).play()
+    assert np.array_equal(Sweep(players, n_jobs=2, **settings).play(), table)
+
+def test_scalar_and_batch_units_agree(players, monkeypatch):
+    args = (players, [(0, 1), (1, 2), (3, 6)], [1, 1, 2], np.array([10, 50, 100]), 0.0, 5)
+    batch = play_unit(*args)
+    monkeypatch.setattr(BatchGame, "supports", staticmethod(lambda players: False))
+    assert np.array_equal(play_unit(*args), batch)
+
+@pytest.mark.parametrize("dynamics, dtype", [("selection", "i8"), ("replicator", "f8")])
+def test_evolve_matches_evolution(deterministic_players, dynamics, dtype):
+    sweep = Sweep(deterministic_players, rounds=(30,), repetitions=(2,))
+    table = sweep.evolve(generations=5, reproductivity=0.2, initial_population=50,
+                         dynamics=dynamics)
+    assert table["count"].dtype == dtype
+    evolution = Evolution(deterministic_players, n_rounds=30, generations=5,
+                          reproductivity=0.2, initial_population=50, dynamics=dynamics)
+    evolution.play(plot=False)
+    assert table["count"] == pytest.approx([values[-1] for values in
+                                            evolution.count_evolution.values()])
+
+def test_write_csv(players, tmp_path):
+    table = Sweep(players[:3], rounds=(10,), seed=0).play()
+    path = str(tmp_path / "sweep.csv")
+    write_csv(table, path)
+    with open(path, newline="") as file:
+        rows = list(csv.reader(file))
+    assert rows[0] == list(table.dtype.names)
+    assert [row[4] for row in rows[1:]] == table["player"].tolist()
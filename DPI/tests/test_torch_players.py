@@ -0,0 +1,49 @@
+import copy
+import pytest
+from dpi.batch_game import BatchGame
+from dpi.game import Game
+
+torch = pytest.importorskip("torch")
+
+def batch_and_scalar(player, opponent, n_rounds):
+    """Results of the same game played by 'BatchGame' and by 'Game', each
+    with its own copy of 'player'"""
+    game = BatchGame([copy.deepcopy(player)], [opponent], n_rounds)
+    game.play()
+    scalar = Game(copy.deepcopy(player).fork(), opponent.fork(), n_rounds)
+    scalar.play()
+    return game, scalar
+
+@pytest.mark.parametrize("name", ["NNPlayer", "LSTMPlayer"])
+def test_batch_games_match_scalar_games(name, dilemma, players):
+    import dpi
+    torch.manual_seed(0)
+    # No optimizer step during the game, so both models stay the same
+    player = getattr(dpi, name)(dilemma, name, batch_size=1000)
+    for opponent in players:
+        game, scalar = batch_and_scalar(player, opponent, 30)
+        assert tuple(game.scores[0]) == pytest.approx(scalar.score)
+
+def test_players_learn_while_playing(dilemma, players):
+    from dpi import NNPlayer
+    torch.manual_seed(0)
+    player = NNPlayer(dilemma, "nn", batch_size=8)
+    before = [parameter.detach().clone() for parameter in player.model.parameters()]
+    BatchGame([player] * 4, list(players[:4]), 40).play()
+    assert any(not torch.equal(old, new.detach())
+               for old, new in zip(before, player.model.parameters()))
+
+def test_stateful_lstm_matches_scalar_games(dilemma, players):
+    from dpi import StatefulLSTMPlayer
+    torch.manual_seed(0)
+    player = StatefulLSTMPlayer(dilemma, "lstm", bptt=4)
+    for opponent in players:
+        game, scalar = batch_and_scalar(player, opponent, 30)
+        assert tuple(game.scores[0]) == pytest.approx(scalar.score)
+
+def test_stateful_lstm_streams_belong_to_the_match(dilemma, players):
+    from dpi import StatefulLSTMPlayer
+    player = StatefulLSTMPlayer(dilemma, "lstm", bptt=1000)
+    Game(player.fork(), players[0].fork(), 10).play()
+    assert len(player.state.stream["inputs"]) == 9
+    assert len(player.fork().state.stream["inputs"]) == 0